@@ -1,31 +1,98 @@
 # Database configuration
 import os
+import threading
+from typing import List, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
 from dotenv import load_dotenv
+from app.services.db_pool import AdmissionQueuePool, add_liveness_check, pool_settings
+from app.services.tracing import instrument_engine
 
-load_dotenv()
+_engine: Optional[Engine] = None
+_replica_engines: Optional[List[Engine]] = None
+_engine_lock = threading.Lock()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+def _create_engine(database_url: str, label: str) -> Engine:
+    # Pool sized per worker from DB_MAX_CONNECTIONS (see app/services/db_pool.py)
+    engine = create_engine(
+        database_url,
+        poolclass=AdmissionQueuePool,
+        echo=False,          # Set to True for SQL debugging
+        **pool_settings()
+    )
+    engine.pool.label = label
+    # Ping only connections that sat idle, instead of pool_pre_ping's round trip on every checkout
+    add_liveness_check(engine, float(os.getenv("DB_POOL_IDLE_PING_SECONDS", "30")))
+    instrument_engine(engine)
+    return engine
 
-# Create engine with RDS-optimized settings
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=3600,   # Recycle connections every hour
-    pool_size=5,         # Connection pool size
-    max_overflow=10,     # Max overflow connections
-    echo=False           # Set to True for SQL debugging
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_engine() -> Engine:
+    """Create the engine on first use, so importing the app reads no config and opens no connections"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                load_dotenv()
+                database_url = os.getenv("DATABASE_URL")
+                if not database_url:
+                    raise RuntimeError("DATABASE_URL is not set")
+
+                engine = _create_engine(database_url, "primary")
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def get_replica_engines() -> List[Engine]:
+    """Engines for the read replicas in DATABASE_REPLICA_URLS (comma-separated); empty without replicas"""
+    global _replica_engines
+    if _replica_engines is None:
+        with _engine_lock:
+            if _replica_engines is None:
+                load_dotenv()
+                urls = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+                _replica_engines = [_create_engine(url, "replica") for url in urls]
+    return _replica_engines
+
+class RoutingSession(Session):
+    """
+    Session that runs its queries on the replica engine in info["replica"], if any
+    (set by app.services.replication.get_read_db). Flushes and INSERT/UPDATE/DELETE
+    statements go to the primary, and so does everything after them, so a request
+    always reads its own writes.
+    """
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["wrote"] = True
+            self.info.pop("replica", None)
+        replica = self.info.get("replica")
+        if replica is not None:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+class LazySessionMaker(sessionmaker):
+    """sessionmaker that creates the engine when the first session is opened"""
+    def __call__(self, **local_kw):
+        if _engine is None:
+            get_engine()
+        return super().__call__(**local_kw)
+
+SessionLocal = LazySessionMaker(class_=RoutingSession, autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
+def __getattr__(name):
+    # `from app.database import engine` still works for scripts; it creates the engine at that point
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,195 @@
+# Logging configuration
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from app.services.tracing import current_trace_id
+
+# Correlation id of the request being handled, attached to every record
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id", "trace_id"}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with request/trace ids and any ``extra`` fields"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.trace_id = current_trace_id()
+        return True
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records so noisy diagnostics stay cheap"""
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+class ErrorRateLimitFilter(logging.Filter):
+    """
+    Let through at most ``limit`` WARNING+ records per call site and window;
+    the next record after a suppressed burst reports how many were dropped.
+    Records are grouped by the logging call's file and line, not the message,
+    so f-string messages don't each get an entry of their own.
+    """
+    def __init__(self, limit: int, window: float, max_entries: int = 10000):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.max_entries = max_entries
+        self._state: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.limit <= 0:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] > self.window:
+                suppressed = state[2] if state else 0
+                if state is None and len(self._state) >= self.max_entries:
+                    self._prune(now)
+                self._state[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if state[1] < self.limit:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+    def _prune(self, now: float):
+        """Drop expired windows; if every window is still open, drop the oldest half"""
+        self._state = {key: state for key, state in self._state.items() if now - state[0] <= self.window}
+        if len(self._state) >= self.max_entries:
+            keep = sorted(self._state.items(), key=lambda item: item[1][0])[len(self._state) // 2:]
+            self._state = dict(keep)
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that skips the stock prepare() formatting pass: only %-args are
+    merged on the caller's thread; JSON encoding and tracebacks happen on the listener.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging():
+    """
+    Route all logging through a QueueHandler so the event loop only enqueues records;
+    a background QueueListener thread formats and writes them to stdout (journald).
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    output = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _InProcessQueueHandler(log_queue)
+    # Filters run on the calling thread before enqueueing, so dropped records cost almost nothing
+    queue_handler.addFilter(DebugSamplingFilter(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))))
+    queue_handler.addFilter(ErrorRateLimitFilter(
+        int(os.getenv("LOG_ERROR_RATE_LIMIT", "10")),
+        float(os.getenv("LOG_ERROR_RATE_WINDOW", "60"))
+    ))
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    # Let uvicorn's loggers flow through the same pipeline
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class RequestIdMiddleware:
+    """ASGI middleware assigning each request a correlation id (X-Request-ID)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ChangeCounter(Base):
+    __tablename__ = "change_counters"
+    
+    # One row per tracked table; version is bumped in every transaction that writes to it
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
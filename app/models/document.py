@@ -1,10 +1,9 @@
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey
-from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy import Column, String, DateTime, Enum, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import BinaryUUID, new_id
 import enum
-import uuid
 
 class DocumentStatus(enum.Enum):
     pending = "pending"
@@ -14,24 +13,38 @@ class DocumentStatus(enum.Enum):
 class Document(Base):
     __tablename__ = "documents"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    spa_id = Column(CHAR(36), ForeignKey("spas.id"), nullable=False)
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    spa_id = Column(BinaryUUID, ForeignKey("spas.id"), nullable=False)
     sharefile_id = Column(String(255), nullable=False)
     name = Column(String(255), nullable=False)
     status = Column(Enum(DocumentStatus), default=DocumentStatus.pending, nullable=False)
     signed_at = Column(DateTime, nullable=True)
+    signing_url = Column(Text, nullable=True)  # Pre-generated by the sharefile.signing_link job
+    status_checked_at = Column(DateTime, nullable=True)  # Last ShareFile signing status poll
     
     # Relationships
     spa = relationship("Spa", back_populates="documents")
 
+    __table_args__ = (
+        # A spa's documents (portal snapshot) and its unsigned count (signing progress)
+        Index("ix_documents_spa_id_status", "spa_id", "status"),
+        # Signing status poll: pending documents not checked recently
+        Index("ix_documents_status_checked_at", "status", "status_checked_at"),
+    )
+
 class PaymentMethod(Base):
     __tablename__ = "payment_methods"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    spa_id = Column(CHAR(36), ForeignKey("spas.id"), nullable=False)
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    spa_id = Column(BinaryUUID, ForeignKey("spas.id"), nullable=False)
     stripe_customer_id = Column(String(255), nullable=False)
     stripe_payment_method_id = Column(String(255), nullable=False)
     setup_at = Column(DateTime, server_default=func.now())
     
     # Relationships
-    spa = relationship("Spa", back_populates="payment_method")
\ No newline at end of file
+    spa = relationship("Spa", back_populates="payment_method")
+
+    __table_args__ = (
+        # One payment method per spa: concurrent confirm/webhook upserts can't both insert
+        Index("uq_payment_methods_spa_id", "spa_id", unique=True),
+    )
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, DateTime, Enum, Text, Integer, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.types import BinaryUUID, new_id
+from datetime import datetime
+import enum
+
+class JobStatus(enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    dead = "dead"
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    job_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    priority = Column(Integer, default=100, nullable=False)  # Lower runs first
+    status = Column(Enum(JobStatus), default=JobStatus.queued, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Earliest time the job may run
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String(255), nullable=True)  # host:pid of the worker holding the job
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Covers the claim query: WHERE status = 'queued' AND run_at <= now ORDER BY priority
+        Index("ix_jobs_status_run_at_priority", "status", "run_at", "priority"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.types import BinaryUUID, new_id
+
+class NotificationEvent(Base):
+    __tablename__ = "notification_events"
+
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    spa_id = Column(BinaryUUID, ForeignKey("spas.id"), nullable=True)
+    event = Column(String(50), nullable=False)  # e.g. invite_sent, documents_signed
+    recipient = Column(String(255), nullable=False)
+    context = Column(JSON, nullable=True)  # Extra template variables captured when the event fired
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)  # NULL until the dispatcher delivers it
+
+    __table_args__ = (
+        # The dispatcher scans unsent events oldest first
+        Index("ix_notification_events_sent_at_created_at", "sent_at", "created_at"),
+    )
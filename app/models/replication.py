@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, BigInteger
+from app.database import Base
+
+class ReplicationHeartbeat(Base):
+    __tablename__ = "replication_heartbeats"
+    
+    # Single row written on the primary every few seconds; a replica's copy shows how far behind it is
+    id = Column(Integer, primary_key=True)
+    beat_at_ms = Column(BigInteger, nullable=False)  # Unix time in milliseconds
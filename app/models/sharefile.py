@@ -1,16 +1,15 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, Integer
-from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Boolean, Integer, BigInteger, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
-import uuid
+from app.models.types import BinaryUUID, new_id
 
 class ShareFileCredentials(Base):
     __tablename__ = "sharefile_credentials"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(CHAR(36), ForeignKey("users.id"), nullable=True)  # NULL for organization-wide credentials
-    created_by_user_id = Column(CHAR(36), ForeignKey("users.id"), nullable=True)  # Track who created the credentials
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    user_id = Column(BinaryUUID, ForeignKey("users.id"), nullable=True)  # NULL for organization-wide credentials
+    created_by_user_id = Column(BinaryUUID, ForeignKey("users.id"), nullable=True)  # Track who created the credentials
     organization_wide = Column(Boolean, default=True)  # True for organization-wide credentials
     access_token = Column(Text, nullable=False)  # Encrypted in production
     refresh_token = Column(Text, nullable=True)  # Encrypted in production  
@@ -27,4 +26,38 @@ class ShareFileCredentials(Base):
     
     # Relationship back to user (optional for organization-wide)
     user = relationship("User", foreign_keys=[user_id])
-    created_by_user = relationship("User", foreign_keys=[created_by_user_id])
\ No newline at end of file
+    created_by_user = relationship("User", foreign_keys=[created_by_user_id])
+
+    __table_args__ = (
+        # Every ShareFile route: the active organization-wide credentials
+        Index("ix_sharefile_credentials_org_active", "organization_wide", "is_active"),
+        # Background refresh scan: active, auto-refreshing, not refreshed since the cutoff
+        Index("ix_sharefile_credentials_refresh_scan", "is_active", "auto_refresh", "last_refreshed"),
+    )
+
+class ShareFileItem(Base):
+    __tablename__ = "sharefile_items"
+    
+    # Local mirror of the ShareFile folder tree, kept current by app/services/sharefile_index.py
+    id = Column(String(64), primary_key=True)  # ShareFile item id
+    parent_id = Column(String(64), nullable=True)  # NULL for the home folder
+    name = Column(String(255), nullable=False)
+    item_type = Column(String(20), nullable=False)  # 'folder', 'file', ...
+    size = Column(BigInteger, default=0)
+    created_at = Column(DateTime, nullable=True)  # ShareFile CreationDate
+    modified_at = Column(DateTime, nullable=True)  # ShareFile LastWriteTime
+    depth = Column(Integer, nullable=False, default=0)  # Levels below the home folder
+    # Folders: ProgenyEditDate as last seen by the parent listing; unchanged means nothing below changed
+    watermark = Column(String(40), nullable=True)
+    needs_listing = Column(Boolean, nullable=False, default=False)  # Children must be (re)listed
+    listed_at = Column(DateTime, nullable=True)  # When the children were last listed
+    synced_at = Column(DateTime, nullable=False)  # When a listing last returned this item
+
+    __table_args__ = (
+        # Browsing: a folder's children
+        Index("ix_sharefile_items_parent_id", "parent_id"),
+        # Search by name
+        Index("ix_sharefile_items_name", "name"),
+        # Sync: folders waiting to be listed, shallowest first
+        Index("ix_sharefile_items_needs_listing", "needs_listing", "depth"),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.types import BinaryUUID
+
+class SpaSnapshot(Base):
+    __tablename__ = "spa_snapshots"
+    
+    # Denormalized view of a spa's onboarding state, rebuilt whenever the spa or its children change
+    spa_id = Column(BinaryUUID, ForeignKey("spas.id"), primary_key=True)
+    data = Column(JSON, nullable=False)
+    etag = Column(String(64), nullable=False)  # Hash of data, used for conditional GETs
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -1,10 +1,9 @@
-from sqlalchemy import Column, String, DateTime, Enum, Text, ForeignKey
-from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy import Column, String, DateTime, Enum, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.types import BinaryUUID, new_id
 import enum
-import uuid
 
 class SpaStatus(enum.Enum):
     invited = "invited"
@@ -16,7 +15,7 @@ class SpaStatus(enum.Enum):
 class Spa(Base):
     __tablename__ = "spas"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
     name = Column(String(255), nullable=False)
     contact_email = Column(String(255), nullable=False)
     status = Column(Enum(SpaStatus), default=SpaStatus.invited, nullable=False)
@@ -27,15 +26,24 @@ class Spa(Base):
     documents = relationship("Document", back_populates="spa")
     payment_method = relationship("PaymentMethod", back_populates="spa", uselist=False)
 
+    __table_args__ = (
+        # Dashboard stats: COUNT(*) WHERE status = ? per status
+        Index("ix_spas_status", "status"),
+    )
+
 class OnboardingInfo(Base):
     __tablename__ = "onboarding_info"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    spa_id = Column(CHAR(36), ForeignKey("spas.id"), nullable=False)
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
+    spa_id = Column(BinaryUUID, ForeignKey("spas.id"), nullable=False)
     business_name = Column(String(255), nullable=False)
     address = Column(Text, nullable=False)
     license_number = Column(String(100), nullable=False)
     submitted_at = Column(DateTime, server_default=func.now())
     
     # Relationships
-    spa = relationship("Spa", back_populates="onboarding_info")
\ No newline at end of file
+    spa = relationship("Spa", back_populates="onboarding_info")
+
+    __table_args__ = (
+        Index("ix_onboarding_info_spa_id", "spa_id"),
+    )
\ No newline at end of file
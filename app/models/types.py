@@ -0,0 +1,49 @@
+import os
+import time
+import uuid
+from sqlalchemy.types import BINARY, TypeDecorator
+
+def _uuid7_int() -> int:
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)   # version 7
+    return (value & ~(0x3 << 62)) | (0x2 << 62)    # RFC 4122 variant
+
+def _format_hex(digits: str) -> str:
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit millisecond timestamp followed by random bits"""
+    return uuid.UUID(int=_uuid7_int())
+
+def new_id() -> str:
+    """Primary key default: new rows land at the right-hand edge of the clustered index"""
+    return _format_hex(f"{_uuid7_int():032x}")
+
+class BinaryUUID(TypeDecorator):
+    """
+    UUID stored as BINARY(16) and exposed as its canonical string form,
+    so models, queries and API responses keep working with str ids.
+    """
+    impl = BINARY(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        # Hex parsing instead of uuid.UUID(): bulk inserts and IN lists convert many ids per statement
+        try:
+            raw = bytes.fromhex(value.replace("-", ""))
+        except (ValueError, AttributeError, TypeError):
+            raw = None
+        if raw is None or len(raw) != 16:
+            # Not a UUID (e.g. a mistyped id in a URL): bind something no BINARY(16) key equals,
+            # so lookups find nothing and the route answers 404 as before
+            return str(value).encode("utf-8")
+        return raw
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return _format_hex(bytes(value).hex())
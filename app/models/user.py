@@ -1,9 +1,8 @@
-from sqlalchemy import Column, String, DateTime, Enum, Text
-from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy import Column, String, DateTime, Enum, Text, Index
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.types import BinaryUUID, new_id
 import enum
-import uuid
 
 class UserRole(enum.Enum):
     admin = "admin"
@@ -12,9 +11,27 @@ class UserRole(enum.Enum):
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(CHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, default=new_id)
     role = Column(Enum(UserRole), nullable=False)
     email = Column(String(255), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
-    spa_id = Column(CHAR(36), nullable=True)  # Foreign key to Spa, nullable for admin
-    created_at = Column(DateTime, server_default=func.now())
\ No newline at end of file
+    spa_id = Column(BinaryUUID, nullable=True)  # Foreign key to Spa, nullable for admin
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_users_spa_id", "spa_id"),
+        # Notification recipients: the admin accounts
+        Index("ix_users_role", "role"),
+    )
+
+class StreamTicket(Base):
+    __tablename__ = "stream_tickets"
+
+    # Used event-stream tickets (app/services/auth.py create_stream_ticket): the jti is the primary key,
+    # so a second use is an insert conflict on whichever worker it reaches
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stream_tickets_expires_at", "expires_at"),
+    )
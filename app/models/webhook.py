@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, Text, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class WebhookEvent(Base):
+    __tablename__ = "webhook_events"
+
+    # The provider's event id is the primary key, so replays and duplicates are a single index lookup
+    id = Column(String(255), primary_key=True)
+    source = Column(String(50), nullable=False)  # e.g. "stripe"
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)  # Raw event as received
+    received_at = Column(DateTime, server_default=func.now())
+    processed_at = Column(DateTime, nullable=True)  # NULL until the processor has applied it
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_webhook_events_source_processed_at", "source", "processed_at"),
+    )
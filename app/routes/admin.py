@@ -1,16 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
 from typing import List
 from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, SessionLocal
+from app.models.user import User, StreamTicket
 from app.models.spa import Spa, SpaStatus
 from app.routes.auth import get_current_user
-from app.services.sharefile import ShareFileAPI
+from app.services.sharefile import ShareFileAPI, CircuitOpenError, get_organization_api, route_executor
+from app.services.rate_limit import RateLimitExceeded
+from app.services.sharefile_items import extract_items, normalize_items, normalize_item, listing_version
+from app.services.sharefile_index import sharefile_index, as_raw_item, comparable_item
+from app.services.sharefile_tree import folder_tree
+from app.services.sharefile_metadata import item_info, unique_ids
+from app.services.notifications import notification_service
+from app.services.onboarding import assign_documents
+from app.services.job_queue import job_queue
+from app.services.event_hub import event_hub
+from app.services.auth import create_stream_ticket, verify_stream_ticket, STREAM_TICKET_SECONDS
+from app.services.tracing import tracer, run_in_context
+from app.services.fast_json import FastJSONResponse
+from app.services.http_cache import quote_etag, etag_matches, not_modified
+from app.services.change_tracking import get_version
+from app.services.replication import get_read_db
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class SpaResponse(BaseModel):
     id: str
@@ -26,6 +47,13 @@ class CreateSpaRequest(BaseModel):
     name: str
     contact_email: str
 
+class DocumentAssignment(BaseModel):
+    sharefile_id: str
+    name: str
+
+class AssignDocumentsRequest(BaseModel):
+    documents: List[DocumentAssignment]
+
 class DashboardStats(BaseModel):
     total_spas: int
     invited: int
@@ -34,15 +62,55 @@ class DashboardStats(BaseModel):
     payment_setup: int
     completed: int
 
+class BatchInfoRequest(BaseModel):
+    ids: List[str]
+    refresh: bool = False
+
+CACHE_CONTROL = "private, no-cache"
+# A conditional listing request is answered from the listing this worker fetched this recently,
+# without calling ShareFile (not even to check the token)
+LISTING_REVALIDATE_SECONDS = float(os.getenv("SHAREFILE_LISTING_REVALIDATE_SECONDS", "30"))
+
+def proxy_download_url(file_id: str) -> str:
+    return f"/admin/sharefile/file/{file_id}/proxy-download"
+
+def file_details(file_info: dict) -> dict:
+    """The dashboard's view of a ShareFile item's details"""
+    return {
+        "id": file_info.get('Id'),
+        "name": file_info.get('Name'),
+        "type": file_info.get('Type'),
+        "size": file_info.get('FileSizeBytes', 0),
+        "size_display": f"{file_info.get('FileSizeBytes', 0) / (1024*1024):.2f} MB" if file_info.get('FileSizeBytes') else "Unknown",
+        "created": file_info.get('CreationDate'),
+        "modified": file_info.get('LastWriteTime'),
+        "download_url": file_info.get('url'),
+        "mime_type": file_info.get('MimeType', ''),
+        "extension": file_info.get('Extension', ''),
+        "can_preview": file_info.get('MimeType', '').startswith(('image/', 'application/pdf', 'text/'))
+    }
+
+def _spas_etag(db: Session) -> str:
+    """Validator for anything derived from the spas table, from its change counter"""
+    return quote_etag(f"spas-{get_version(db, 'spas')}")
+
 @router.get("/dashboard-stats", response_model=DashboardStats)
 async def get_dashboard_stats(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get dashboard statistics for admin"""
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    etag = _spas_etag(db)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    
     total_spas = db.query(Spa).count()
     invited = db.query(Spa).filter(Spa.status == SpaStatus.invited).count()
     info_submitted = db.query(Spa).filter(Spa.status == SpaStatus.info_submitted).count()
@@ -61,24 +129,30 @@ async def get_dashboard_stats(
 
 @router.get("/spas", response_model=List[SpaResponse])
 async def get_all_spas(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get all spas for admin dashboard"""
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    spas = db.query(Spa).all()
-    return [
-        SpaResponse(
-            id=spa.id,
-            name=spa.name,
-            contact_email=spa.contact_email,
-            status=spa.status.value,
-            created_at=spa.created_at.isoformat()
-        )
-        for spa in spas
-    ]
+    etag = _spas_etag(db)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # Column tuples instead of ORM objects; rows are encoded directly, skipping SpaResponse validation
+    rows = db.query(Spa.id, Spa.name, Spa.contact_email, Spa.status, Spa.created_at).all()
+    return FastJSONResponse([
+        {
+            "id": spa_id,
+            "name": name,
+            "contact_email": contact_email,
+            "status": spa_status.value,
+            "created_at": created_at.isoformat()
+        }
+        for spa_id, name, contact_email, spa_status, created_at in rows
+    ], headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 @router.post("/spas", response_model=SpaResponse)
 async def create_spa(
@@ -97,10 +171,12 @@ async def create_spa(
     )
     
     db.add(new_spa)
-    db.commit()
-    db.refresh(new_spa)
+    db.flush()
     
-    # TODO: Send invitation email to spa
+    # Invitation email is queued in the same transaction and sent by the background dispatcher
+    event_hub.publish_after_commit(db, "spa_created", {"spa_id": new_spa.id})
+    notification_service.queue(db, "invite_sent", new_spa)
+    db.refresh(new_spa)
     
     return SpaResponse(
         id=new_spa.id,
@@ -113,8 +189,10 @@ async def create_spa(
 @router.get("/spas/{spa_id}", response_model=SpaResponse)
 async def get_spa_details(
     spa_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get detailed spa information"""
     if current_user.role.value != "admin":
@@ -124,6 +202,12 @@ async def get_spa_details(
     if not spa:
         raise HTTPException(status_code=404, detail="Spa not found")
     
+    etag = _spas_etag(db)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    
     return SpaResponse(
         id=spa.id,
         name=spa.name,
@@ -132,6 +216,132 @@ async def get_spa_details(
         created_at=spa.created_at.isoformat()
     )
 
+@router.post("/spas/{spa_id}/send-reminder")
+async def send_spa_reminder(
+    spa_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue an onboarding reminder email for one spa"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    spa = db.query(Spa).filter(Spa.id == spa_id).first()
+    if not spa:
+        raise HTTPException(status_code=404, detail="Spa not found")
+    
+    notification_service.queue(db, "reminder", spa)
+    
+    return {"status": "queued", "spa_id": spa.id}
+
+@router.post("/spas/{spa_id}/documents")
+async def assign_spa_documents(
+    spa_id: str,
+    assignment: AssignDocumentsRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Assign ShareFile documents to a spa for signing"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    spa = db.query(Spa).filter(Spa.id == spa_id).first()
+    if not spa:
+        raise HTTPException(status_code=404, detail="Spa not found")
+    if not assignment.documents:
+        raise HTTPException(status_code=400, detail="No documents to assign")
+    
+    # Signing links are generated by the background jobs queued in the same transaction
+    documents = assign_documents(db, spa, [document.model_dump() for document in assignment.documents])
+    db.commit()
+    job_queue.notify()
+    
+    return {
+        "status": "assigned",
+        "spa_id": spa.id,
+        "documents": [
+            {"id": document.id, "name": document.name, "status": document.status.value}
+            for document in documents
+        ]
+    }
+
+@router.post("/reminders")
+async def send_reminder_campaign(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue reminder emails for every spa that has not completed onboarding"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    spas = db.query(Spa).filter(Spa.status != SpaStatus.completed).all()
+    queued = notification_service.queue_bulk(db, "reminder", spas)
+    
+    return {"status": "queued", "reminders": queued}
+
+@router.post("/events/ticket")
+async def create_event_stream_ticket(current_user: User = Depends(get_current_user)):
+    """Exchange the bearer token for a single-use ticket that opens one /admin/events stream"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {"ticket": create_stream_ticket(current_user.email), "expires_in": STREAM_TICKET_SECONDS}
+
+@router.get("/events")
+async def admin_event_stream(request: Request, ticket: str):
+    """Server-sent events for spa status changes, signed documents and token refreshes"""
+    # EventSource cannot send headers, so a short-lived single-use ticket comes in the query string
+    # instead of the JWT: a ticket copied out of an access log has already been spent
+    claims = verify_stream_ticket(ticket)
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    
+    # Short-lived session: a stream must not hold a pooled connection for its lifetime
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.query(StreamTicket).filter(StreamTicket.expires_at < now).delete(synchronize_session=False)
+        db.add(StreamTicket(jti=claims["jti"], expires_at=datetime.utcfromtimestamp(claims["exp"])))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=401, detail="Ticket already used")
+        
+        user = db.query(User).filter(User.email == claims["sub"]).first()
+        is_admin = user is not None and user.role.value == "admin"
+    finally:
+        db.close()
+    
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    subscriber = event_hub.subscribe()
+    if subscriber is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many live dashboard connections",
+            headers={"Retry-After": "30"}
+        )
+    
+    async def stream():
+        try:
+            yield b"retry: 5000\nevent: ready\ndata: {}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=event_hub.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                yield message
+        finally:
+            event_hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/sharefile/auth-url")
 async def get_sharefile_auth_url(current_user: User = Depends(get_current_user)):
     """Get ShareFile OAuth2 authorization URL with enhanced user experience"""
@@ -175,6 +385,15 @@ async def get_sharefile_auth_url(current_user: User = Depends(get_current_user))
         }
     }
 
+async def _off_loop(func, *args):
+    """
+    Run a blocking ShareFile call on the ShareFile route threads. Its retries and
+    Retry-After waits can last up to the call's deadline; on the event loop they
+    would stall every request this worker is serving. The call keeps the request's
+    span and request id
+    """
+    return await run_in_context(route_executor, func, *args)
+
 @router.get("/sharefile/status")
 async def get_sharefile_status(
     current_user: User = Depends(get_current_user),
@@ -208,7 +427,7 @@ async def get_sharefile_status(
     sf_api.appcp = credentials.appcp
     
     # Check if token is valid
-    is_valid = sf_api.ensure_valid_token(db, current_user.id)
+    is_valid = await _off_loop(sf_api.ensure_valid_token, db, current_user.id)
     
     return {
         "status": "connected" if is_valid else "token_invalid",
@@ -236,13 +455,10 @@ async def sharefile_oauth_callback(
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Debug: Log callback parameters
-    print(f"ShareFile OAuth callback received:")
-    print(f"  Code: {code[:20] if code else None}...")
-    print(f"  Subdomain: {subdomain}")
-    print(f"  APICP: {apicp}")
-    print(f"  APPCP: {appcp}")
-    print(f"  State: {state}")
+    logger.info(
+        "ShareFile OAuth callback received",
+        extra={"has_code": bool(code), "subdomain": subdomain, "apicp": apicp, "appcp": appcp, "state": state}
+    )
     
     # Validate required parameters
     if not code:
@@ -255,7 +471,7 @@ async def sharefile_oauth_callback(
     sf_api = ShareFileAPI()
     
     # Exchange code for tokens
-    success = sf_api.exchange_code_for_token(code, subdomain, apicp, appcp or apicp)
+    success = await _off_loop(sf_api.exchange_code_for_token, code, subdomain, apicp, appcp or apicp)
     
     if success:
         # Store credentials in database
@@ -282,7 +498,7 @@ async def sharefile_oauth_callback(
         db.commit()
         
         # Test the connection
-        home_folder = sf_api.get_home_folder()
+        home_folder = await _off_loop(sf_api.get_home_folder)
         
         return {
             "status": "success",
@@ -315,8 +531,47 @@ async def test_sharefile_connection(current_user: User = Depends(get_current_use
         ]
     }
 
+def _listing_etag(items: list) -> str:
+    return quote_etag(listing_version(items), weak=True)
+
+def _listing_response(request: Request, items: list, folder_id: str, **extra):
+    """Folder listing response from raw ShareFile items, or 304 when the client has it"""
+    # Validator from the raw listing, checked before normalization and encoding
+    etag = _listing_etag(items)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # Sampled debug logging; only formatted when DEBUG is enabled
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "ShareFile listing returned %d items",
+            len(items),
+            extra={"sample_items": [
+                {"name": item.get('Name'), "type": item.get('Type'), "size": item.get('FileSizeBytes')}
+                for item in items[:3]
+            ]}
+        )
+    
+    with tracer.start_span("sharefile.normalize_items") as span:
+        files, folders = normalize_items(items)
+        if span:
+            span.set_attribute("sharefile.item_count", len(items))
+    
+    return FastJSONResponse({
+        "status": "success", 
+        "files": files,
+        "folders": folders,
+        "total_items": len(items),
+        "current_folder_id": folder_id,
+        "token_refreshed": False,
+        "stale": False,
+        **extra,
+        "last_checked": datetime.utcnow().isoformat()
+    }, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
 @router.get("/sharefile/files")
 async def get_sharefile_files(
+    request: Request,
     folder_id: str = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -328,10 +583,11 @@ async def get_sharefile_files(
     # Get organization-wide ShareFile credentials (shared by all admins)
     from app.models.sharefile import ShareFileCredentials
     
-    credentials = db.query(ShareFileCredentials).filter(
-        ShareFileCredentials.organization_wide == True,
-        ShareFileCredentials.is_active == True
-    ).first()
+    with tracer.start_span("sharefile.load_credentials"):
+        credentials = db.query(ShareFileCredentials).filter(
+            ShareFileCredentials.organization_wide == True,
+            ShareFileCredentials.is_active == True
+        ).first()
     
     if not credentials:
         return {
@@ -341,6 +597,13 @@ async def get_sharefile_files(
             "folders": []
         }
     
+    # Folders the local index has caught up with are served without calling ShareFile
+    with tracer.start_span("sharefile.index_lookup"):
+        indexed_items = sharefile_index.folder_items(db, folder_id)
+    if indexed_items is not None:
+        return _listing_response(request, indexed_items, folder_id, source="index",
+                                 indexed_at=sharefile_index.indexed_at(db).isoformat())
+    
     # Initialize ShareFile API with stored credentials
     sf_api = ShareFileAPI()
     sf_api.access_token = credentials.access_token
@@ -349,8 +612,17 @@ async def get_sharefile_files(
     sf_api.apicp = credentials.apicp
     sf_api.appcp = credentials.appcp
     
+    # Revalidation against a listing fetched moments ago costs no ShareFile calls
+    if request.headers.get("if-none-match"):
+        recent = sf_api.recent_listing(folder_id, LISTING_REVALIDATE_SECONDS)
+        if recent is not None:
+            etag = _listing_etag(extract_items(recent))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+    
     # Test token validity and attempt refresh if needed
-    token_valid = sf_api.ensure_valid_token(db, current_user.id)
+    with tracer.start_span("sharefile.ensure_valid_token"):
+        token_valid = await _off_loop(sf_api.ensure_valid_token, db, current_user.id)
     
     # If token validation fails, provide detailed error information
     if not token_valid:
@@ -368,19 +640,20 @@ async def get_sharefile_files(
             "folders": []
         }
     
-    # Get files and folders
-    try:
+    def fetch_listing():
         if folder_id:
             # Getting specific folder contents
-            items_response = sf_api.get_items(folder_id)
-        else:
-            # Getting home folder and its contents
-            home_folder = sf_api.get_home_folder()
-            if home_folder and home_folder.get('Id'):
-                # Get children of the home folder
-                items_response = sf_api.get_items(home_folder['Id'])
-            else:
-                items_response = None
+            return sf_api.get_items(folder_id)
+        # Getting home folder and its contents
+        home_folder = sf_api.get_home_folder()
+        if home_folder and home_folder.get('Id'):
+            # Get children of the home folder
+            return sf_api.get_items(home_folder['Id'])
+        return None
+    
+    # Get files and folders
+    try:
+        items_response = await _off_loop(fetch_listing)
         
         if not items_response:
             return {
@@ -390,123 +663,13 @@ async def get_sharefile_files(
                 "folders": []
             }
         
-        # Handle different response formats from ShareFile API
-        items = []
-        if isinstance(items_response, dict):
-            # Standard API response with 'value' array
-            items = items_response.get('value', [])
-            # Some responses might have 'Children' instead
-            if not items:
-                items = items_response.get('Children', [])
-            # If still no items, check if the response itself is the item list
-            if not items and 'Id' in items_response:
-                items = [items_response]
-        elif isinstance(items_response, list):
-            # Direct array response
-            items = items_response
-        
-        # Debug logging (remove in production)
-        print(f"ShareFile API Debug: Got {len(items)} items, response type: {type(items_response)}")
-        if items:
-            for item in items[:3]:  # Log first 3 items
-                print(f"  Item: {item.get('Name')} (Type: {item.get('Type')}, Size: {item.get('FileSizeBytes', 'N/A')})")
-        
-        files = []
-        folders = []
-        
-        for item in items:
-            # Get item type - ShareFile uses different type values and field names
-            item_type = item.get('Type', '').lower()
-            
-            # ShareFile sometimes uses different field names for type detection
-            if not item_type:
-                # Check for odata.type field (common in ShareFile API)
-                odata_type = item.get('odata.type', item.get('@odata.type', ''))
-                if 'folder' in odata_type.lower():
-                    item_type = 'folder'
-                elif 'file' in odata_type.lower():
-                    item_type = 'file'
-                # Check if item has children (indicates folder)
-                elif 'Children' in item or item.get('HasChildren', False):
-                    item_type = 'folder'
-                # Check file extension (indicates file)
-                elif '.' in item.get('Name', ''):
-                    item_type = 'file'
-                # Check if FileSizeBytes exists and is > 0 (usually files)
-                elif item.get('FileSizeBytes', 0) > 0:
-                    item_type = 'file'
-                else:
-                    # Default to file if we can't determine
-                    item_type = 'file'
-            
-            item_name = item.get('Name', 'Unknown')
-            item_size = item.get('FileSizeBytes', 0)
-            
-            # Format size for display
-            if item_size > 0:
-                if item_size >= 1024 * 1024 * 1024:  # GB
-                    size_display = f"{item_size / (1024 * 1024 * 1024):.2f} GB"
-                elif item_size >= 1024 * 1024:  # MB
-                    size_display = f"{item_size / (1024 * 1024):.2f} MB"
-                elif item_size >= 1024:  # KB
-                    size_display = f"{item_size / 1024:.2f} KB"
-                else:  # Bytes
-                    size_display = f"{item_size} bytes"
-            else:
-                size_display = "Unknown size"
-            
-            # Format dates
-            created_date = item.get('CreationDate', '')
-            modified_date = item.get('LastWriteTime', item.get('ModificationDate', ''))
-            
-            try:
-                if created_date:
-                    from datetime import datetime
-                    created_dt = datetime.fromisoformat(created_date.replace('Z', '+00:00'))
-                    created_display = created_dt.strftime('%Y-%m-%d %H:%M')
-                else:
-                    created_display = 'Unknown'
-            except:
-                created_display = 'Unknown'
-            
-            try:
-                if modified_date:
-                    from datetime import datetime
-                    modified_dt = datetime.fromisoformat(modified_date.replace('Z', '+00:00'))
-                    modified_display = modified_dt.strftime('%Y-%m-%d %H:%M')
-                else:
-                    modified_display = 'Unknown'
-            except:
-                modified_display = 'Unknown'
-            
-            item_data = {
-                "id": item.get('Id'),
-                "name": item_name,
-                "type": item.get('Type'),
-                "size": item_size,
-                "size_display": size_display,
-                "created": created_display,
-                "modified": modified_display,
-                "download_url": item.get('url', item.get('Uri')) if item_type != 'folder' else None,
-                "is_folder": item_type == 'folder'
-            }
-            
-            # Categorize items - ShareFile folders have Type="Folder"
-            if item_type == 'folder':
-                folders.append(item_data)
-            else:
-                # Everything else is treated as a file
-                files.append(item_data)
-        
-        return {
-            "status": "success", 
-            "files": files,
-            "folders": folders,
-            "total_items": len(items),
-            "current_folder_id": folder_id,
-            "token_refreshed": sf_api.access_token != credentials.access_token,
-            "last_checked": datetime.utcnow().isoformat()
-        }
+        return _listing_response(
+            request, extract_items(items_response), folder_id,
+            source="live",
+            token_refreshed=sf_api.access_token != credentials.access_token,
+            # ShareFile was unavailable and this is the last listing it returned
+            stale=sf_api.served_stale,
+        )
         
     except Exception as e:
         return {
@@ -516,6 +679,73 @@ async def get_sharefile_files(
             "folders": []
         }
 
+@router.get("/sharefile/search")
+async def search_sharefile(
+    q: str = "",
+    item_type: str = None,
+    limit: int = 50,
+    offset: int = 0,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Find ShareFile files and folders by name in the local index"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    limit = max(1, min(limit, 200))
+    # One extra row tells whether there is another page
+    rows = sharefile_index.search(db, q.strip(), item_type=item_type, limit=limit + 1, offset=max(0, offset))
+    items = []
+    for row in rows[:limit]:
+        _, item = normalize_item(as_raw_item(row))
+        item["parent_id"] = row.parent_id
+        items.append(item)
+    indexed_at = sharefile_index.indexed_at(db)
+    return FastJSONResponse({
+        "status": "success" if indexed_at else "not_indexed",
+        "items": items,
+        "has_more": len(rows) > limit,
+        "indexed_at": indexed_at.isoformat() if indexed_at else None
+    })
+
+@router.get("/sharefile/tree")
+async def get_sharefile_tree(
+    root: str = None,
+    depth: int = 3,
+    refresh: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """ShareFile folder tree `depth` levels below root (the home folder by default), for the folder picker"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    sf_api = get_organization_api(db)
+    if not sf_api:
+        return {"status": "not_authenticated", "tree": None}
+    
+    with tracer.start_span("sharefile.ensure_valid_token"):
+        if not await _off_loop(sf_api.ensure_valid_token, db, current_user.id):
+            return {"status": "authentication_failed", "tree": None}
+    
+    depth = max(1, min(depth, folder_tree.max_depth))
+    # Parallel waves of blocking ShareFile calls; keep them off the event loop
+    with tracer.start_span("sharefile.folder_tree") as span:
+        result = await _off_loop(folder_tree.build, sf_api, root or "home", depth, refresh)
+        if span:
+            span.set_attribute("sharefile.calls", result["calls"])
+    
+    if result["tree"] is None:
+        return {"status": "error", "message": "Failed to retrieve the ShareFile folder tree", "tree": None}
+    return FastJSONResponse({
+        "status": "success" if result["complete"] else "partial",
+        "tree": result["tree"],
+        "depth": depth,
+        "calls": result["calls"],
+        "cached_subtrees": result["cached"],
+        "stale": sf_api.served_stale
+    }, headers={"Cache-Control": CACHE_CONTROL})
+
 @router.post("/sharefile/refresh-token")
 async def refresh_sharefile_token(
     current_user: User = Depends(get_current_user),
@@ -616,7 +846,7 @@ async def test_sharefile_connection(
     # Test basic API connectivity
     try:
         # Try to get home folder info (minimal API call)
-        home_response = sf_api.get_home_folder()
+        home_response = await _off_loop(sf_api.get_home_folder)
         
         if home_response:
             return {
@@ -678,55 +908,15 @@ async def get_file_download_url(
     if not credentials:
         raise HTTPException(status_code=404, detail="ShareFile not configured")
     
-    # Initialize ShareFile API
-    sf_api = ShareFileAPI()
-    sf_api.access_token = credentials.access_token
-    sf_api.refresh_token = credentials.refresh_token
-    sf_api.subdomain = credentials.subdomain
-    sf_api.apicp = credentials.apicp
-    sf_api.appcp = credentials.appcp
-    
-    try:
-        # Try multiple ShareFile download endpoints to get a working URL
-        download_url = None
-        
-        # Method 1: Try the /Download endpoint with redirect
-        try:
-            download_response = sf_api._make_request("GET", f"/Items({file_id})/Download", db_session=db, user_id=current_user.id)
-            if download_response:
-                # Check for different URL fields ShareFile might use
-                download_url = (download_response.get('DownloadUrl') or 
-                              download_response.get('url') or 
-                              download_response.get('Uri') or
-                              download_response.get('RedirectUrl'))
-        except Exception as e:
-            print(f"Download endpoint failed: {e}")
-        
-        # Method 2: Try getting file info and look for download links
-        if not download_url:
-            try:
-                file_info = sf_api._make_request("GET", f"/Items({file_id})", db_session=db, user_id=current_user.id)
-                if file_info:
-                    download_url = (file_info.get('DownloadUrl') or 
-                                  file_info.get('url') or 
-                                  file_info.get('Uri'))
-            except Exception as e:
-                print(f"File info endpoint failed: {e}")
-        
-        # Method 3: Create a proxy download URL through our server
-        # For now, always use proxy since direct ShareFile URLs require authentication
-        download_url = f"/admin/sharefile/file/{file_id}/proxy-download"
-        
-        return {
-            "status": "success",
-            "download_url": download_url,
-            "file_id": file_id,
-            "method": "proxy",
-            "note": "Using server proxy for authenticated download"
-        }
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting download URL: {str(e)}")
+    # Direct ShareFile URLs require authentication, so downloads always go through
+    # the server proxy; the URL is known without asking ShareFile
+    return {
+        "status": "success",
+        "download_url": proxy_download_url(file_id),
+        "file_id": file_id,
+        "method": "proxy",
+        "note": "Using server proxy for authenticated download"
+    }
 
 @router.get("/sharefile/file/{file_id}/proxy-download")
 async def proxy_download_file(
@@ -758,37 +948,28 @@ async def proxy_download_file(
     sf_api.appcp = credentials.appcp
     
     try:
-        import requests
-        from fastapi.responses import StreamingResponse
-        
-        # Get the file content from ShareFile with authentication
-        base_url = f"https://{credentials.subdomain}.{credentials.apicp}/sf/v3"
-        download_url = f"{base_url}/Items({file_id})/Download"
-        
-        headers = {
-            "Authorization": f"Bearer {credentials.access_token}",
-            "Accept": "*/*"
-        }
-        
-        # Make the request to ShareFile
-        response = requests.get(download_url, headers=headers, stream=True)
+        def start_download():
+            # Get the file content from ShareFile, refreshing the token if needed
+            response = sf_api.open_download(file_id, db_session=db, user_id=current_user.id)
+            
+            file_info = None
+            if response.status_code == 200:
+                # Get file info for proper filename
+                file_info = sf_api._make_request("GET", f"/Items({file_id})", db_session=db, user_id=current_user.id)
+            return response, file_info
         
-        # Handle token refresh if needed
-        if response.status_code == 401 and credentials.refresh_token:
-            # Try to refresh the token
-            if sf_api.refresh_access_token(db, current_user.id):
-                headers["Authorization"] = f"Bearer {sf_api.access_token}"
-                response = requests.get(download_url, headers=headers, stream=True)
+        response, file_info = await _off_loop(start_download)
         
         if response.status_code == 200:
-            # Get file info for proper filename
-            file_info = sf_api._make_request("GET", f"/Items({file_id})", db_session=db, user_id=current_user.id)
             filename = file_info.get('Name', f'file_{file_id}') if file_info else f'file_{file_id}'
             
             # Return streaming response
             def generate():
-                for chunk in response.iter_content(chunk_size=8192):
-                    yield chunk
+                try:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        yield chunk
+                finally:
+                    response.close()
             
             return StreamingResponse(
                 generate(),
@@ -798,14 +979,33 @@ async def proxy_download_file(
                 }
             )
         else:
-            raise HTTPException(status_code=response.status_code, detail=f"ShareFile download failed: {response.text}")
+            detail = f"ShareFile download failed: {response.text}"
+            response.close()
+            raise HTTPException(status_code=response.status_code, detail=detail)
             
+    except HTTPException:
+        raise
+    except (CircuitOpenError, RateLimitExceeded) as e:
+        raise HTTPException(status_code=503, detail=f"ShareFile is unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
 
+async def _resolve_items(sf_api: ShareFileAPI, item_ids: List[str], refresh: bool, db: Session, user_id: str):
+    """item_info.resolve off the event loop, checking the token first only if ShareFile will be called"""
+    if refresh or item_info.uncached(sf_api, item_ids):
+        with tracer.start_span("sharefile.ensure_valid_token"):
+            if not await _off_loop(sf_api.ensure_valid_token, db, user_id):
+                return None
+    with tracer.start_span("sharefile.item_info") as span:
+        result = await _off_loop(item_info.resolve, sf_api, item_ids, refresh)
+        if span:
+            span.set_attribute("sharefile.calls", result["calls"])
+    return result
+
 @router.get("/sharefile/file/{file_id}/info")
 async def get_file_info(
     file_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -813,52 +1013,71 @@ async def get_file_info(
     if current_user.role.value != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Get organization-wide ShareFile credentials
-    from app.models.sharefile import ShareFileCredentials
-    
-    credentials = db.query(ShareFileCredentials).filter(
-        ShareFileCredentials.organization_wide == True,
-        ShareFileCredentials.is_active == True
-    ).first()
-    
-    if not credentials:
+    sf_api = get_organization_api(db)
+    if not sf_api:
         raise HTTPException(status_code=404, detail="ShareFile not configured")
     
-    # Initialize ShareFile API
-    sf_api = ShareFileAPI()
-    sf_api.access_token = credentials.access_token
-    sf_api.refresh_token = credentials.refresh_token
-    sf_api.subdomain = credentials.subdomain
-    sf_api.apicp = credentials.apicp
-    sf_api.appcp = credentials.appcp
+    # Revalidated against the index's copy when it is current, before any ShareFile call
+    if request.headers.get("if-none-match"):
+        indexed = sharefile_index.item(db, file_id)
+        if indexed is not None:
+            etag = _listing_etag([indexed])
+            if etag_matches(request, etag):
+                return not_modified(etag)
     
     try:
-        # Get file information
-        file_info = sf_api._make_request("GET", f"/Items({file_id})", db_session=db, user_id=current_user.id)
+        result = await _resolve_items(sf_api, [file_id], False, db, current_user.id)
+        file_info = result["items"].get(file_id) if result else None
         
         if file_info:
-            return {
+            # Same validator the index's copy produces
+            etag = _listing_etag([comparable_item(file_info)])
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            return FastJSONResponse({
                 "status": "success",
-                "file": {
-                    "id": file_info.get('Id'),
-                    "name": file_info.get('Name'),
-                    "type": file_info.get('Type'),
-                    "size": file_info.get('FileSizeBytes', 0),
-                    "size_display": f"{file_info.get('FileSizeBytes', 0) / (1024*1024):.2f} MB" if file_info.get('FileSizeBytes') else "Unknown",
-                    "created": file_info.get('CreationDate'),
-                    "modified": file_info.get('LastWriteTime'),
-                    "download_url": file_info.get('url'),
-                    "mime_type": file_info.get('MimeType', ''),
-                    "extension": file_info.get('Extension', ''),
-                    "can_preview": file_info.get('MimeType', '').startswith(('image/', 'application/pdf', 'text/'))
-                }
-            }
+                "file": file_details(file_info)
+            }, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
         else:
             raise HTTPException(status_code=404, detail="File not found")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting file info: {str(e)}")
 
+@router.post("/sharefile/files/batch-info")
+async def get_files_batch_info(
+    batch: BatchInfoRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Details for many ShareFile files in one request: deduplicated, cached and fetched in parallel"""
+    if current_user.role.value != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    item_ids = unique_ids(batch.ids)
+    if len(item_ids) > item_info.max_batch:
+        raise HTTPException(status_code=400, detail=f"At most {item_info.max_batch} ids per request")
+    
+    sf_api = get_organization_api(db)
+    if not sf_api:
+        return {"status": "not_authenticated", "files": {}}
+    
+    result = await _resolve_items(sf_api, item_ids, batch.refresh, db, current_user.id)
+    if result is None:
+        return {"status": "authentication_failed", "files": {}}
+    
+    files = {item_id: file_details(item) if item else None for item_id, item in result["items"].items()}
+    return FastJSONResponse({
+        "status": "success",
+        "files": files,
+        "missing": [item_id for item_id, details in files.items() if details is None],
+        "calls": result["calls"],
+        "cached": result["cached"],
+        "stale": sf_api.served_stale
+    }, headers={"Cache-Control": CACHE_CONTROL})
+
 @router.get("/sharefile/folders") 
 async def get_sharefile_folders(current_user: User = Depends(get_current_user)):
     """Get ShareFile folder structure for document organization"""
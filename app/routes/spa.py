@@ -1,9 +1,125 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+import requests
+
+from app.database import get_db
+from app.models.user import User
+from app.models.spa import Spa, SpaStatus
+from app.models.document import PaymentMethod
+from app.routes.auth import get_current_user
+from app.services.stripe_payments import StripeAPI, upsert_payment_methods
+from app.services.spa_snapshot import get_snapshot
+from app.services.http_cache import quote_etag, etag_matches, not_modified
 
 router = APIRouter()
 
-# Placeholder for spa user routes
+class ConfirmPaymentRequest(BaseModel):
+    setup_intent_id: str
+
+async def get_current_spa_id(current_user: User = Depends(get_current_user)) -> str:
+    """Spa id of the authenticated spa user, without loading the spa"""
+    if current_user.role.value != "spa_user" or not current_user.spa_id:
+        raise HTTPException(status_code=403, detail="Spa user access required")
+    
+    return current_user.spa_id
+
+async def get_current_spa(
+    spa_id: str = Depends(get_current_spa_id),
+    db: Session = Depends(get_db)
+) -> Spa:
+    """Resolve the spa that the authenticated spa user belongs to"""
+    spa = db.query(Spa).filter(Spa.id == spa_id).first()
+    if not spa:
+        raise HTTPException(status_code=404, detail="Spa not found")
+    
+    return spa
+
+def _snapshot_response(request: Request, db: Session, spa_id: str, section: str = None):
+    snapshot = get_snapshot(db, spa_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Spa not found")
+    
+    etag = quote_etag(f"{snapshot.etag}-{section}" if section else snapshot.etag)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    body = snapshot.data[section] if section else snapshot.data
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
 @router.get("/me")
-async def get_spa_profile():
-    """Get current spa profile and onboarding status"""
-    return {"message": "Spa profile endpoint - to be implemented"}
\ No newline at end of file
+async def get_spa_profile(
+    request: Request,
+    spa_id: str = Depends(get_current_spa_id),
+    db: Session = Depends(get_db)
+):
+    """Get current spa profile and onboarding status from the precomputed snapshot"""
+    return _snapshot_response(request, db, spa_id)
+
+@router.get("/status")
+async def get_spa_status(
+    request: Request,
+    spa_id: str = Depends(get_current_spa_id),
+    db: Session = Depends(get_db)
+):
+    """Get onboarding progress from the precomputed snapshot"""
+    return _snapshot_response(request, db, spa_id, section="progress")
+
+@router.post("/payment/setup-intent")
+async def create_payment_setup_intent(
+    spa: Spa = Depends(get_current_spa),
+    db: Session = Depends(get_db)
+):
+    """Start payment setup by creating a Stripe SetupIntent for the spa"""
+    if spa.status != SpaStatus.documents_signed:
+        raise HTTPException(status_code=409, detail="Payment setup is available once all documents are signed")
+    
+    stripe_api = StripeAPI()
+    if not stripe_api.secret_key:
+        raise HTTPException(status_code=500, detail="Stripe not configured. Missing environment variable: STRIPE_SECRET_KEY")
+    
+    existing = db.query(PaymentMethod).filter(PaymentMethod.spa_id == spa.id).first()
+    
+    try:
+        customer_id = existing.stripe_customer_id if existing else stripe_api.create_customer(spa.contact_email, spa.id)["id"]
+        setup_intent = stripe_api.create_setup_intent(customer_id, spa.id)
+    except requests.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"Stripe request failed: {str(e)}")
+    
+    return {
+        "setup_intent_id": setup_intent.get("id"),
+        "client_secret": setup_intent.get("client_secret"),
+        "customer_id": customer_id
+    }
+
+@router.post("/payment/confirm")
+async def confirm_payment_setup(
+    confirm_data: ConfirmPaymentRequest,
+    spa: Spa = Depends(get_current_spa),
+    db: Session = Depends(get_db)
+):
+    """Confirm a succeeded SetupIntent without waiting for the webhook"""
+    stripe_api = StripeAPI()
+    if not stripe_api.secret_key:
+        raise HTTPException(status_code=500, detail="Stripe not configured. Missing environment variable: STRIPE_SECRET_KEY")
+    
+    try:
+        setup_intent = stripe_api.retrieve_setup_intent(confirm_data.setup_intent_id)
+    except requests.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"Stripe request failed: {str(e)}")
+    
+    if (setup_intent.get("metadata") or {}).get("spa_id") != spa.id:
+        raise HTTPException(status_code=403, detail="SetupIntent does not belong to this spa")
+    if setup_intent.get("status") != "succeeded":
+        raise HTTPException(status_code=409, detail=f"SetupIntent status is {setup_intent.get('status')}")
+    
+    # Same upsert the webhook processor uses: whichever arrives first inserts the row, the other updates it
+    upsert_payment_methods(db, [{
+        "spa_id": spa.id,
+        "customer": setup_intent.get("customer"),
+        "payment_method": setup_intent.get("payment_method")
+    }])
+    db.commit()
+    
+    return {"status": spa.status.value}
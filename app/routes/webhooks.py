@@ -0,0 +1,32 @@
+import json
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.stripe_payments import record_event, verify_signature, SignatureVerificationError
+
+router = APIRouter()
+
+@router.post("/stripe/payment-setup")
+async def stripe_payment_setup_webhook(request: Request, db: Session = Depends(get_db)):
+    """Receive Stripe events; verified events are stored and processed in the background"""
+    payload = await request.body()
+    
+    try:
+        verify_signature(payload, request.headers.get("Stripe-Signature"), os.getenv("STRIPE_WEBHOOK_SECRET"))
+    except SignatureVerificationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid signature: {e}")
+    
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    
+    if not isinstance(event, dict) or not event.get("id"):
+        raise HTTPException(status_code=400, detail="Event id missing")
+    
+    stored = record_event(db, event)
+    
+    # Stripe only needs a 2xx; duplicates are acknowledged so they are not redelivered
+    return {"received": True, "duplicate": not stored}
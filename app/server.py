@@ -0,0 +1,102 @@
+"""
+Production launcher: a gunicorn prefork master running uvicorn workers.
+
+    python -m app.server
+
+The master owns the listening socket and forks WEB_CONCURRENCY workers
+(default: one per CPU core), each importing main:app itself. SIGHUP starts
+workers on the current code and retires the old ones once their requests
+finish, so a reload never refuses a connection; SIGTERM shuts down
+gracefully. Workers are recycled after MAX_REQUESTS requests (plus jitter).
+Background services run only in the worker holding the leader lock, live
+dashboard events are relayed between workers, and /metrics reports every
+worker whichever one answers the scrape.
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+class DrainingServer(Server):
+    """Uvicorn server that stops accepting, then waits briefly before closing idle connections"""
+
+    drain_seconds = 1.0
+
+    async def shutdown(self, sockets=None):
+        # A connection accepted just before the signal has usually not sent its request
+        # yet; uvicorn would close it as idle and the client would see a reset
+        for server in self.servers:
+            server.close()
+        await asyncio.sleep(self.drain_seconds)
+        await super().shutdown(sockets=sockets)
+
+class DocuSpaWorker(UvicornWorker):
+    """Uvicorn worker whose graceful shutdown ends before the master's hard kill"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Open /admin/events streams never finish on their own; cancel them in time
+        # for the lifespan shutdown (and the leader's job queue drain) to run
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 5)
+
+    async def _serve(self):
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        server.drain_seconds = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "1"))
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+def server_options() -> dict:
+    """Gunicorn settings from the environment"""
+    return {
+        "bind": f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}",
+        "workers": int(os.getenv("WEB_CONCURRENCY", "0")) or multiprocessing.cpu_count(),
+        "worker_class": "app.server.DocuSpaWorker",
+        "max_requests": int(os.getenv("MAX_REQUESTS", "10000")),
+        "max_requests_jitter": int(os.getenv("MAX_REQUESTS_JITTER", "1000")),
+        "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        "timeout": int(os.getenv("WORKER_TIMEOUT", "60")),
+        "keepalive": int(os.getenv("KEEPALIVE", "5")),
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        # Workers import the app after the fork, so no threads or DB connections are shared
+        # and a SIGHUP reload picks up new code
+        "preload_app": False,
+        "proc_name": "docuspa",
+    }
+
+class DocuSpaServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+        return app
+
+def run():
+    load_dotenv()
+    # Workers inherit these; old and new workers overlap during a reload, so always coordinate
+    runtime_dir = os.getenv("DOCUSPA_RUNTIME_DIR", tempfile.gettempdir())
+    os.environ.setdefault("LEADER_LOCK_FILE", os.path.join(runtime_dir, "docuspa-leader.lock"))
+    os.environ.setdefault("EVENT_RELAY_DIR", os.path.join(runtime_dir, "docuspa-events"))
+    os.environ.setdefault("METRICS_DIR", os.path.join(runtime_dir, "docuspa-metrics"))
+    os.environ.setdefault("SHAREFILE_RATE_LIMIT_FILE", os.path.join(runtime_dir, "docuspa-sharefile-quota"))
+    options = server_options()
+    # Workers size their DB connection pools from the worker count
+    os.environ["WEB_CONCURRENCY"] = str(options["workers"])
+    DocuSpaServer(options).run()
+
+if __name__ == "__main__":
+    run()
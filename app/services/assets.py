@@ -0,0 +1,81 @@
+"""
+Static asset lookup and serving.
+
+build_assets.py writes fingerprinted, pre-compressed copies of assets/ into
+static/dist/ plus a manifest. Templates call asset_url() to get the hashed
+URL; without a build (local development) it falls back to the /assets mount.
+"""
+import json
+import logging
+import mimetypes
+import os
+from typing import Dict, Optional
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+
+logger = logging.getLogger(__name__)
+
+ASSETS_DIR = "assets"
+DIST_DIR = os.path.join("static", "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+_manifest: Optional[Dict[str, str]] = None
+
+def load_manifest() -> Dict[str, str]:
+    """Read the build manifest once; an empty mapping means assets are served unbuilt"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH) as handle:
+                _manifest = json.load(handle)
+        except FileNotFoundError:
+            logger.info("No asset manifest at %s; serving assets/ unfingerprinted", MANIFEST_PATH)
+            _manifest = {}
+    return _manifest
+
+def asset_url(path: str) -> str:
+    """URL for a logical asset path such as 'js/dashboard.js'"""
+    built = load_manifest().get(path)
+    if built:
+        return f"/static/dist/{built}"
+    return f"/assets/{path}"
+
+# Encodings we pre-compress at build time, in order of preference
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a .br/.gz sibling when the client accepts it and
+    marks fingerprinted files under dist/ as immutable.
+    """
+    async def get_response(self, path: str, scope):
+        immutable = path.startswith("dist/") or path.startswith("dist" + os.sep)
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+
+        if immutable and accept_encoding:
+            for encoding, suffix in _ENCODINGS:
+                if encoding not in accept_encoding:
+                    continue
+                try:
+                    response = await super().get_response(path + suffix, scope)
+                except HTTPException:
+                    continue
+                if response.status_code in (200, 304):
+                    response.headers["Content-Encoding"] = encoding
+                    # Content type of the original file, not of the .br/.gz
+                    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                    if media_type.startswith("text/") or media_type.endswith("javascript"):
+                        media_type += "; charset=utf-8"
+                    response.headers["Content-Type"] = media_type
+                    response.headers["Vary"] = "Accept-Encoding"
+                    response.headers["Cache-Control"] = IMMUTABLE_CACHE
+                    return response
+
+        response = await super().get_response(path, scope)
+        if immutable:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -1,4 +1,6 @@
 import os
+import logging
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -7,6 +9,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Password hashing with bcrypt 72-byte limit handling
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -14,6 +18,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+STREAM_TICKET_SECONDS = int(os.getenv("STREAM_TICKET_SECONDS", "30"))
+STREAM_TICKET_PURPOSE = "events"
 
 def _truncate_password(password: str) -> bytes:
     """Truncate password to 72 bytes for bcrypt compatibility"""
@@ -29,7 +35,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         truncated_password = _truncate_password(plain_password).decode('utf-8')
         return pwd_context.verify(truncated_password, hashed_password)
     except Exception as e:
-        print(f"Password verification error: {e}")
+        logger.warning("Password verification error: %s", e)
         return False
 
 def get_password_hash(password: str) -> str:
@@ -39,7 +45,7 @@ def get_password_hash(password: str) -> str:
         truncated_password = _truncate_password(password).decode('utf-8')
         return pwd_context.hash(truncated_password)
     except Exception as e:
-        print(f"Password hashing error: {e}")
+        logger.error("Password hashing error: %s", e)
         # Return a default hash that will never match
         return pwd_context.hash("invalid_password_hash")
 
@@ -58,9 +64,29 @@ def verify_token(token: str) -> Optional[str]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
-            return None
+        if email is None or payload.get("purpose") is not None:
+            return None  # Stream tickets are not bearer tokens
         return email
     except JWTError as e:
-        print(f"JWT verification error: {e}")
-        return None
\ No newline at end of file
+        logger.info("JWT verification error: %s", e)
+        return None
+
+def create_stream_ticket(email: str) -> str:
+    """Short-lived ticket for opening one event stream; EventSource cannot send the bearer token as a header"""
+    return jwt.encode({
+        "sub": email,
+        "purpose": STREAM_TICKET_PURPOSE,
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.utcnow() + timedelta(seconds=STREAM_TICKET_SECONDS),
+    }, SECRET_KEY, algorithm=ALGORITHM)
+
+def verify_stream_ticket(ticket: str) -> Optional[dict]:
+    """Verify a stream ticket and return its claims; the caller records the jti so it is only used once"""
+    try:
+        payload = jwt.decode(ticket, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError as e:
+        logger.info("Stream ticket verification error: %s", e)
+        return None
+    if payload.get("purpose") != STREAM_TICKET_PURPOSE or not payload.get("sub") or not payload.get("jti"):
+        return None
+    return payload
@@ -0,0 +1,126 @@
+"""
+Handlers for the background job queue.
+Importing this module registers every job type with ``job_queue``.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.document import Document, DocumentStatus
+from app.models.job import Job, JobStatus
+from app.services.job_queue import job_queue, PRIORITY_BULK
+from app.services.notifications import notification_service
+from app.services.onboarding import mark_document_signed
+from app.services.rate_limit import BACKGROUND
+from app.services.sharefile import get_organization_api
+from app.services.stripe_payments import process_pending_events
+
+logger = logging.getLogger(__name__)
+
+SIGNED_STATUSES = {"signed", "complete", "completed"}
+FAILED_STATUSES = {"declined", "failed", "expired", "voided"}
+
+# How often pending documents with a signing link are checked for completion
+STATUS_POLL_INTERVAL = timedelta(seconds=int(os.getenv("SIGNING_STATUS_POLL_SECONDS", "900")))
+STATUS_POLL_BATCH = 500
+
+def _require_sharefile(db: Session):
+    # Bulk signing links and status polls yield the API quota to admins browsing ShareFile
+    sf_api = get_organization_api(db, priority=BACKGROUND)
+    if not sf_api:
+        # Raise so the job is retried once ShareFile has been connected
+        raise RuntimeError("No active organization-wide ShareFile credentials")
+    return sf_api
+
+@job_queue.register("sharefile.signing_link", concurrency=4)
+def generate_signing_link(db: Session, payload: Dict[str, Any]):
+    """Pre-generate a ShareFile signing link for a document"""
+    document = db.query(Document).filter(Document.id == payload["document_id"]).first()
+    if not document:
+        return {"status": "skipped", "reason": "document not found"}
+    if document.signing_url or document.status != DocumentStatus.pending:
+        return {"status": "skipped", "reason": "link already created"}
+
+    sf_api = _require_sharefile(db)
+    url = sf_api.create_signing_link(document.sharefile_id, payload["signer_email"])
+    if not url:
+        raise RuntimeError(f"ShareFile did not return a signing link for {document.sharefile_id}")
+
+    # The portal snapshot picks the link up on commit
+    document.signing_url = url
+    db.commit()
+    return {"status": "created", "document_id": document.id}
+
+@job_queue.register("sharefile.document_status", concurrency=2)
+def check_document_status(db: Session, payload: Dict[str, Any]):
+    """Poll ShareFile for a document's signing status and record completion"""
+    document = db.query(Document).filter(Document.id == payload["document_id"]).first()
+    if not document or document.status != DocumentStatus.pending:
+        return {"status": "skipped"}
+
+    sf_api = _require_sharefile(db)
+    response = sf_api.get_document_status(document.sharefile_id)
+    if response is None:
+        raise RuntimeError(f"ShareFile status lookup failed for {document.sharefile_id}")
+
+    signing_status = str(response.get("Status") or response.get("status") or "").lower()
+    if signing_status in SIGNED_STATUSES:
+        mark_document_signed(db, document)
+    elif signing_status in FAILED_STATUSES:
+        document.status = DocumentStatus.failed
+    db.commit()
+
+    return {"status": signing_status or "unknown", "document_id": document.id}
+
+@job_queue.register("sharefile.poll_signing_status", concurrency=1)
+def poll_signing_status(db: Session, payload: Dict[str, Any]):
+    """Queue status checks for pending documents not checked recently, then schedule the next poll"""
+    now = datetime.utcnow()
+    document_ids = [document_id for (document_id,) in db.query(Document.id).filter(
+        Document.status == DocumentStatus.pending,
+        Document.signing_url.isnot(None),
+        or_(Document.status_checked_at.is_(None), Document.status_checked_at < now - STATUS_POLL_INTERVAL)
+    ).order_by(Document.status_checked_at).limit(STATUS_POLL_BATCH)]
+
+    if document_ids:
+        # Bulk update: a poll shouldn't rebuild every spa's portal snapshot
+        db.execute(update(Document).where(Document.id.in_(document_ids)).values(status_checked_at=now))
+        for document_id in document_ids:
+            job_queue.enqueue(db, "sharefile.document_status", {"document_id": document_id},
+                              priority=PRIORITY_BULK, commit=False)
+    # A full batch means more are due; otherwise wait for the interval
+    schedule_status_poll(db, delay=timedelta(0) if len(document_ids) == STATUS_POLL_BATCH else STATUS_POLL_INTERVAL)
+    db.commit()
+    job_queue.notify()
+    return {"queued": len(document_ids)}
+
+def schedule_status_poll(db: Session, delay: timedelta = timedelta(0)):
+    """Enqueue a sharefile.poll_signing_status job unless one is already waiting"""
+    pending = db.query(Job.id).filter(
+        Job.job_type == "sharefile.poll_signing_status",
+        Job.status == JobStatus.queued
+    ).first()
+    if not pending:
+        job_queue.enqueue(db, "sharefile.poll_signing_status", priority=PRIORITY_BULK, delay=delay, commit=False)
+
+def start_status_polling():
+    """Make sure signing status polling is scheduled; called when background services start"""
+    db = SessionLocal()
+    try:
+        schedule_status_poll(db)
+        db.commit()
+    finally:
+        db.close()
+
+@job_queue.register("email.flush", concurrency=1)
+def flush_notifications(db: Session, payload: Dict[str, Any]):
+    """Deliver pending notification emails in coalesced batches"""
+    return notification_service.flush(db)
+
+@job_queue.register("stripe.process_events", concurrency=1)
+def process_stripe_events(db: Session, payload: Dict[str, Any]):
+    """Apply received Stripe webhook events to payment_methods"""
+    return process_pending_events(db)
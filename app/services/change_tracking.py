@@ -0,0 +1,79 @@
+"""
+Per-table change counters used as cheap ETag version tokens.
+
+Any transaction that inserts, updates or deletes a tracked model bumps the
+table's counter before it commits, so readers can answer If-None-Match with a
+primary-key lookup instead of re-running their queries.
+
+Each counter is split into CHANGE_COUNTER_SHARDS rows (``spas:0`` ...) and a
+transaction bumps one at random, so concurrent writers rarely wait on the
+same row lock until commit; the version is the sum of the shards. Raise the
+shard count freely, but never lower it: dropped shards would take their
+counts out of the sum and let a version repeat.
+"""
+import os
+import random
+from typing import List, Set
+from sqlalchemy import event, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.change_counter import ChangeCounter
+from app.models.spa import Spa
+
+# Model -> counter name
+TRACKED_MODELS = {
+    Spa: "spas",
+}
+
+_CHANGED_KEY = "changed_tables"
+
+SHARDS = max(1, int(os.getenv("CHANGE_COUNTER_SHARDS", "16")))
+
+def _rows(name: str) -> List[str]:
+    # The unsharded row is kept so versions continue from where they were
+    return [name] + [f"{name}:{shard}" for shard in range(SHARDS)]
+
+def get_version(db: Session, name: str) -> int:
+    return db.query(func.coalesce(func.sum(ChangeCounter.version), 0)).filter(
+        ChangeCounter.name.in_(_rows(name))).scalar()
+
+def bump(db: Session, names: Set[str]):
+    """Increment one shard of each named counter inside the session's transaction"""
+    for name in sorted(names):
+        shard = f"{name}:{random.randrange(SHARDS)}"
+        result = db.execute(
+            update(ChangeCounter).where(ChangeCounter.name == shard).values(version=ChangeCounter.version + 1)
+        )
+        if result.rowcount == 0:
+            try:
+                with db.begin_nested():
+                    db.add(ChangeCounter(name=shard, version=1))
+            except IntegrityError:
+                # Another transaction created the row first
+                db.execute(
+                    update(ChangeCounter).where(ChangeCounter.name == shard).values(version=ChangeCounter.version + 1)
+                )
+
+@event.listens_for(SessionLocal, "before_flush")
+def _collect_changed_tables(session: Session, flush_context, instances):
+    changed: Set[str] = session.info.setdefault(_CHANGED_KEY, set())
+    for obj in list(session.new) + list(session.deleted):
+        name = TRACKED_MODELS.get(type(obj))
+        if name:
+            changed.add(name)
+    for obj in session.dirty:
+        name = TRACKED_MODELS.get(type(obj))
+        if name and session.is_modified(obj, include_collections=False):
+            changed.add(name)
+
+@event.listens_for(SessionLocal, "before_commit")
+def _bump_changed_tables(session: Session):
+    session.flush()
+    changed: Set[str] = session.info.pop(_CHANGED_KEY, set())
+    if changed:
+        bump(session, changed)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changed_tables(session: Session):
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,94 @@
+"""
+Response compression for JSON and HTML bodies.
+
+Only complete (non-streaming) responses of a compressible type above a size
+threshold are compressed, so server-sent events, file downloads and
+pre-compressed static files pass through untouched. Brotli is preferred when
+the brotli package is installed and the client accepts it, gzip otherwise.
+"""
+import gzip
+import os
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript")
+
+def choose_encoding(accept_encoding: str) -> str:
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        # Quality 4-5 is close to gzip -6 in speed with noticeably smaller output
+        return brotli.compress(body, quality=min(level, 11))
+    return gzip.compress(body, compresslevel=min(level, 9))
+
+class CompressionMiddleware:
+    """ASGI middleware compressing compressible responses larger than COMPRESSION_MIN_SIZE bytes"""
+
+    def __init__(self, app, minimum_size: int = None, level: int = None):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.level = level if level is not None else int(os.getenv("COMPRESSION_LEVEL", "5"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough or message["type"] not in ("http.response.start", "http.response.body"):
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "").split(";")[0].strip()
+                if content_type not in COMPRESSIBLE_TYPES or "content-encoding" in headers:
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            # First body message of a compressible response
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streaming or small: send as is
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.level)
+            start_message["headers"] = list(start_message.get("headers", []))
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            # Compression changes the representation, so a strong validator must become weak
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,143 @@
+"""
+Connection pool sizing, liveness checks and admission control.
+
+Pool sizes come from DB_MAX_CONNECTIONS, the connections one host may hold
+against the database, split across its WEB_CONCURRENCY workers; half of
+each worker's share stays open, the rest is overflow opened under bursts.
+
+Instead of pre-pinging on every checkout, a connection is pinged only when
+it has sat idle in the pool for DB_POOL_IDLE_PING_SECONDS, which is when the
+server or a NAT gateway may have dropped it.
+
+Routes run their queries on the event loop thread, so a checkout that waits
+for a connection stalls every request in the worker, including the ones
+holding the connections it is waiting for (a session keeps its connection
+until the response has been sent). AdmissionQueuePool therefore waits at
+most DB_POOL_LOOP_WAIT_SECONDS on the loop thread, and other threads
+queue only while fewer than DB_POOL_MAX_WAITERS are already waiting, up to
+DB_POOL_TIMEOUT. Past that it raises PoolSaturatedError, which the app
+answers with 503 and Retry-After instead of letting the request time out.
+"""
+import asyncio
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import queue as sqla_queue
+from app.services.metrics import (
+    db_pool_checkout_wait, db_pool_in_use, db_pool_waiting, db_pool_overflow_total,
+    db_pool_shed_total, db_pool_liveness_checks_total,
+)
+
+class PoolSaturatedError(PoolTimeoutError):
+    """No connection became available within the admission limits"""
+
+def pool_settings() -> dict:
+    """create_engine pool arguments for one worker"""
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1") or 1))
+    per_worker = max(2, int(os.getenv("DB_MAX_CONNECTIONS", "30")) // workers)
+    pool_size = int(os.getenv("DB_POOL_SIZE", "0")) or per_worker // 2
+    return {
+        "pool_size": pool_size,
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", str(max(0, per_worker - pool_size)))),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    }
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+class AdmissionQueuePool(QueuePool):
+    """QueuePool that records checkout wait, connections in use and overflow, and sheds checkouts it can't serve in time"""
+    label = "primary"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop_wait = float(os.getenv("DB_POOL_LOOP_WAIT_SECONDS", "0.02"))
+        self.max_waiters = int(os.getenv("DB_POOL_MAX_WAITERS", "0")) or self.size() + max(self._max_overflow, 0)
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.label = self.label
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            if self._max_overflow > -1 and self._overflow >= self._max_overflow and self._pool.empty():
+                record = self._wait_for_connection()
+            else:
+                record = super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start)
+        db_pool_in_use.set(self.checkedout(), pool=self.label)
+        return record
+
+    def _wait_for_connection(self):
+        on_loop = _on_event_loop()
+        with self._waiting_lock:
+            if not on_loop and self._waiting >= self.max_waiters:
+                db_pool_shed_total.inc(pool=self.label, reason="queue_full")
+                raise PoolSaturatedError(f"{self._waiting} checkouts already waiting for a connection")
+            self._waiting += 1
+            db_pool_waiting.set(self._waiting, pool=self.label)
+        try:
+            return self._pool.get(True, self.loop_wait if on_loop else self._timeout)
+        except sqla_queue.Empty:
+            pass
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+                db_pool_waiting.set(self._waiting, pool=self.label)
+        db_pool_shed_total.inc(pool=self.label, reason="event_loop" if on_loop else "timeout")
+        raise PoolSaturatedError(f"Pool limit of {self.size()} overflow {self._max_overflow} reached, no connection available")
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        db_pool_in_use.set(self.checkedout(), pool=self.label)
+
+    def _inc_overflow(self):
+        allowed = super()._inc_overflow()
+        if allowed and self._overflow > 0:
+            db_pool_overflow_total.inc(pool=self.label)
+        return allowed
+
+def add_liveness_check(engine: Engine, idle_seconds: float):
+    """Ping connections that sat in the pool longer than idle_seconds before handing them out"""
+    @event.listens_for(engine, "connect")
+    def _fresh(dbapi_connection, connection_record):
+        connection_record.info["idle_since"] = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def _idle(dbapi_connection, connection_record):
+        connection_record.info["idle_since"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _check(dbapi_connection, connection_record, connection_proxy):
+        if time.monotonic() - connection_record.info.get("idle_since", 0) < idle_seconds:
+            return
+        try:
+            ping = getattr(dbapi_connection, "ping", None)
+            if ping is not None:
+                ping(False)  # PyMySQL: COM_PING without reconnecting
+            else:
+                cursor = dbapi_connection.cursor()
+                try:
+                    cursor.execute("SELECT 1")
+                finally:
+                    cursor.close()
+        except Exception as e:
+            db_pool_liveness_checks_total.inc(pool=engine.pool.label, outcome="dead")
+            # The pool discards this connection and retries the checkout with a new one
+            raise DisconnectionError(f"Pooled connection failed its liveness check: {e}")
+        db_pool_liveness_checks_total.inc(pool=engine.pool.label, outcome="alive")
+        connection_record.info["idle_since"] = time.monotonic()
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_hub_events"
+
+# Sent to a subscriber that fell behind; the client should refetch instead of replaying
+RESYNC_MESSAGE = b"event: resync\ndata: {}\n\n"
+
+# Largest event relayed between workers (unix datagrams carry a whole event each)
+RELAY_MAX_BYTES = 256 * 1024
+
+def format_sse(event_type: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+class Subscriber:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: bytes):
+        """Queue a message without ever blocking the publisher"""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: discard its backlog and ask it to resync rather than buffer without bound
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_MESSAGE)
+
+class EventHub:
+    """
+    In-process fan-out of live events to server-sent-event subscribers.
+
+    Each event is serialized once and offered to every subscriber's bounded
+    queue, so adding dashboard viewers costs memory, not DB or ShareFile work.
+    With EVENT_RELAY_DIR set (multi-worker server), every worker binds a unix
+    datagram socket there and events are also sent to the other workers'
+    sockets, so a viewer sees events whichever worker it is connected to.
+    """
+
+    def __init__(self):
+        self.max_subscribers = int(os.getenv("SSE_MAX_SUBSCRIBERS", "100"))
+        self.queue_size = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+        self.heartbeat_interval = 15
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.relay_dir = os.getenv("EVENT_RELAY_DIR")
+        self._relay_socket: Optional[socket.socket] = None
+        self._relay_path: Optional[str] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach the hub to the server's event loop; called at startup"""
+        self._loop = loop
+        if self.relay_dir:
+            self._open_relay()
+
+    def close(self):
+        """Stop receiving relayed events; called at shutdown"""
+        if self._relay_socket is None:
+            return
+        try:
+            self._loop.remove_reader(self._relay_socket.fileno())
+        except Exception:
+            pass
+        self._relay_socket.close()
+        self._relay_socket = None
+        try:
+            os.unlink(self._relay_path)
+        except OSError:
+            pass
+
+    def _open_relay(self):
+        os.makedirs(self.relay_dir, exist_ok=True)
+        self._relay_path = os.path.join(self.relay_dir, f"{os.getpid()}.sock")
+        try:
+            os.unlink(self._relay_path)
+        except FileNotFoundError:
+            pass
+        relay_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        relay_socket.bind(self._relay_path)
+        relay_socket.setblocking(False)
+        self._relay_socket = relay_socket
+        self._loop.add_reader(relay_socket.fileno(), self._receive_relayed)
+
+    def _receive_relayed(self):
+        while self._relay_socket is not None:
+            try:
+                message = self._relay_socket.recv(RELAY_MAX_BYTES)
+            except (BlockingIOError, InterruptedError):
+                return
+            self._deliver(message)
+
+    def _relay(self, message: bytes):
+        """Send an event to every other worker's socket; never blocks the publisher"""
+        relay_socket = self._relay_socket
+        if relay_socket is None:
+            return
+        try:
+            entries = os.listdir(self.relay_dir)
+        except OSError:
+            return
+        for entry in entries:
+            path = os.path.join(self.relay_dir, entry)
+            if path == self._relay_path or not entry.endswith(".sock"):
+                continue
+            try:
+                relay_socket.sendto(message, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket left behind by a worker that is gone
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                # Receiver backlog full or oversized event; those viewers miss this event
+                logger.debug(f"Could not relay event to {entry}: {e}")
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Optional[Subscriber]:
+        """Register a new subscriber, or return None when the subscriber cap is reached"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = Subscriber(self.queue_size)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Broadcast an event; safe to call from worker threads"""
+        if self._loop is None or (not self._subscribers and self._relay_socket is None):
+            return
+        message = format_sse(event_type, data)
+        self._relay(message)
+        if not self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(message)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._deliver, message)
+            except RuntimeError:
+                pass  # Loop already closed during shutdown
+
+    def _deliver(self, message: bytes):
+        for subscriber in list(self._subscribers):
+            subscriber.offer(message)
+
+    def publish_after_commit(self, db: Session, event_type: str, data: Dict[str, Any]):
+        """Queue an event that is only broadcast if the session's transaction commits"""
+        db.info.setdefault(_PENDING_KEY, []).append((event_type, data))
+
+# Global instance
+event_hub = EventHub()
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_committed_events(session: Session):
+    for event_type, data in session.info.pop(_PENDING_KEY, []):
+        event_hub.publish(event_type, data)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_events(session: Session):
+    session.info.pop(_PENDING_KEY, None)
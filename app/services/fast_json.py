@@ -0,0 +1,41 @@
+"""
+Fast JSON encoding for high-volume admin responses.
+
+Routes opt in by returning FastJSONResponse with plain dicts/lists built from
+trusted internal data; FastAPI then skips response_model validation and
+jsonable_encoder. orjson is used when installed, otherwise the stdlib encoder.
+"""
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; the content is trusted and not validated"""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
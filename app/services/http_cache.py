@@ -0,0 +1,25 @@
+from typing import Optional
+from fastapi import Request, Response
+
+def quote_etag(tag: str, weak: bool = False) -> str:
+    """Format a version token as an ETag header value"""
+    return f'{"W/" if weak else ""}"{tag}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header names etag (weak comparison, as RFC 9110 requires for GET)"""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    def strip(value: str) -> str:
+        value = value.strip()
+        return value[2:] if value.startswith("W/") else value
+
+    target = strip(etag)
+    return any(strip(candidate) == target for candidate in header.split(","))
+
+def not_modified(etag: str, cache_control: str = "private, no-cache") -> Response:
+    """Empty 304 response carrying the current validator"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
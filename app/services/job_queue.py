@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are claimed first
+PRIORITY_INTERACTIVE = 10
+PRIORITY_DEFAULT = 100
+PRIORITY_BULK = 500
+
+class JobHandler:
+    def __init__(self, func: Callable[[Session, Dict[str, Any]], Any], concurrency: int):
+        self.func = func
+        self.concurrency = concurrency
+
+class JobQueue:
+    """
+    In-process job runner backed by the ``jobs`` table.
+
+    Jobs are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several
+    app instances can share one table, and handlers run in a dedicated thread
+    pool so slow external calls never block the request event loop. While a
+    job runs its lease (``locked_at``) is renewed, so only jobs whose worker
+    died are requeued after JOB_LEASE_SECONDS.
+    """
+
+    def __init__(self):
+        self.poll_interval = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+        self.max_workers = int(os.getenv("JOB_WORKERS", "4"))
+        self.lease_timeout = timedelta(seconds=int(os.getenv("JOB_LEASE_SECONDS", "600")))
+        self.base_backoff = 15       # Seconds before the first retry
+        self.max_backoff = 60 * 60   # Never wait more than an hour between retries
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self.is_running = False
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._active: Dict[str, int] = {}
+        self._running: Set[str] = set()  # Ids of jobs this worker is executing, for lease renewal
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register(self, job_type: str, concurrency: int = 1):
+        """Decorator registering ``func(db, payload)`` as the handler for a job type"""
+        def decorator(func):
+            self.handlers[job_type] = JobHandler(func, concurrency)
+            return func
+        return decorator
+
+    def enqueue(self, db: Session, job_type: str, payload: Optional[Dict[str, Any]] = None,
+                priority: int = PRIORITY_DEFAULT, delay: Optional[timedelta] = None,
+                max_attempts: int = 5, commit: bool = True) -> Job:
+        """
+        Add a job to the queue using the caller's session.
+        Pass commit=False to enqueue atomically with the caller's own changes.
+        """
+        job = Job(
+            job_type=job_type,
+            payload=payload or {},
+            priority=priority,
+            max_attempts=max_attempts,
+            run_at=datetime.utcnow() + (delay or timedelta(0))
+        )
+        db.add(job)
+        if commit:
+            db.commit()
+            self.notify()
+        return job
+
+    def notify(self):
+        """Wake the dispatcher so newly enqueued jobs start without waiting for the next poll"""
+        if self._wakeup is not None and self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    def backoff_for(self, attempts: int) -> timedelta:
+        """Exponential backoff with jitter for the given attempt count"""
+        delay = min(self.max_backoff, self.base_backoff * (2 ** max(attempts - 1, 0)))
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    async def start(self):
+        """Start dispatching jobs until stop() is called"""
+        if self.is_running:
+            logger.info("Job queue already running")
+            return
+
+        self.is_running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+        self._wakeup = asyncio.Event()
+        self._loop = loop = asyncio.get_running_loop()
+        logger.info(f"Starting job queue with {self.max_workers} workers ({self.worker_id})")
+        last_reap = last_renewal = 0.0
+        # Renew well inside the lease so a long job is never mistaken for a dead worker's
+        renewal_interval = min(60.0, self.lease_timeout.total_seconds() / 3)
+
+        while self.is_running:
+            try:
+                # Bookkeeping queries use the default executor so they never wait behind handlers
+                if loop.time() - last_renewal > renewal_interval:
+                    await loop.run_in_executor(None, self.renew_leases)
+                    last_renewal = loop.time()
+                if loop.time() - last_reap > 60:
+                    await loop.run_in_executor(None, self.requeue_stale_jobs)
+                    last_reap = loop.time()
+                claimed = await loop.run_in_executor(None, self.claim_jobs)
+                for job_id, job_type, payload in claimed:
+                    self._executor.submit(self.run_job, job_id, job_type, payload)
+            except Exception as e:
+                logger.error(f"Error in job queue dispatcher: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(self.poll_interval, renewal_interval))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def stop(self):
+        """Stop claiming new jobs and let running ones finish"""
+        self.is_running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+            self._executor = None
+        logger.info("Stopped job queue")
+
+    def _free_slots(self) -> Tuple[Dict[str, int], int]:
+        """Free slots per job type and in total, read together while worker threads may be finishing jobs"""
+        with self._lock:
+            free = {
+                job_type: handler.concurrency - self._active.get(job_type, 0)
+                for job_type, handler in self.handlers.items()
+                if handler.concurrency - self._active.get(job_type, 0) > 0
+            }
+            return free, self.max_workers - sum(self._active.values())
+
+    def claim_jobs(self) -> list:
+        """Lock and mark as running the next due jobs that fit the per-type concurrency limits"""
+        free, capacity = self._free_slots()
+        if not free or capacity <= 0:
+            return []
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            candidates = db.query(Job).filter(
+                Job.status == JobStatus.queued,
+                Job.run_at <= now,
+                Job.job_type.in_(list(free.keys()))
+            ).order_by(
+                Job.priority, Job.run_at
+            ).limit(capacity * 2).with_for_update(skip_locked=True).all()
+
+            claimed = []
+            for job in candidates:
+                if len(claimed) >= capacity or free.get(job.job_type, 0) <= 0:
+                    continue
+                free[job.job_type] -= 1
+                job.status = JobStatus.running
+                job.attempts += 1
+                job.locked_at = now
+                job.locked_by = self.worker_id
+                claimed.append((job.id, job.job_type, job.payload or {}))
+
+            db.commit()
+            with self._lock:
+                for job_id, job_type, _ in claimed:
+                    self._active[job_type] = self._active.get(job_type, 0) + 1
+                    self._running.add(job_id)
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def renew_leases(self):
+        """Push back the lease on every job this worker is still running"""
+        with self._lock:
+            running = list(self._running)
+        if not running:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(update(Job).where(
+                Job.id.in_(running),
+                Job.status == JobStatus.running,
+                Job.locked_by == self.worker_id
+            ).values(locked_at=datetime.utcnow()))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def requeue_stale_jobs(self):
+        """Return jobs whose worker died mid-run to the queue"""
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - self.lease_timeout
+            stale = db.query(Job).filter(
+                Job.status == JobStatus.running,
+                Job.locked_at < cutoff
+            ).with_for_update(skip_locked=True).all()
+            for job in stale:
+                logger.warning(f"Requeueing stale job {job.id} ({job.job_type}) held by {job.locked_by}")
+                self._finish_failed(job, "Lease expired while running")
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def run_job(self, job_id: str, job_type: str, payload: Dict[str, Any]):
+        """Execute a claimed job on a worker thread and record the outcome"""
+        db = SessionLocal()
+        try:
+            handler = self.handlers[job_type]
+            try:
+                result = handler.func(db, payload)
+                error = None
+            except Exception as e:
+                db.rollback()
+                result = None
+                error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                return
+            if error is None:
+                job.status = JobStatus.succeeded
+                job.result = result
+                job.last_error = None
+            else:
+                logger.warning(f"Job {job_id} ({job_type}) failed on attempt {job.attempts}: {error.splitlines()[0]}")
+                self._finish_failed(job, error)
+            job.locked_at = None
+            job.locked_by = None
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Could not record outcome of job {job_id}: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._active[job_type] = max(self._active.get(job_type, 1) - 1, 0)
+                self._running.discard(job_id)
+
+    def _finish_failed(self, job: Job, error: str):
+        job.last_error = error
+        job.locked_at = None
+        job.locked_by = None
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.dead
+            logger.error(f"Job {job.id} ({job.job_type}) dead-lettered after {job.attempts} attempts")
+        else:
+            job.status = JobStatus.queued
+            job.run_at = datetime.utcnow() + self.backoff_for(job.attempts)
+
+    def retry_dead_job(self, db: Session, job_id: str) -> bool:
+        """Move a dead-lettered job back onto the queue"""
+        job = db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.dead).first()
+        if not job:
+            return False
+        job.status = JobStatus.queued
+        job.attempts = 0
+        job.run_at = datetime.utcnow()
+        db.commit()
+        self.notify()
+        return True
+
+# Global instance
+job_queue = JobQueue()
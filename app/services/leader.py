@@ -0,0 +1,66 @@
+"""
+Leader election between the workers of one host.
+
+Background services (token refresh, job queue) must run once per host, not
+once per worker. Each worker campaigns for an exclusive flock on
+LEADER_LOCK_FILE; the holder runs the services, and when it exits (recycled,
+reloaded or crashed) the kernel drops the lock and another worker takes over.
+Without LEADER_LOCK_FILE (a single uvicorn process) this worker always leads.
+"""
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class LeaderElection:
+    def __init__(self, lock_file: Optional[str] = None, retry_interval: Optional[float] = None):
+        self.lock_file = lock_file if lock_file is not None else os.getenv("LEADER_LOCK_FILE")
+        self.retry_interval = retry_interval if retry_interval is not None else float(os.getenv("LEADER_RETRY_SECONDS", "5"))
+        self.is_leader = False
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        """Take the leader lock without blocking; True if this worker now leads"""
+        if self.is_leader:
+            return True
+        if not self.lock_file or fcntl is None:
+            self.is_leader = True
+            return True
+
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        # Record the holder for operators; the lock itself is what matters
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        self.is_leader = True
+        return True
+
+    async def campaign(self, on_elected: Callable[[], Awaitable[None]]):
+        """Wait until this worker holds the lock, then run on_elected once"""
+        while not self.try_acquire():
+            await asyncio.sleep(self.retry_interval)
+        logger.info(f"Worker {os.getpid()} elected to run background services")
+        await on_elected()
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self.is_leader = False
+
+# Global instance
+leader_election = LeaderElection()
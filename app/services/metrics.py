@@ -0,0 +1,359 @@
+"""
+Minimal Prometheus-compatible metrics: counters, gauges and histograms
+rendered in the text exposition format at /metrics.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def samples(self, extra: str = "") -> List[str]:
+        """Sample lines, each with the ``extra`` label pair (e.g. worker="123") if given"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return self.header() + self.samples()
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self, extra: str = "") -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}" for key, value in items]
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self, extra: str = "") -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = ",".join(filter(None, (extra, f'le="{_format_value(bound)}"')))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key, extra)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key, extra)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def samples(self, extra: str = "") -> Dict[str, List[str]]:
+        return {metric.name: metric.samples(extra) for metric in self._metrics}
+
+    def render(self, workers: Optional[List[Dict[str, List[str]]]] = None) -> str:
+        """Text exposition of this process, or of several workers' samples() grouped per metric"""
+        workers = [self.samples()] if workers is None else workers
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            for samples in workers:
+                lines.extend(samples.get(metric.name, ()))
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+class WorkerMetrics:
+    """
+    Whole-server /metrics under the prefork server.
+
+    A scrape reaches whichever worker accepts it. With METRICS_DIR set, every
+    worker writes its samples there every METRICS_PUBLISH_SECONDS, labelled
+    worker="<pid>", and the worker answering a scrape returns its own samples
+    plus every other live worker's last published ones. Files left by workers
+    that have exited are removed. Without METRICS_DIR (single process) the
+    output is unlabelled, as before.
+    """
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self.directory = os.getenv("METRICS_DIR")
+        self.interval = float(os.getenv("METRICS_PUBLISH_SECONDS", "5"))
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def publish(self) -> Dict[str, List[str]]:
+        samples = self.registry.samples(f'worker="{os.getpid()}"')
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        with open(path + ".tmp", "w") as f:
+            json.dump(samples, f)
+        # Readers never see a half-written file
+        os.replace(path + ".tmp", path)
+        return samples
+
+    def remove(self):
+        if self.directory:
+            try:
+                os.unlink(self._path(os.getpid()))
+            except FileNotFoundError:
+                pass
+
+    async def run(self):
+        """Publish this worker's samples until cancelled"""
+        if not self.directory:
+            return
+        loop = asyncio.get_running_loop()
+        failing = False
+        while True:
+            try:
+                await loop.run_in_executor(None, self.publish)
+            except OSError:
+                # Once per run of failures; this loop runs in every worker
+                if not failing:
+                    logger.warning("Could not publish metrics to %s", self.directory, exc_info=True)
+                failing = True
+            else:
+                if failing:
+                    logger.info("Publishing metrics to %s again", self.directory)
+                failing = False
+            await asyncio.sleep(self.interval)
+
+    def render(self) -> str:
+        if not self.directory:
+            return self.registry.render()
+        workers = [self.publish()]
+        for name in sorted(os.listdir(self.directory)):
+            pid = name[:-len(".json")]
+            if not name.endswith(".json") or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                self._discard(name)
+                continue
+            except PermissionError:
+                pass
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    workers.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return self.registry.render(workers)
+
+    def _discard(self, name: str):
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+# Global instance
+worker_metrics = WorkerMetrics(REGISTRY)
+
+# HTTP
+http_request_duration = Histogram(
+    "docuspa_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+http_requests_in_flight = Gauge(
+    "docuspa_http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+http_requests_total = Counter(
+    "docuspa_http_requests_total", "HTTP responses by route template and status code",
+    ("method", "route", "status")
+)
+
+# ShareFile upstream
+sharefile_request_duration = Histogram(
+    "docuspa_sharefile_request_duration_seconds", "ShareFile API call latency by endpoint template",
+    ("method", "endpoint", "status")
+)
+token_refresh_total = Counter(
+    "docuspa_sharefile_token_refresh_total", "ShareFile token refresh attempts by outcome", ("outcome",)
+)
+sharefile_circuit_state = Gauge(
+    "docuspa_sharefile_circuit_state", "ShareFile circuit breaker per host: 0 closed, 1 half-open, 2 open", ("host",)
+)
+sharefile_circuit_transitions_total = Counter(
+    "docuspa_sharefile_circuit_transitions_total", "ShareFile circuit breaker state changes", ("host", "state")
+)
+sharefile_short_circuited_total = Counter(
+    "docuspa_sharefile_short_circuited_total", "ShareFile calls failed fast because the circuit was open", ("host",)
+)
+sharefile_retries_total = Counter(
+    "docuspa_sharefile_retries_total", "ShareFile call retries by outcome (retried, budget_exhausted, deadline)",
+    ("outcome",)
+)
+sharefile_stale_responses_total = Counter(
+    "docuspa_sharefile_stale_responses_total", "Cached ShareFile listings served because the upstream was unavailable"
+)
+sharefile_rate_limit_wait = Histogram(
+    "docuspa_sharefile_rate_limit_wait_seconds", "Time ShareFile calls waited for API quota, by priority", ("priority",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+sharefile_rate_limited_total = Counter(
+    "docuspa_sharefile_rate_limited_total", "ShareFile calls rejected because the API quota ran out, by priority",
+    ("priority",)
+)
+
+# Database
+db_pool_checkout_wait = Histogram(
+    "docuspa_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+db_pool_in_use = Gauge(
+    "docuspa_db_pool_connections_in_use", "Pooled DB connections checked out, per worker", ("pool",)
+)
+db_pool_waiting = Gauge(
+    "docuspa_db_pool_waiting", "Checkouts currently waiting for a pooled DB connection", ("pool",)
+)
+db_pool_overflow_total = Counter(
+    "docuspa_db_pool_overflow_total", "Connections opened beyond pool_size under load", ("pool",)
+)
+db_pool_shed_total = Counter(
+    "docuspa_db_pool_shed_total", "Checkouts refused instead of waiting for a connection (answered with 503)",
+    ("pool", "reason")
+)
+db_pool_liveness_checks_total = Counter(
+    "docuspa_db_pool_liveness_checks_total", "Pings of connections that sat idle in the pool, by outcome",
+    ("pool", "outcome")
+)
+db_replica_lag = Gauge(
+    "docuspa_db_replica_lag_seconds", "Replication lag per read replica, from the heartbeat row", ("replica",)
+)
+db_replica_healthy = Gauge(
+    "docuspa_db_replica_healthy", "1 if the read replica is receiving reads, 0 if it is skipped", ("replica",)
+)
+db_read_routing_total = Counter(
+    "docuspa_db_read_routing_total", "Read-only sessions by where they were routed", ("target",)
+)
+
+# Process
+startup_duration = Gauge(
+    "docuspa_startup_seconds", "Time from importing the app to being ready to serve, per worker"
+)
+
+_ID_SEGMENT = re.compile(r"\((?!home\))[^)]*\)")
+
+def endpoint_template(endpoint: str) -> str:
+    """Collapse item ids so /Items(fo123)/Children becomes /Items({id})/Children"""
+    return _ID_SEGMENT.sub("({id})", endpoint.split("?", 1)[0])
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and status codes per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method=method)
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            status = str(status_holder["status"])
+            http_request_duration.observe(elapsed, method=method, route=route_path, status=status)
+            http_requests_total.inc(method=method, route=route_path, status=status)
@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, Iterable, List, Optional
+from jinja2 import Environment, FileSystemLoader, Template
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models.job import Job, JobStatus
+from app.models.notification import NotificationEvent
+from app.models.spa import Spa
+from app.models.user import User, UserRole
+from app.services.job_queue import job_queue, PRIORITY_DEFAULT, PRIORITY_BULK
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join("templates", "email")
+
+# Notification triggers from the PRD: event -> (subject, audience)
+EVENTS = {
+    "invite_sent": ("Welcome to SpaDoc — Begin Your Setup", "spa"),
+    "info_submitted": ("Spa {spa_name} submitted onboarding details", "admin"),
+    "documents_ready": ("Sign Your SpaDoc Documents", "spa"),
+    "documents_signed": ("Documents Complete — Finalize Payment", "both"),
+    "payment_setup": ("Onboarding Complete — You're Ready to Go!", "both"),
+    "reminder": ("Reminder: finish your SpaDoc onboarding", "spa"),
+}
+
+class EmailSender:
+    """
+    Sends batches of messages over one reused SMTP connection.
+    Without SMTP_HOST configured, messages are only logged (local development).
+    """
+
+    def __init__(self):
+        self.host = os.getenv("SMTP_HOST")
+        self.port = int(os.getenv("SMTP_PORT", "587"))
+        self.username = os.getenv("SMTP_USERNAME")
+        self.password = os.getenv("SMTP_PASSWORD")
+        self.use_tls = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+        self.idle_timeout = 60  # Drop the pooled connection after a minute unused
+
+        self._connection: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def _get_connection(self) -> smtplib.SMTP:
+        if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._connection = None
+
+    def send_batch(self, messages: List[EmailMessage]) -> List[bool]:
+        """Send messages in order, reconnecting once if the server drops the connection"""
+        if not self.host:
+            for message in messages:
+                logger.info(f"Email (SMTP_HOST not set) to {message['To']}: {message['Subject']}")
+            return [True] * len(messages)
+
+        results = []
+        with self._lock:
+            for message in messages:
+                for attempt in range(2):
+                    try:
+                        self._get_connection().send_message(message)
+                        self._last_used = time.monotonic()
+                        results.append(True)
+                        break
+                    except smtplib.SMTPServerDisconnected:
+                        self._connection = None
+                        if attempt == 1:
+                            results.append(False)
+                    except (smtplib.SMTPException, OSError) as e:
+                        logger.warning(f"Failed to send email to {message['To']}: {e}")
+                        self.close()
+                        results.append(False)
+                        break
+        return results
+
+class NotificationService:
+    """
+    Records onboarding notification events and delivers them in coalesced batches.
+
+    Events are stored in ``notification_events``; a single ``email.flush`` job
+    runs after the coalescing window, merges every pending event for the same
+    recipient and spa into one message and sends them over a pooled connection.
+    """
+
+    def __init__(self):
+        self.sender = EmailSender()
+        self.from_address = os.getenv("EMAIL_FROM", "SpaDoc <no-reply@docuspa.com>")
+        self.base_url = os.getenv("APP_BASE_URL", "http://localhost:8000").rstrip("/")
+        self.coalesce_window = int(os.getenv("EMAIL_COALESCE_SECONDS", "60"))
+        self.batch_size = int(os.getenv("EMAIL_BATCH_SIZE", "500"))
+        self.templates: Dict[str, Template] = {}
+        self._env: Optional[Environment] = None
+
+    def load_templates(self):
+        """Compile every email template once; called at startup"""
+        self._env = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            auto_reload=False,
+            keep_trailing_newline=True
+        )
+        self.templates = {
+            name[:-len(".txt")]: self._env.get_template(name)
+            for name in self._env.list_templates(extensions=["txt"])
+        }
+        logger.info(f"Compiled {len(self.templates)} email templates")
+
+    def _template(self, name: str) -> Template:
+        if not self.templates:
+            self.load_templates()
+        return self.templates[name]
+
+    def admin_recipients(self, db: Session) -> List[str]:
+        configured = os.getenv("ADMIN_NOTIFICATION_EMAIL")
+        if configured:
+            return [email.strip() for email in configured.split(",") if email.strip()]
+        return [email for (email,) in db.query(User.email).filter(User.role == UserRole.admin).all()]
+
+    def queue(self, db: Session, event: str, spa: Spa, context: Optional[Dict[str, Any]] = None,
+              commit: bool = True):
+        """Record a notification for a spa; delivery happens after the coalescing window"""
+        _, audience = EVENTS[event]
+        recipients = []
+        if audience in ("spa", "both"):
+            recipients.append(spa.contact_email)
+        if audience in ("admin", "both"):
+            recipients.extend(self.admin_recipients(db))
+
+        for recipient in recipients:
+            db.add(NotificationEvent(spa_id=spa.id, event=event, recipient=recipient, context=context or {}))
+        self.schedule_flush(db, delay=timedelta(seconds=self.coalesce_window))
+        if commit:
+            db.commit()
+            job_queue.notify()
+
+    def queue_bulk(self, db: Session, event: str, spas: Iterable[Spa]) -> int:
+        """Insert one event per spa in a single statement (reminder campaigns)"""
+        rows = [
+            {"spa_id": spa.id, "event": event, "recipient": spa.contact_email, "context": {}}
+            for spa in spas
+        ]
+        if rows:
+            db.execute(insert(NotificationEvent), rows)
+            self.schedule_flush(db, priority=PRIORITY_BULK)
+        db.commit()
+        job_queue.notify()
+        return len(rows)
+
+    def schedule_flush(self, db: Session, delay: Optional[timedelta] = None, priority: int = PRIORITY_DEFAULT):
+        """Enqueue an email.flush job unless one is already waiting"""
+        pending = db.query(Job.id).filter(
+            Job.job_type == "email.flush",
+            Job.status == JobStatus.queued
+        ).first()
+        if not pending:
+            job_queue.enqueue(db, "email.flush", priority=priority, delay=delay, commit=False)
+
+    def render(self, db: Session, recipient: str, spa: Optional[Spa], events: List[NotificationEvent]) -> EmailMessage:
+        """Render all pending events for one recipient/spa pair into a single message"""
+        base_context = {
+            "spa_name": spa.name if spa else "",
+            "contact_email": spa.contact_email if spa else "",
+            "status": spa.status.value if spa else "",
+            "portal_url": f"{self.base_url}/",
+            "admin_url": f"{self.base_url}/dashboard",
+        }
+        sections = []
+        seen = set()
+        for event in events:
+            key = (event.event, json.dumps(event.context or {}, sort_keys=True))
+            if key in seen:
+                continue  # Identical events within the window collapse into one section
+            seen.add(key)
+            sections.append(self._template(event.event).render(**base_context, **(event.context or {})).strip())
+
+        if len(seen) == 1:
+            subject = EVENTS[events[0].event][0].format(**base_context)
+        else:
+            subject = f"SpaDoc updates for {base_context['spa_name']}"
+
+        message = EmailMessage()
+        message["From"] = self.from_address
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(self._template("digest").render(sections=sections))
+        return message
+
+    def flush(self, db: Session) -> Dict[str, int]:
+        """Deliver up to batch_size pending events; reschedules itself while a backlog remains"""
+        pending = db.query(NotificationEvent).filter(
+            NotificationEvent.sent_at.is_(None)
+        ).order_by(NotificationEvent.created_at).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        groups: Dict[tuple, List[NotificationEvent]] = {}
+        for event in pending:
+            groups.setdefault((event.recipient, event.spa_id), []).append(event)
+
+        spa_ids = {spa_id for _, spa_id in groups if spa_id}
+        spas = {spa.id: spa for spa in db.query(Spa).filter(Spa.id.in_(spa_ids)).all()} if spa_ids else {}
+
+        keys = list(groups.keys())
+        messages = [self.render(db, recipient, spas.get(spa_id), groups[(recipient, spa_id)]) for recipient, spa_id in keys]
+        results = self.sender.send_batch(messages)
+
+        now = datetime.utcnow()
+        sent = 0
+        for key, ok in zip(keys, results):
+            if ok:
+                sent += 1
+                for event in groups[key]:
+                    event.sent_at = now
+
+        failed = len(messages) - sent
+        if failed and not sent:
+            # Nothing went out (SMTP is likely down); the job queue retries this job with backoff
+            raise RuntimeError(f"All {failed} notification emails failed to send")
+
+        if len(pending) == self.batch_size:
+            self.schedule_flush(db, priority=PRIORITY_BULK)
+        elif failed:
+            # Unsent events stay pending for a later flush; the sent ones are committed below
+            self.schedule_flush(db, delay=timedelta(seconds=self.coalesce_window))
+        db.commit()
+
+        if failed:
+            logger.warning(f"{failed} of {len(messages)} notification emails failed to send; retrying in a later flush")
+        return {"events": len(pending), "messages": sent, "failed": failed}
+
+# Global instance
+notification_service = NotificationService()
+
@@ -0,0 +1,99 @@
+import logging
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from app.models.spa import Spa, SpaStatus
+from app.models.document import Document, DocumentStatus, PaymentMethod
+from app.services.notifications import notification_service
+from app.services.event_hub import event_hub
+from app.services.job_queue import job_queue
+
+logger = logging.getLogger(__name__)
+
+# Emails sent when a spa enters a status
+STATUS_NOTIFICATIONS = {
+    SpaStatus.info_submitted: "info_submitted",
+    SpaStatus.documents_signed: "documents_signed",
+    SpaStatus.payment_setup: "payment_setup",
+}
+
+# Linear onboarding flow from the PRD: invited → info_submitted → documents_signed → payment_setup → completed
+STATUS_ORDER = [
+    SpaStatus.invited,
+    SpaStatus.info_submitted,
+    SpaStatus.documents_signed,
+    SpaStatus.payment_setup,
+    SpaStatus.completed,
+]
+
+def set_spa_status(db: Session, spa: Spa, new_status: SpaStatus) -> bool:
+    """
+    Move a spa to the next onboarding status.
+    Returns False (and changes nothing) unless new_status is the immediate next step.
+    The caller is responsible for committing.
+    """
+    current_index = STATUS_ORDER.index(spa.status)
+    if STATUS_ORDER.index(new_status) != current_index + 1:
+        return False
+
+    old_status = spa.status
+    spa.status = new_status
+    logger.info(f"Spa {spa.id} moved from {old_status.value} to {new_status.value}")
+    event_hub.publish_after_commit(db, "spa_status", {
+        "spa_id": spa.id,
+        "name": spa.name,
+        "old_status": old_status.value,
+        "status": new_status.value,
+    })
+
+    if new_status in STATUS_NOTIFICATIONS:
+        notification_service.queue(db, STATUS_NOTIFICATIONS[new_status], spa, commit=False)
+    return True
+
+def mark_document_signed(db: Session, document: Document, signed_at: datetime = None) -> bool:
+    """Mark a document as signed and advance the spa if every document is now signed"""
+    if document.status == DocumentStatus.signed:
+        return False
+
+    document.status = DocumentStatus.signed
+    document.signed_at = signed_at or datetime.utcnow()
+    db.flush()
+    event_hub.publish_after_commit(db, "document_signed", {
+        "document_id": document.id,
+        "spa_id": document.spa_id,
+        "name": document.name,
+        "signed_at": document.signed_at.isoformat(),
+    })
+
+    spa = document.spa
+    if spa and spa.status == SpaStatus.info_submitted:
+        unsigned = db.query(Document).filter(
+            Document.spa_id == spa.id,
+            Document.status != DocumentStatus.signed
+        ).count()
+        if unsigned == 0:
+            set_spa_status(db, spa, SpaStatus.documents_signed)
+            # Stripe may have reported the payment method before the last signature. The spa update
+            # is flushed first, so a concurrent upsert_payment_methods either committed before it
+            # (and this locking read sees its row) or waits on the spa row and then advances it
+            if db.query(PaymentMethod.id).filter(PaymentMethod.spa_id == spa.id).with_for_update().first():
+                set_spa_status(db, spa, SpaStatus.payment_setup)
+    return True
+
+def assign_documents(db: Session, spa: Spa, files: List[Dict[str, str]]) -> List[Document]:
+    """
+    Assign ShareFile documents to a spa for signing, queue their signing links and
+    the "documents ready" email. The caller is responsible for committing.
+    """
+    documents = [Document(spa_id=spa.id, sharefile_id=file["sharefile_id"], name=file["name"]) for file in files]
+    db.add_all(documents)
+    db.flush()
+    for document in documents:
+        job_queue.enqueue(db, "sharefile.signing_link", {
+            "document_id": document.id,
+            "signer_email": spa.contact_email,
+        }, commit=False)
+    notification_service.queue(db, "documents_ready", spa, {
+        "document_names": [document.name for document in documents],
+    }, commit=False)
+    return documents
@@ -0,0 +1,75 @@
+"""
+Pre-rendered HTML entry pages.
+
+The login, dashboard and ShareFile setup pages don't depend on the request,
+so each is rendered once, pre-compressed, and served as bytes with a strong
+ETag. With TEMPLATE_AUTO_RELOAD=true (development) a page is re-rendered
+whenever its template file changes.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable
+from fastapi import Request, Response
+from fastapi.templating import Jinja2Templates
+from app.services.compression import brotli, choose_encoding, compress
+from app.services.http_cache import quote_etag, etag_matches, not_modified
+
+CACHE_CONTROL = "no-cache"
+
+class CachedPage:
+    __slots__ = ("bodies", "etags", "filename", "mtime")
+
+    def __init__(self, body: bytes, filename: str, mtime: float):
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        # One representation per content coding, each with its own strong validator
+        self.bodies: Dict[str, bytes] = {"": body, "gzip": compress(body, "gzip", 9)}
+        self.etags: Dict[str, str] = {"": quote_etag(digest), "gzip": quote_etag(f"{digest}-gzip")}
+        if brotli is not None:
+            self.bodies["br"] = compress(body, "br", 11)
+            self.etags["br"] = quote_etag(f"{digest}-br")
+        self.filename = filename
+        self.mtime = mtime
+
+class PageCache:
+    def __init__(self, templates: Jinja2Templates, auto_reload: bool = None):
+        self.templates = templates
+        if auto_reload is None:
+            auto_reload = os.getenv("TEMPLATE_AUTO_RELOAD", "false").lower() == "true"
+        self.auto_reload = auto_reload
+        self._pages: Dict[str, CachedPage] = {}
+
+    def _render(self, name: str) -> CachedPage:
+        env = self.templates.env
+        _, filename, _ = env.loader.get_source(env, name)
+        mtime = os.path.getmtime(filename) if filename else 0.0
+        body = env.get_template(name).render().encode("utf-8")
+        page = CachedPage(body, filename, mtime)
+        self._pages[name] = page
+        return page
+
+    def prerender(self, names: Iterable[str]):
+        for name in names:
+            self._render(name)
+
+    def get(self, name: str) -> CachedPage:
+        page = self._pages.get(name)
+        if page is None:
+            return self._render(name)
+        if self.auto_reload and page.filename and os.path.getmtime(page.filename) != page.mtime:
+            return self._render(name)
+        return page
+
+    def response(self, request: Request, name: str) -> Response:
+        page = self.get(name)
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        if encoding not in page.bodies:
+            encoding = ""
+
+        etag = page.etags[encoding]
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control=CACHE_CONTROL)
+
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(page.bodies[encoding], media_type="text/html", headers=headers)
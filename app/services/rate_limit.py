@@ -0,0 +1,114 @@
+"""
+Client-side rate limiting for the ShareFile API quota.
+
+Every worker on a host draws from one token bucket whose level lives in a
+small memory-mapped file (SHAREFILE_RATE_LIMIT_FILE, guarded by flock), so
+dashboard browsing, background jobs and token checks share the account's
+budget instead of each worker assuming it has all of it. Without the file
+(a single uvicorn process) the bucket is local to the process.
+
+Callers have a priority. Interactive calls may drain the bucket; background
+calls only take tokens while more than the reserve remains, so bulk work
+backs off first and admins browsing folders keep their headroom. A call that
+can't get a token within its priority's wait limit is rejected.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+from app.services.metrics import sharefile_rate_limit_wait, sharefile_rate_limited_total
+
+INTERACTIVE, BACKGROUND = "interactive", "background"
+
+_STATE = struct.Struct("<dd")  # tokens, time.monotonic() of the last update (system-wide on Linux)
+
+class RateLimitExceeded(Exception):
+    """No quota became available within the caller's wait limit"""
+
+class SharedTokenBucket:
+    """Token bucket refilled at `rate` per second up to `burst`, optionally shared through state_file"""
+    def __init__(self, rate: float, burst: float, reserve: float = 0.5,
+                 max_wait: Optional[dict] = None, state_file: Optional[str] = None):
+        self.rate = rate
+        self.burst = burst
+        # Tokens only interactive callers may take; background calls can still get the rest
+        self.reserve = min(burst * reserve, max(0.0, burst - 1))
+        self.max_wait = max_wait or {INTERACTIVE: 0.5, BACKGROUND: 30.0}
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        if state_file and fcntl is not None:
+            self._fd = os.open(state_file, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size < _STATE.size:
+                    os.ftruncate(self._fd, _STATE.size)
+                    os.pwrite(self._fd, _STATE.pack(burst, time.monotonic()), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._state = mmap.mmap(self._fd, _STATE.size)
+        else:
+            self._state = bytearray(_STATE.pack(burst, time.monotonic()))
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _level(self, now: float) -> float:
+        tokens, updated = _STATE.unpack_from(self._state)
+        # A state file left over from before a reboot has a timestamp ahead of the clock
+        return min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+
+    def try_take(self, priority: str = INTERACTIVE) -> float:
+        """Take a token if the priority's floor allows it: 0.0, else the seconds until one is due"""
+        floor = 0.0 if priority == INTERACTIVE else self.reserve
+        with self._locked():
+            now = time.monotonic()
+            tokens = self._level(now)
+            if tokens - 1 >= floor:
+                _STATE.pack_into(self._state, 0, tokens - 1, now)
+                return 0.0
+            _STATE.pack_into(self._state, 0, tokens, now)
+        return (floor + 1 - tokens) / self.rate
+
+    def acquire(self, priority: str = INTERACTIVE):
+        """Wait for a token up to the priority's limit, else raise RateLimitExceeded"""
+        if not self.enabled:
+            return
+        start = time.monotonic()
+        deadline = start + self.max_wait.get(priority, 0.0)
+        while True:
+            wait = self.try_take(priority)
+            if wait == 0.0:
+                sharefile_rate_limit_wait.observe(time.monotonic() - start, priority=priority)
+                return
+            if time.monotonic() + wait > deadline:
+                sharefile_rate_limited_total.inc(priority=priority)
+                raise RateLimitExceeded(f"ShareFile API quota exhausted for {priority} calls")
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket, e.g. when the upstream answered 429 despite the limiter"""
+        if not self.enabled:
+            return
+        with self._locked():
+            _STATE.pack_into(self._state, 0, 0.0, time.monotonic())
@@ -0,0 +1,226 @@
+"""
+Read-replica routing with replication-lag awareness.
+
+Read-only admin routes take their session from get_read_db, which points
+the session at a healthy replica (RoutingSession sends any write, and every
+query after it, back to the primary). Replicas come from
+DATABASE_REPLICA_URLS; without it every query runs on the primary as before.
+
+Lag is measured with a heartbeat: the leader worker rewrites one row on the
+primary every REPLICA_HEARTBEAT_SECONDS, and every worker reads the
+replicas' copies every REPLICA_CHECK_SECONDS. A replica that is unreachable,
+has no heartbeat or is more than REPLICA_MAX_LAG_SECONDS behind gets no
+reads until a later check finds it healthy again.
+
+Read-your-writes: a response to a request that committed a write sets a
+short-lived cookie holding the commit time, and that client's reads only go
+to replicas whose heartbeat shows they have replayed past it.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, get_db, get_engine, get_replica_engines
+from app.models.replication import ReplicationHeartbeat
+from app.services.metrics import db_replica_lag, db_replica_healthy, db_read_routing_total
+
+logger = logging.getLogger(__name__)
+
+LAST_WRITE_COOKIE = "docuspa_last_write"
+HEARTBEAT_ID = 1
+
+# Mutable per-request marker, so commits made in threadpool copies of the context still reach the response
+_request_writes: ContextVar[Optional[dict]] = ContextVar("request_writes", default=None)
+
+def _label(engine: Engine) -> str:
+    url = engine.url
+    return url.host or os.path.basename(url.database or "") or str(url)
+
+class ReplicaState:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.label = _label(engine)
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.applied_at = 0.0  # Primary time of the newest heartbeat the replica had replayed
+
+class ReplicaMonitor:
+    def __init__(self, engines: Optional[List[Engine]] = None, primary: Optional[Engine] = None,
+                 max_lag: Optional[float] = None, check_interval: Optional[float] = None,
+                 heartbeat_interval: Optional[float] = None):
+        self._engines = engines
+        self._primary = primary
+        self.max_lag = max_lag if max_lag is not None else float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+        self.check_interval = check_interval if check_interval is not None else float(os.getenv("REPLICA_CHECK_SECONDS", "2"))
+        self.heartbeat_interval = heartbeat_interval if heartbeat_interval is not None else float(os.getenv("REPLICA_HEARTBEAT_SECONDS", "1"))
+        self.is_running = False
+        self.is_beating = False
+        self._states: Optional[Dict[Engine, ReplicaState]] = None
+        self._round_robin = itertools.count()
+
+    @property
+    def states(self) -> Dict[Engine, ReplicaState]:
+        if self._states is None:
+            engines = self._engines if self._engines is not None else get_replica_engines()
+            self._states = {engine: ReplicaState(engine) for engine in engines}
+            for engine in engines:
+                event.listen(engine, "handle_error", self._on_error)
+        return self._states
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.states)
+
+    @property
+    def read_your_writes_seconds(self) -> int:
+        """After this long any healthy replica has replayed a write, so the cookie can expire"""
+        return int(self.max_lag + self.check_interval + self.heartbeat_interval) + 1
+
+    def _on_error(self, context):
+        # A dropped connection takes the replica out of rotation until the next successful check
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+            for state in self.states.values():
+                if state.engine is context.engine and state.healthy:
+                    state.healthy = False
+                    db_replica_healthy.set(0, replica=state.label)
+                    logger.warning(f"Replica {state.label} failed a query; reading from the primary")
+
+    def write_heartbeat(self):
+        """Record the current time on the primary (leader worker only)"""
+        now_ms = int(time.time() * 1000)
+        with (self._primary or get_engine()).begin() as connection:
+            result = connection.execute(
+                update(ReplicationHeartbeat).where(ReplicationHeartbeat.id == HEARTBEAT_ID).values(beat_at_ms=now_ms)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(ReplicationHeartbeat).values(id=HEARTBEAT_ID, beat_at_ms=now_ms))
+
+    def check(self, state: ReplicaState):
+        """Read the replica's heartbeat and update its lag and health"""
+        was_healthy = state.healthy
+        try:
+            with state.engine.connect() as connection:
+                beat_at_ms = connection.execute(
+                    select(ReplicationHeartbeat.beat_at_ms).where(ReplicationHeartbeat.id == HEARTBEAT_ID)
+                ).scalar()
+        except Exception as e:
+            state.healthy, state.lag = False, None
+            if was_healthy:
+                logger.warning(f"Replica {state.label} unreachable; reading from the primary: {e}")
+        else:
+            if beat_at_ms is None:
+                state.healthy, state.lag = False, None
+            else:
+                state.applied_at = beat_at_ms / 1000
+                state.lag = max(0.0, time.time() - state.applied_at)
+                state.healthy = state.lag <= self.max_lag
+                db_replica_lag.set(state.lag, replica=state.label)
+            if was_healthy and not state.healthy:
+                behind = f"{state.lag:.1f}s behind" if state.lag is not None else "missing its heartbeat"
+                logger.warning(f"Replica {state.label} is {behind}; reading from the primary")
+            elif state.healthy and not was_healthy:
+                logger.info(f"Replica {state.label} healthy ({state.lag:.1f}s behind)")
+        db_replica_healthy.set(1 if state.healthy else 0, replica=state.label)
+
+    def pick(self, last_write: float = 0.0) -> Optional[Engine]:
+        """A healthy replica that has replayed everything up to last_write, or None for the primary"""
+        candidates = [state for state in self.states.values() if state.healthy and state.applied_at >= last_write]
+        if not candidates:
+            return None
+        return candidates[next(self._round_robin) % len(candidates)].engine
+
+    async def start(self):
+        """Check every replica each REPLICA_CHECK_SECONDS until stop() is called"""
+        if self.is_running or not self.enabled:
+            return
+        self.is_running = True
+        loop = asyncio.get_running_loop()
+        logger.info(f"Monitoring {len(self.states)} read replica(s), max lag {self.max_lag}s")
+        while self.is_running:
+            for state in list(self.states.values()):
+                await loop.run_in_executor(None, self.check, state)
+            await asyncio.sleep(self.check_interval)
+
+    async def start_heartbeat(self):
+        """Write the heartbeat each REPLICA_HEARTBEAT_SECONDS until stop() is called"""
+        if self.is_beating or not self.enabled:
+            return
+        self.is_beating = True
+        loop = asyncio.get_running_loop()
+        while self.is_beating:
+            try:
+                await loop.run_in_executor(None, self.write_heartbeat)
+            except Exception as e:
+                logger.error(f"Error writing replication heartbeat: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def stop(self):
+        self.is_running = False
+        self.is_beating = False
+
+# Global instance
+replica_monitor = ReplicaMonitor()
+
+def _last_write(request: Request) -> float:
+    try:
+        return float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return 0.0
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """get_db for read-only routes: queries run on a healthy, caught-up replica when there is one"""
+    if replica_monitor.enabled:
+        last_write = _last_write(request)
+        replica = replica_monitor.pick(last_write)
+        if replica is not None:
+            db.info["replica"] = replica
+            db_read_routing_total.inc(target="replica")
+        else:
+            db_read_routing_total.inc(target="primary_recent_write" if last_write > time.time() - replica_monitor.read_your_writes_seconds else "primary_fallback")
+    return db
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_write(session: Session):
+    if session.info.pop("wrote", False):
+        marker = _request_writes.get()
+        if marker is not None:
+            marker["last_write"] = time.time()
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_write(session: Session):
+    session.info.pop("wrote", None)
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware: sets the last-write cookie on responses to requests that committed a write"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_monitor.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        marker: dict = {}
+        token = _request_writes.set(marker)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and "last_write" in marker:
+                cookie = (f"{LAST_WRITE_COOKIE}={marker['last_write']:.3f}; Max-Age={replica_monitor.read_your_writes_seconds}; "
+                          f"Path=/; HttpOnly; SameSite=Lax")
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_writes.reset(token)
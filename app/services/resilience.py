@@ -0,0 +1,133 @@
+"""
+Building blocks for calling flaky upstreams: circuit breakers, a retry
+budget, jittered backoff and Retry-After parsing. The ShareFile client
+(app/services/sharefile.py) combines them into its request policy.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from app.services.metrics import sharefile_circuit_state, sharefile_circuit_transitions_total
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and rejects calls for
+    reset_timeout seconds; then lets a single probe through (half-open), which
+    closes the circuit on success or reopens it on failure.
+    """
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        sharefile_circuit_state.set(0, host=host)
+
+    def _transition(self, state: str):
+        self.state = state
+        sharefile_circuit_state.set(_STATE_VALUES[state], host=self.host)
+        sharefile_circuit_transitions_total.inc(host=self.host, state=state)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def release_probe(self):
+        """Give back the half-open probe of an attempt that ended without an outcome"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+class CircuitBreakerRegistry:
+    """One breaker per upstream host, created on first use"""
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(host, CircuitBreaker(host, self.failure_threshold, self.reset_timeout))
+        return breaker
+
+class RetryBudget:
+    """
+    Caps retries at `ratio` of recent requests (plus `min_per_second`), so a
+    degraded upstream sees at most that much extra load instead of every
+    caller multiplying its traffic.
+    """
+    def __init__(self, ratio: float, min_per_second: float, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_request(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -3,18 +3,121 @@ import requests
 import hmac
 import hashlib
 import base64
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from urllib.parse import urlencode, urlparse, parse_qs
 from dotenv import load_dotenv
+from app.services.metrics import (
+    sharefile_request_duration, endpoint_template, sharefile_short_circuited_total,
+    sharefile_retries_total, sharefile_stale_responses_total,
+)
+from app.services.rate_limit import SharedTokenBucket, RateLimitExceeded, INTERACTIVE, BACKGROUND
+from app.services.resilience import CircuitBreakerRegistry, RetryBudget, backoff_delay, parse_retry_after
+from app.services.tracing import tracer, KIND_CLIENT
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_STATUSES = {429, 502, 503, 504}
+# Folder listings; their last good response is served while ShareFile is unavailable. Single
+# item lookups (get_item) are left out: they have their own cache and would crowd listings out
+STALE_CACHEABLE = re.compile(r"^/Items\(home\)$|^/Items\([^)]*\)/Children$")
+
+class CircuitOpenError(requests.RequestException):
+    """ShareFile call rejected without being sent because the host's circuit is open"""
+
+class StaleListingCache:
+    """Last good response per listing endpoint, bounded in entries and age"""
+    def __init__(self, max_entries: int, max_age: float):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: Tuple, data: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Tuple) -> Optional[Tuple[Any, float]]:
+        """(data, age in seconds), or None if missing or too old"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        return (entry[1], age) if age <= self.max_age else None
+
+def _upstream_unavailable(error: Exception) -> bool:
+    """Failures that say nothing about the request itself: outages, overload, throttling"""
+    if isinstance(error, (CircuitOpenError, RateLimitExceeded, requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and (response.status_code >= 500 or response.status_code == 429)
+
+# Shared by every ShareFileAPI client in this worker
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.getenv("SHAREFILE_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("SHAREFILE_BREAKER_RESET_SECONDS", "30")),
+)
+retry_budget = RetryBudget(
+    ratio=float(os.getenv("SHAREFILE_RETRY_BUDGET_RATIO", "0.1")),
+    min_per_second=float(os.getenv("SHAREFILE_RETRY_MIN_PER_SECOND", "1")),
+)
+# API quota shared by the host's workers; 0 requests/second disables it
+_quota_rate = float(os.getenv("SHAREFILE_RATE_LIMIT", "0"))
+rate_limiter = SharedTokenBucket(
+    rate=_quota_rate,
+    burst=float(os.getenv("SHAREFILE_RATE_LIMIT_BURST", "0")) or _quota_rate * 2,
+    reserve=float(os.getenv("SHAREFILE_RATE_LIMIT_RESERVE", "0.5")),
+    max_wait={
+        INTERACTIVE: float(os.getenv("SHAREFILE_RATE_LIMIT_INTERACTIVE_WAIT", "0.5")),
+        BACKGROUND: float(os.getenv("SHAREFILE_RATE_LIMIT_BACKGROUND_WAIT", "30")),
+    },
+    state_file=os.getenv("SHAREFILE_RATE_LIMIT_FILE") if _quota_rate > 0 else None,
+)
+stale_listings = StaleListingCache(
+    max_entries=int(os.getenv("SHAREFILE_STALE_CACHE_ENTRIES", "200")),
+    max_age=float(os.getenv("SHAREFILE_STALE_MAX_AGE_SECONDS", "3600")),
+)
+
+# Blocking ShareFile calls made for async routes; bounded, and apart from the default
+# executor the job queue, replica checks and metrics publisher use
+route_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SHAREFILE_ROUTE_THREADS", "16")), thread_name_prefix="sharefile-route"
+)
+
 class ShareFileAPI:
     def __init__(self):
         self.client_id = os.getenv("SHAREFILE_CLIENT_ID")
         self.client_secret = os.getenv("SHAREFILE_CLIENT_SECRET")
         self.redirect_uri = os.getenv("SHAREFILE_REDIRECT_URI")
+        # Point every API call at another host, e.g. the benchmark stand-in server
+        self.api_host_override = os.getenv("SHAREFILE_API_HOST")
+        
+        # Per-attempt timeouts, bounded by an overall deadline that includes retries
+        self.connect_timeout = float(os.getenv("SHAREFILE_CONNECT_TIMEOUT", "3.05"))
+        self.read_timeout = float(os.getenv("SHAREFILE_READ_TIMEOUT", "15"))
+        self.deadline = float(os.getenv("SHAREFILE_DEADLINE_SECONDS", "20"))
+        self.max_retries = int(os.getenv("SHAREFILE_MAX_RETRIES", "2"))
+        self.retry_base_delay = 0.2  # Seconds; full jitter, doubling per retry
+        self.retry_max_delay = 2.0
+        # Set when a listing came from the stale cache because ShareFile was unavailable
+        self.served_stale = False
+        # Callers that must see ShareFile's current state (the index sync) turn the fallback off
+        self.allow_stale = True
+        # Quota priority: background jobs yield to admins browsing ShareFile
+        self.priority = INTERACTIVE
         
         # These will be set after OAuth2 flow
         self.access_token = None
@@ -22,6 +125,13 @@ class ShareFileAPI:
         self.subdomain = None
         self.apicp = None
         self.appcp = None
+    
+    def host_url(self, subdomain: str = None, apicp: str = None) -> str:
+        """Scheme and host of the account's API endpoint"""
+        if self.api_host_override:
+            return self.api_host_override.rstrip("/")
+        return f"https://{subdomain or self.subdomain}.{apicp or self.apicp}"
+    
     def get_authorization_url(self, state: str = None) -> str:
         """
         Generate ShareFile authorization URL for OAuth2 flow
@@ -68,7 +178,7 @@ class ShareFileAPI:
             return received_hash == expected_hash_urlencoded
             
         except Exception as e:
-            print(f"Hash validation error: {e}")
+            logger.warning("Hash validation error: %s", e)
             return False
     
     def exchange_code_for_token(self, code: str, subdomain: str, apicp: str, appcp: str = None) -> bool:
@@ -79,7 +189,7 @@ class ShareFileAPI:
         self.apicp = apicp
         self.appcp = appcp or apicp
         
-        token_url = f"https://{subdomain}.{apicp}/oauth/token"
+        token_url = f"{self.host_url(subdomain, apicp)}/oauth/token"
         
         data = {
             "grant_type": "authorization_code",
@@ -93,7 +203,7 @@ class ShareFileAPI:
         }
         
         try:
-            response = requests.post(token_url, data=data, headers=headers)
+            response = self._timed_request("POST", token_url, "/oauth/token", data=data, headers=headers)
             response.raise_for_status()
             
             token_data = response.json()
@@ -108,9 +218,9 @@ class ShareFileAPI:
             return True
             
         except requests.RequestException as e:
-            print(f"Token exchange failed: {e}")
+            logger.error("Token exchange failed: %s", e)
             if hasattr(e, 'response') and e.response:
-                print(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return False
     
     def refresh_access_token(self, db_session=None, user_id=None) -> bool:
@@ -119,10 +229,10 @@ class ShareFileAPI:
         If db_session and user_id provided, also update stored credentials
         """
         if not self.refresh_token or not self.subdomain or not self.apicp:
-            print("Missing refresh token or connection details")
+            logger.warning("Missing refresh token or connection details")
             return False
             
-        token_url = f"https://{self.subdomain}.{self.apicp}/oauth/token"
+        token_url = f"{self.host_url()}/oauth/token"
         
         data = {
             "grant_type": "refresh_token",
@@ -136,12 +246,11 @@ class ShareFileAPI:
         }
         
         try:
-            print(f"Refreshing token for {self.subdomain}.{self.apicp}")
-            response = requests.post(token_url, data=data, headers=headers)
+            logger.info("Refreshing token for %s.%s", self.subdomain, self.apicp)
+            response = self._timed_request("POST", token_url, "/oauth/token", data=data, headers=headers)
             response.raise_for_status()
             
             token_data = response.json()
-            old_access_token = self.access_token
             self.access_token = token_data.get("access_token")
             
             # Update refresh token if new one provided
@@ -163,17 +272,17 @@ class ShareFileAPI:
                             credentials.refresh_token = self.refresh_token
                         credentials.last_refreshed = datetime.utcnow()
                         db_session.commit()
-                        print("Updated stored credentials after token refresh")
+                        logger.info("Updated stored credentials after token refresh")
                 except Exception as e:
-                    print(f"Failed to update stored credentials: {e}")
+                    logger.error("Failed to update stored credentials: %s", e)
                 
-            print(f"Token refreshed successfully: {old_access_token[:20]}... -> {self.access_token[:20]}...")
+            logger.info("Token refreshed successfully for %s.%s", self.subdomain, self.apicp)
             return True
             
         except requests.RequestException as e:
-            print(f"Token refresh failed: {e}")
+            logger.error("Token refresh failed: %s", e)
             if hasattr(e, 'response') and e.response:
-                print(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return False
     
     def is_token_expired(self) -> bool:
@@ -194,41 +303,133 @@ class ShareFileAPI:
             
         # Try a simple API call to test token validity using the home folder endpoint
         try:
-            test_response = self._make_request("GET", "/Items(home)", 
-                                              skip_refresh=True, 
-                                              db_session=db_session, 
-                                              user_id=user_id)
-            return test_response is not None
+            return self._probe_token(db_session, user_id)
         except:
             # If test fails, try refreshing the token
             if self.refresh_token:
-                print("Token validation failed, attempting refresh...")
+                logger.info("Token validation failed, attempting refresh...")
                 refresh_success = self.refresh_access_token(db_session, user_id)
                 if refresh_success:
                     # Test again with the new token
                     try:
-                        test_response = self._make_request("GET", "/Items(home)", 
-                                                          skip_refresh=True, 
-                                                          db_session=db_session, 
-                                                          user_id=user_id)
-                        return test_response is not None
+                        return self._probe_token(db_session, user_id)
                     except:
-                        print("Token validation still failed after refresh")
+                        logger.warning("Token validation still failed after refresh")
                         return False
                 return False
             return False
     
+    def _probe_token(self, db_session=None, user_id=None) -> bool:
+        """
+        One home folder call. While ShareFile is unavailable its cached answer lets the caller
+        go on to its own (possibly stale) listing, but it is not the caller's data, so it
+        leaves served_stale as it was
+        """
+        served_stale = self.served_stale
+        try:
+            return self._make_request("GET", "/Items(home)", skip_refresh=True,
+                                      db_session=db_session, user_id=user_id) is not None
+        finally:
+            self.served_stale = served_stale
+    
+    def _timed_request(self, method: str, url: str, endpoint: str, priority: Optional[str] = None,
+                       **kwargs) -> requests.Response:
+        """
+        Issue an HTTP request under the resilience policy: each attempt has a timeout
+        within the call's deadline; idempotent calls are retried with jittered backoff
+        (or after Retry-After) on connection errors, timeouts, 429 and 502-504 while the
+        shared retry budget allows; and the host's circuit breaker fails calls fast
+        while ShareFile keeps failing. With a priority, every attempt first takes a
+        token from the API quota (raising RateLimitExceeded when none is left in time),
+        before asking the breaker
+        """
+        host = urlparse(url).netloc
+        breaker = circuit_breakers.get(host)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        deadline = time.monotonic() + self.deadline
+        retry_budget.record_request()
+        attempt = 0
+        while True:
+            # Quota first: the breaker's half-open probe must not be held by a call that never goes out
+            if priority is not None:
+                rate_limiter.acquire(priority)
+            if not breaker.allow():
+                sharefile_short_circuited_total.inc(host=host)
+                raise CircuitOpenError(f"ShareFile circuit open for {host}")
+            remaining = deadline - time.monotonic()
+            response, error = None, None
+            try:
+                response = self._send(method, url, endpoint,
+                                      timeout=(min(self.connect_timeout, remaining), min(self.read_timeout, remaining)),
+                                      **kwargs)
+            except requests.RequestException as e:
+                error = e
+            except BaseException:
+                breaker.release_probe()
+                raise
+            if error is not None or response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if priority is not None and response is not None and response.status_code == 429:
+                # Over quota despite the limiter (other hosts, other apps): back off everywhere
+                rate_limiter.drain()
+            
+            if not idempotent or attempt >= self.max_retries or (error is None and response.status_code not in RETRY_STATUSES):
+                break
+            delay = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+            if delay is None:
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+            if time.monotonic() + delay >= deadline:
+                sharefile_retries_total.inc(outcome="deadline")
+                break
+            if not retry_budget.try_spend():
+                sharefile_retries_total.inc(outcome="budget_exhausted")
+                break
+            sharefile_retries_total.inc(outcome="retried")
+            logger.info("Retrying %s %s in %.2fs (%s)", method, endpoint_template(endpoint), delay,
+                        error or response.status_code)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+        
+        if error is not None:
+            raise error
+        return response
+    
+    def _send(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """Issue one HTTP request and record its latency under the endpoint template"""
+        template = endpoint_template(endpoint)
+        start = time.perf_counter()
+        status = "error"
+        with tracer.start_span(f"sharefile {method} {template}", kind=KIND_CLIENT,
+                               attributes={"http.method": method, "sharefile.endpoint": template}) as span:
+            try:
+                response = requests.request(method, url, **kwargs)
+                status = str(response.status_code)
+                if span:
+                    span.set_attribute("http.status_code", response.status_code)
+                return response
+            finally:
+                sharefile_request_duration.observe(
+                    time.perf_counter() - start,
+                    method=method,
+                    endpoint=template,
+                    status=status
+                )
+    
     def _make_request(self, method: str, endpoint: str, skip_refresh: bool = False, 
                      db_session=None, user_id=None, **kwargs) -> Optional[Dict[Any, Any]]:
         """
         Make authenticated request to ShareFile API with automatic token refresh
         """
         if not self.access_token or not self.subdomain or not self.apicp:
-            print("Not authenticated - missing access token or connection details")
+            logger.warning("Not authenticated - missing access token or connection details")
             return None
         
         # Use dynamic URL based on user's ShareFile instance
-        base_url = f"https://{self.subdomain}.{self.apicp}/sf/v3"
+        base_url = f"{self.host_url()}/sf/v3"
         url = f"{base_url}{endpoint}"
         
         headers = {
@@ -240,32 +441,47 @@ class ShareFileAPI:
         if "headers" in kwargs:
             headers.update(kwargs.pop("headers"))
         
+        cache_key = None
+        # Plain listings only; expanded trees ($expand) are large and cached by sharefile_tree
+        if method == "GET" and not kwargs.get("params") and STALE_CACHEABLE.match(endpoint):
+            cache_key = (self.host_url(), endpoint)
+        
         try:
-            response = requests.request(method, url, headers=headers, **kwargs)
+            response = self._timed_request(method, url, endpoint, priority=self.priority, headers=headers, **kwargs)
             
             # Try to refresh token if we get 401 Unauthorized (unless skip_refresh is True)
             if response.status_code == 401 and self.refresh_token and not skip_refresh:
-                print("Access token expired, attempting refresh...")
+                logger.info("Access token expired, attempting refresh...")
                 if self.refresh_access_token(db_session, user_id):
-                    print("Token refreshed successfully, retrying request...")
+                    logger.info("Token refreshed successfully, retrying request...")
                     headers["Authorization"] = f"Bearer {self.access_token}"
-                    response = requests.request(method, url, headers=headers, **kwargs)
+                    response = self._timed_request(method, url, endpoint, priority=self.priority, headers=headers, **kwargs)
                 else:
-                    print("Token refresh failed")
+                    logger.warning("Token refresh failed")
             
             response.raise_for_status()
             
             # Try to parse JSON, but handle non-JSON responses
             try:
-                return response.json()
+                data = response.json()
             except ValueError:
                 return {"status": "success", "content": response.text}
+            if cache_key:
+                stale_listings.put(cache_key, data)
+            return data
             
-        except requests.RequestException as e:
-            print(f"API request failed: {e}")
+        except (requests.RequestException, RateLimitExceeded) as e:
+            logger.error("API request failed: %s %s: %s", method, endpoint_template(endpoint), e)
             if hasattr(e, 'response') and e.response:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response: {e.response.text}")
+                logger.error("Response status: %s body: %s", e.response.status_code, e.response.text[:500])
+            if cache_key and self.allow_stale and _upstream_unavailable(e):
+                cached = stale_listings.get(cache_key)
+                if cached is not None:
+                    data, age = cached
+                    self.served_stale = True
+                    sharefile_stale_responses_total.inc()
+                    logger.warning("ShareFile unavailable; serving %s cached %.0fs ago", endpoint_template(endpoint), age)
+                    return data
             return None
     
     def get_items(self, folder_id: str = None) -> Optional[Dict[Any, Any]]:
@@ -280,6 +496,44 @@ class ShareFileAPI:
         """Get user's home folder"""
         return self._make_request("GET", "/Items(home)")
     
+    def recent_listing(self, folder_id: str = None, max_age: float = 0) -> Optional[Dict[Any, Any]]:
+        """
+        The folder's listing (the home folder's by default) as this worker last fetched it,
+        if that was at most max_age seconds ago; no ShareFile call is made
+        """
+        host = self.host_url()
+        if not folder_id:
+            home = stale_listings.get((host, "/Items(home)"))
+            if home is None or home[1] > max_age or not home[0].get("Id"):
+                return None
+            folder_id = home[0]["Id"]
+        cached = stale_listings.get((host, f"/Items({folder_id})/Children"))
+        return cached[0] if cached is not None and cached[1] <= max_age else None
+    
+    def get_item(self, item_id: str) -> Optional[Dict[Any, Any]]:
+        """A single item's details"""
+        return self._make_request("GET", f"/Items({item_id})")
+
+    def get_item_tree(self, item_id: str, levels: int) -> Optional[Dict[Any, Any]]:
+        """An item with `levels` levels of children inline (nested OData $expand), in one call"""
+        return self._make_request("GET", f"/Items({item_id})", params={"$expand": "/".join(["Children"] * levels)})
+    
+    def open_download(self, item_id: str, db_session=None, user_id=None) -> requests.Response:
+        """
+        Start streaming an item's content under the same timeouts, retries and circuit
+        breaker as API calls (the read timeout also bounds each chunk). The caller
+        reads and closes the response; it may carry an error status
+        """
+        endpoint = f"/Items({item_id})/Download"
+        url = f"{self.host_url()}/sf/v3{endpoint}"
+        headers = {"Authorization": f"Bearer {self.access_token}", "Accept": "*/*"}
+        response = self._timed_request("GET", url, endpoint, priority=self.priority, headers=headers, stream=True)
+        if response.status_code == 401 and self.refresh_token and self.refresh_access_token(db_session, user_id):
+            response.close()
+            headers["Authorization"] = f"Bearer {self.access_token}"
+            response = self._timed_request("GET", url, endpoint, priority=self.priority, headers=headers, stream=True)
+        return response
+    
     def upload_document(self, file_path: str, folder_id: str = None) -> Optional[Dict[Any, Any]]:
         """Upload a document to ShareFile"""
         # This is a simplified implementation
@@ -303,4 +557,25 @@ class ShareFileAPI:
     def get_document_status(self, item_id: str) -> Optional[Dict[Any, Any]]:
         """Get document signing status"""
         endpoint = f"/Items({item_id})/SigningStatus"
-        return self._make_request("GET", endpoint)
\ No newline at end of file
+        return self._make_request("GET", endpoint)
+
+def get_organization_api(db_session, priority: str = INTERACTIVE) -> Optional[ShareFileAPI]:
+    """Build a ShareFileAPI client from the active organization-wide credentials"""
+    from app.models.sharefile import ShareFileCredentials
+
+    credentials = db_session.query(ShareFileCredentials).filter(
+        ShareFileCredentials.organization_wide == True,
+        ShareFileCredentials.is_active == True
+    ).first()
+
+    if not credentials:
+        return None
+
+    sf_api = ShareFileAPI()
+    sf_api.access_token = credentials.access_token
+    sf_api.refresh_token = credentials.refresh_token
+    sf_api.subdomain = credentials.subdomain
+    sf_api.apicp = credentials.apicp
+    sf_api.appcp = credentials.appcp
+    sf_api.priority = priority
+    return sf_api
@@ -0,0 +1,253 @@
+"""
+Local index of the ShareFile folder tree.
+
+Browsing used to walk ShareFile live, one /Children call per folder view,
+and there was no way to list every document or find one by name. The leader
+worker mirrors item metadata into ``sharefile_items`` instead, so the
+dashboard browses and searches locally and only goes to ShareFile for
+folders the index hasn't caught up with.
+
+Sync is an incremental crawl. Each folder row keeps the ProgenyEditDate its
+parent's listing last reported (the newest edit anywhere below it), and a
+folder is re-listed only when that changed, so an unchanged subtree costs
+no calls; without ProgenyEditDate every folder is re-listed. A pass lists at
+most SHAREFILE_INDEX_MAX_FOLDERS folders, shallowest first, and the next
+pass carries on from there. Items missing from a fresh listing are removed
+together with everything below them.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.sharefile import ShareFileItem
+from app.services.rate_limit import BACKGROUND
+from app.services.sharefile import ShareFileAPI, get_organization_api
+from app.services.sharefile_items import extract_items, item_kind
+
+logger = logging.getLogger(__name__)
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Naive UTC datetime from a ShareFile timestamp in whole seconds (what a DATETIME column keeps), or None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.replace(microsecond=0)
+
+def as_raw_item(row: ShareFileItem) -> Dict[str, Any]:
+    """An indexed item in the shape ShareFile returns it, for normalize_items and listing_version"""
+    return {
+        "Id": row.id,
+        "Name": row.name,
+        "odata.type": f"ShareFile.Api.Models.{row.item_type.capitalize()}",
+        "FileSizeBytes": row.size or 0,
+        "CreationDate": row.created_at.isoformat() + "Z" if row.created_at else "",
+        "LastWriteTime": row.modified_at.isoformat() + "Z" if row.modified_at else "",
+    }
+
+def comparable_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """A live ShareFile item reduced to what the index keeps, so listing_version matches its indexed copy"""
+    modified = _parse_time(item.get("LastWriteTime") or item.get("ModificationDate"))
+    return {
+        "Id": item.get("Id"),
+        "Name": (item.get("Name") or "")[:255],
+        "FileSizeBytes": item.get("FileSizeBytes") or 0,
+        "LastWriteTime": modified.isoformat() + "Z" if modified else "",
+    }
+
+class ShareFileIndexService:
+    def __init__(self):
+        self.enabled = os.getenv("SHAREFILE_INDEX_ENABLED", "true").lower() == "true"
+        self.sync_interval = float(os.getenv("SHAREFILE_INDEX_SYNC_SECONDS", "300"))
+        self.max_folders = int(os.getenv("SHAREFILE_INDEX_MAX_FOLDERS", "500"))
+        # Browsing falls back to ShareFile once the last completed check is older than this
+        self.max_age = timedelta(seconds=float(os.getenv("SHAREFILE_INDEX_MAX_AGE_SECONDS", "900")))
+        self.max_failures = 3  # Failed listings before a pass gives up (ShareFile is likely down)
+        self.is_running = False
+
+    async def start(self):
+        """Sync every sync_interval seconds until stop() is called"""
+        if not self.enabled or self.is_running:
+            return
+        self.is_running = True
+        logger.info("Starting ShareFile index sync")
+        loop = asyncio.get_running_loop()
+        while self.is_running:
+            try:
+                # Blocking HTTP and DB work stays off the event loop
+                stats = await loop.run_in_executor(None, self.sync_once)
+                logger.info("ShareFile index sync: %s", stats)
+            except Exception as e:
+                logger.error(f"Error in ShareFile index sync: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def stop(self):
+        self.is_running = False
+
+    def sync_once(self) -> Dict[str, Any]:
+        """One sync pass with the organization-wide credentials"""
+        db = SessionLocal()
+        try:
+            sf_api = get_organization_api(db, priority=BACKGROUND)
+            if not sf_api:
+                return {"status": "not_connected"}
+            return self.sync(db, sf_api)
+        finally:
+            db.close()
+
+    def sync(self, db: Session, sf_api: ShareFileAPI, max_folders: Optional[int] = None) -> Dict[str, Any]:
+        """Refresh the home folder, then list changed folders until none are left or the budget is spent"""
+        budget = max_folders or self.max_folders
+        now = datetime.utcnow()
+        # A cached listing would pass an outage off as "nothing changed"
+        sf_api.allow_stale = False
+        stats = {"status": "complete", "listed": 0, "updated": 0, "removed": 0, "pending": 0}
+
+        home = sf_api.get_home_folder()
+        if not home or not home.get("Id"):
+            return {**stats, "status": "error"}
+        root = db.get(ShareFileItem, home["Id"]) or ShareFileItem(id=home["Id"])
+        self._apply(db, root, home, None, 0, now)
+        # Reconnected to another account: drop the old tree
+        old_roots = [row_id for (row_id,) in db.query(ShareFileItem.id).filter(
+            ShareFileItem.parent_id.is_(None), ShareFileItem.id != root.id)]
+        stats["removed"] += self._remove(db, old_roots)
+        db.commit()
+
+        failed: List[str] = []
+        while stats["listed"] + len(failed) < budget:
+            query = db.query(ShareFileItem).filter(ShareFileItem.needs_listing == True)
+            if failed:
+                query = query.filter(ShareFileItem.id.notin_(failed))
+            folders = query.order_by(ShareFileItem.depth).limit(min(50, budget - stats["listed"] - len(failed))).all()
+            if not folders:
+                break
+            for folder in folders:
+                if self._list_folder(db, sf_api, folder, now, stats):
+                    stats["listed"] += 1
+                else:
+                    failed.append(folder.id)
+                db.commit()
+                if len(failed) >= self.max_failures:
+                    break
+            if len(failed) >= self.max_failures:
+                stats["status"] = "error"
+                break
+
+        stats["pending"] = db.query(ShareFileItem).filter(ShareFileItem.needs_listing == True).count()
+        if stats["pending"] and stats["status"] == "complete":
+            stats["status"] = "partial"
+        return stats
+
+    def _list_folder(self, db: Session, sf_api: ShareFileAPI, folder: ShareFileItem, now: datetime,
+                     stats: Dict[str, Any]) -> bool:
+        response = sf_api.get_items(folder.id)
+        if response is None:
+            return False
+        items = {item["Id"]: item for item in extract_items(response) if item.get("Id")}
+        existing = {row.id: row for row in db.query(ShareFileItem).filter(ShareFileItem.parent_id == folder.id)}
+        # Items moved here from another folder keep their rows
+        arrived = [item_id for item_id in items if item_id not in existing]
+        for start in range(0, len(arrived), 500):
+            existing.update((row.id, row) for row in db.query(ShareFileItem).filter(
+                ShareFileItem.id.in_(arrived[start:start + 500])))
+        for item_id, item in items.items():
+            row = existing.get(item_id) or ShareFileItem(id=item_id)
+            self._apply(db, row, item, folder.id, folder.depth + 1, now)
+            stats["updated"] += 1
+        seen = items.keys()
+        stats["removed"] += self._remove(db, [row_id for row_id, row in existing.items()
+                                              if row_id not in seen and row.parent_id == folder.id])
+        folder.needs_listing = False
+        folder.listed_at = now
+        return True
+
+    def _apply(self, db: Session, row: ShareFileItem, item: Dict[str, Any], parent_id: Optional[str],
+               depth: int, now: datetime):
+        kind = item_kind(item)
+        watermark = item.get("ProgenyEditDate") if kind == "folder" else None
+        row.parent_id = parent_id
+        row.name = (item.get("Name") or "")[:255]
+        row.item_type = kind[:20]
+        row.size = item.get("FileSizeBytes") or 0
+        row.created_at = _parse_time(item.get("CreationDate"))
+        row.modified_at = _parse_time(item.get("LastWriteTime") or item.get("ModificationDate"))
+        row.depth = depth
+        row.synced_at = now
+        if kind == "folder" and (watermark is None or watermark != row.watermark or row.listed_at is None):
+            row.needs_listing = True
+        elif row.needs_listing is None:
+            row.needs_listing = False
+        row.watermark = watermark
+        db.add(row)
+
+    def _remove(self, db: Session, item_ids: List[str]) -> int:
+        """Delete items and everything below them"""
+        removed = 0
+        while item_ids:
+            chunk, item_ids = item_ids[:500], item_ids[500:]
+            children = [row_id for (row_id,) in db.query(ShareFileItem.id).filter(ShareFileItem.parent_id.in_(chunk))]
+            removed += db.query(ShareFileItem).filter(ShareFileItem.id.in_(chunk)).delete(synchronize_session=False)
+            item_ids.extend(children)
+        return removed
+
+    def _root(self, db: Session) -> Optional[ShareFileItem]:
+        return db.query(ShareFileItem).filter(ShareFileItem.parent_id.is_(None)).first()
+
+    def folder_items(self, db: Session, folder_id: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Children of a folder (the home folder by default) in ShareFile's item shape, or None when
+        the index can't vouch for them and the caller should list the folder live
+        """
+        folder = self._current_folder(db, folder_id)
+        if folder is None:
+            return None
+        rows = db.query(ShareFileItem).filter(ShareFileItem.parent_id == folder.id).order_by(ShareFileItem.name)
+        return [as_raw_item(row) for row in rows]
+
+    def item(self, db: Session, item_id: str) -> Optional[Dict[str, Any]]:
+        """An item in ShareFile's shape if the index can vouch for its folder's listing, else None"""
+        row = db.get(ShareFileItem, item_id)
+        if row is None or row.parent_id is None or self._current_folder(db, row.parent_id) is None:
+            return None
+        return as_raw_item(row)
+
+    def _current_folder(self, db: Session, folder_id: Optional[str]) -> Optional[ShareFileItem]:
+        """The folder's row (the home folder by default) if its indexed children are current"""
+        if not self.enabled:
+            return None
+        root = self._root(db)
+        # Every pass re-reads the home folder; an old sync time means the sync has stopped
+        if root is None or datetime.utcnow() - root.synced_at > self.max_age:
+            return None
+        folder = root if folder_id in (None, root.id) else db.get(ShareFileItem, folder_id)
+        if folder is None or folder.listed_at is None:
+            return None
+        # Known to have changed since it was listed; without watermarks, only known to be old
+        if folder.needs_listing and (folder.watermark is not None or datetime.utcnow() - folder.listed_at > self.max_age):
+            return None
+        return folder
+
+    def search(self, db: Session, text: str, item_type: Optional[str] = None, limit: int = 50,
+               offset: int = 0) -> List[ShareFileItem]:
+        """Indexed items whose name contains text (case-insensitive with MySQL's default collation)"""
+        query = db.query(ShareFileItem)
+        if text:
+            query = query.filter(ShareFileItem.name.contains(text, autoescape=True))
+        if item_type:
+            query = query.filter(ShareFileItem.item_type == item_type)
+        return query.order_by(ShareFileItem.name).offset(offset).limit(limit).all()
+
+    def indexed_at(self, db: Session) -> Optional[datetime]:
+        root = self._root(db)
+        return root.synced_at if root else None
+
+# Global instance
+sharefile_index = ShareFileIndexService()
@@ -0,0 +1,112 @@
+"""
+Normalization of raw ShareFile item listings into the shape the dashboard renders.
+
+This runs for every item on every folder view, so it avoids per-item imports,
+parses well-formed ISO timestamps by slicing instead of through datetime, and
+keeps the type sniffing to plain dict lookups.
+"""
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+_KB = 1024
+_MB = 1024 * 1024
+_GB = 1024 * 1024 * 1024
+
+# YYYY-MM-DDTHH:MM prefix of a ShareFile timestamp; the remainder (seconds, fraction, zone) is not displayed
+_ISO_PREFIX = re.compile(r"\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])[T ]([01]\d|2[0-3]):[0-5]\d")
+
+def extract_items(items_response: Any) -> List[Dict[str, Any]]:
+    """Pull the item list out of the different response shapes ShareFile returns"""
+    if isinstance(items_response, list):
+        return items_response
+    if not isinstance(items_response, dict):
+        return []
+    # Standard API response with 'value' array; some responses use 'Children' instead
+    items = items_response.get('value') or items_response.get('Children') or []
+    # If still no items, check if the response itself is an item
+    if not items and 'Id' in items_response:
+        items = [items_response]
+    return items
+
+def format_size(size: int) -> str:
+    if not size or size <= 0:
+        return "Unknown size"
+    if size >= _GB:
+        return f"{size / _GB:.2f} GB"
+    if size >= _MB:
+        return f"{size / _MB:.2f} MB"
+    if size >= _KB:
+        return f"{size / _KB:.2f} KB"
+    return f"{size} bytes"
+
+def format_timestamp(value: str) -> str:
+    """Render an ISO timestamp as 'YYYY-MM-DD HH:MM' (as written, no zone conversion)"""
+    if not value:
+        return 'Unknown'
+    if _ISO_PREFIX.match(value):
+        return f"{value[:10]} {value[11:16]}"
+    # Unusual formats (date only, no separator, ...) take the full parser
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M')
+    except (ValueError, TypeError, AttributeError):
+        return 'Unknown'
+
+def item_kind(item: Dict[str, Any]) -> str:
+    """'folder' or another lower-cased type; ShareFile uses different type values and field names"""
+    item_type = item.get('Type')
+    if item_type:
+        return item_type.lower()
+
+    odata_type = (item.get('odata.type') or item.get('@odata.type') or '').lower()
+    if 'folder' in odata_type:
+        return 'folder'
+    if 'file' in odata_type:
+        return 'file'
+    # Items with children are folders
+    if 'Children' in item or item.get('HasChildren', False):
+        return 'folder'
+    # Everything else (extension, non-zero size, or unknown) is treated as a file
+    return 'file'
+
+def normalize_item(item: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+    """Return (is_folder, display dict) for one raw ShareFile item"""
+    is_folder = item_kind(item) == 'folder'
+    size = item.get('FileSizeBytes', 0)
+    modified = item.get('LastWriteTime', item.get('ModificationDate', ''))
+    return is_folder, {
+        "id": item.get('Id'),
+        "name": item.get('Name', 'Unknown'),
+        "type": item.get('Type'),
+        "size": size,
+        "size_display": format_size(size),
+        "created": format_timestamp(item.get('CreationDate', '')),
+        "modified": format_timestamp(modified),
+        "download_url": None if is_folder else item.get('url', item.get('Uri')),
+        "is_folder": is_folder
+    }
+
+def normalize_items(items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split a listing into (files, folders) display dicts, preserving order"""
+    files: List[Dict[str, Any]] = []
+    folders: List[Dict[str, Any]] = []
+    add_file = files.append
+    add_folder = folders.append
+    for item in items:
+        is_folder, data = normalize_item(item)
+        if is_folder:
+            add_folder(data)
+        else:
+            add_file(data)
+    return files, folders
+
+def listing_version(items: List[Dict[str, Any]]) -> str:
+    """Short hash of the fields that change when a listing changes, usable as an ETag"""
+    digest = hashlib.blake2b(digest_size=16)
+    for item in items:
+        digest.update(
+            f"{item.get('Id')}|{item.get('Name')}|{item.get('FileSizeBytes')}|"
+            f"{item.get('LastWriteTime') or item.get('ModificationDate')}\n".encode("utf-8")
+        )
+    return digest.hexdigest()
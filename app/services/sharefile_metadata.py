@@ -0,0 +1,138 @@
+"""
+Item metadata for the dashboard's file actions.
+
+Previewing a file used to cost a ShareFile call per file for its details
+(/info). ``ItemInfoService.resolve`` looks up many items at once instead:
+ids are deduplicated, items fetched in the last SHAREFILE_INFO_CACHE_SECONDS
+come from a per-worker cache, and the rest are fetched in parallel,
+SHAREFILE_INFO_CONCURRENCY at a time. An item another request is already
+fetching is waited for rather than fetched twice.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.services.sharefile import ShareFileAPI
+from app.services.tracing import submit_in_context
+
+class ItemInfoCache:
+    """Item details keyed by (host, item id), bounded in entries and age"""
+    def __init__(self, max_entries: int, max_age: float):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, item = entry
+            if time.monotonic() - stored_at > self.max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item
+
+    def put(self, key: Tuple[str, str], item: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), item)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def unique_ids(item_ids: Iterable[str]) -> List[str]:
+    """Non-empty ids in first-seen order, without repeats"""
+    return list(dict.fromkeys(item_id for item_id in item_ids if item_id))
+
+class ItemInfoService:
+    def __init__(self):
+        self.concurrency = max(1, int(os.getenv("SHAREFILE_INFO_CONCURRENCY", "8")))
+        self.max_batch = int(os.getenv("SHAREFILE_INFO_MAX_BATCH", "100"))
+        self.cache = ItemInfoCache(
+            max_entries=int(os.getenv("SHAREFILE_INFO_CACHE_ENTRIES", "5000")),
+            max_age=float(os.getenv("SHAREFILE_INFO_CACHE_SECONDS", "60")),
+        )
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def uncached(self, sf_api: ShareFileAPI, item_ids: Iterable[str]) -> List[str]:
+        """The ids resolve() would have to fetch"""
+        host = sf_api.host_url()
+        return [item_id for item_id in unique_ids(item_ids) if self.cache.get((host, item_id)) is None]
+
+    def resolve(self, sf_api: ShareFileAPI, item_ids: Iterable[str], refresh: bool = False) -> Dict[str, Any]:
+        """
+        ShareFile's details for each item. Returns {"items": {id: item or None}, "calls", "cached"};
+        an item is None when ShareFile didn't return it (not found, or unavailable)
+        """
+        host = sf_api.host_url()
+        ids = unique_ids(item_ids)
+        items: Dict[str, Optional[Dict[str, Any]]] = {}
+        stats = {"calls": 0, "cached": 0}
+        owned: List[Tuple[str, Future]] = []
+        waiting: List[Tuple[str, Future]] = []
+
+        with self._lock:
+            for item_id in ids:
+                key = (host, item_id)
+                cached = None if refresh else self.cache.get(key)
+                if cached is not None:
+                    items[item_id] = cached
+                    stats["cached"] += 1
+                elif key in self._in_flight:
+                    waiting.append((item_id, self._in_flight[key]))
+                else:
+                    future = Future()
+                    self._in_flight[key] = future
+                    owned.append((item_id, future))
+
+        if owned:
+            stats["calls"] = len(owned)
+            try:
+                if len(owned) == 1:
+                    fetched = [sf_api.get_item(owned[0][0])]
+                else:
+                    workers = min(self.concurrency, len(owned))
+                    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sharefile-info") as executor:
+                        # Each lookup keeps the request's span and request id
+                        futures = [submit_in_context(executor, sf_api.get_item, item_id) for item_id, _ in owned]
+                        fetched = [future.result() for future in futures]
+            except BaseException as e:
+                self._settle(host, owned, [None] * len(owned), error=e)
+                raise
+            fetched = [item if item and item.get("Id") else None for item in fetched]
+            self._settle(host, owned, fetched)
+            items.update((item_id, item) for (item_id, _), item in zip(owned, fetched))
+
+        for item_id, future in waiting:
+            items[item_id] = future.result()
+            stats["cached"] += 1
+
+        # Back in request order
+        return {**stats, "items": {item_id: items.get(item_id) for item_id in ids}}
+
+    def _settle(self, host: str, owned: List[Tuple[str, Future]], fetched: List[Optional[Dict[str, Any]]],
+                error: Optional[BaseException] = None):
+        """Cache what came back and release anyone waiting on these ids"""
+        with self._lock:
+            for (item_id, future), item in zip(owned, fetched):
+                key = (host, item_id)
+                # Only found items are cached; a miss may be ShareFile being down
+                if item is not None:
+                    self.cache.put(key, item)
+                self._in_flight.pop(key, None)
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(item)
+
+# Global instance
+item_info = ItemInfoService()
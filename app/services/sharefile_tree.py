@@ -0,0 +1,162 @@
+"""
+Folder tree for the admin folder picker.
+
+ShareFile returns several levels of a folder in one call with nested
+``$expand=Children/Children``, so the tree is fetched breadth-first in
+waves: each wave expands every folder left on the frontier, in parallel
+(SHAREFILE_TREE_CONCURRENCY at a time) and SHAREFILE_TREE_EXPAND_LEVELS
+levels per call. Three levels take two waves instead of one call per folder.
+
+Expanded subtrees are cached per folder along with the folder's
+ProgenyEditDate (the newest edit anywhere below it). When a parent listing
+reports the same watermark, the cached subtree is reused without a call; a
+different watermark means something below changed, and it is fetched again.
+Entries also expire after SHAREFILE_TREE_CACHE_SECONDS, and ``refresh``
+bypasses the cache.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.sharefile import ShareFileAPI
+from app.services.sharefile_items import format_timestamp, item_kind
+from app.services.tracing import submit_in_context
+
+class SubtreeCache:
+    """Expanded folder subtrees keyed by (host, folder id), bounded in entries and age"""
+    def __init__(self, max_entries: int, max_age: float):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Optional[str], int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str], watermark: Optional[str], levels: int) -> Optional[Dict[str, Any]]:
+        """The cached subtree if it is still current and at least `levels` deep"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, stored_watermark, stored_levels, node = entry
+            if stored_watermark != watermark or time.monotonic() - stored_at > self.max_age:
+                del self._entries[key]
+                return None
+            if stored_levels < levels:
+                return None
+            self._entries.move_to_end(key)
+        return _trim(node, levels)
+
+    def put(self, key: Tuple[str, str], watermark: Optional[str], levels: int, node: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), watermark, levels, node)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def _trim(node: Dict[str, Any], levels: int) -> Dict[str, Any]:
+    """Copy of a subtree cut to `levels` levels of children"""
+    children = node.get("children")
+    if children is None or levels <= 0:
+        return {**node, "children": None}
+    return {**node, "children": [_trim(child, levels - 1) for child in children]}
+
+def _folder_node(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": item.get("Id"),
+        "name": item.get("Name", "Unknown"),
+        "modified": format_timestamp(item.get("LastWriteTime", item.get("ModificationDate", ""))),
+        "has_children": bool(item.get("HasChildren", True)),
+        "file_count": None,
+        "children": None,  # None: not loaded (deeper than requested or failed)
+    }
+
+class FolderTreeService:
+    def __init__(self):
+        self.expand_levels = max(1, int(os.getenv("SHAREFILE_TREE_EXPAND_LEVELS", "2")))
+        self.concurrency = max(1, int(os.getenv("SHAREFILE_TREE_CONCURRENCY", "8")))
+        self.max_depth = int(os.getenv("SHAREFILE_TREE_MAX_DEPTH", "6"))
+        self.cache = SubtreeCache(
+            max_entries=int(os.getenv("SHAREFILE_TREE_CACHE_ENTRIES", "2000")),
+            max_age=float(os.getenv("SHAREFILE_TREE_CACHE_SECONDS", "300")),
+        )
+
+    def build(self, sf_api: ShareFileAPI, root_id: str, depth: int, refresh: bool = False) -> Dict[str, Any]:
+        """
+        The folder tree `depth` levels below root_id. Returns {"tree", "calls", "waves",
+        "cached", "complete"}; tree is None if the root itself couldn't be fetched
+        """
+        host = sf_api.host_url()
+        stats = {"calls": 1, "waves": 1, "cached": 0, "complete": True}
+        root_item = sf_api.get_item_tree(root_id, min(self.expand_levels, depth))
+        if not root_item or not root_item.get("Id"):
+            return {**stats, "tree": None, "complete": False}
+
+        root = _folder_node(root_item)
+        if "Children" not in root_item:
+            # Not expanded (not a folder, or $expand unsupported)
+            return {**stats, "tree": root, "complete": False}
+        # (node, watermark its parent reported, levels still to load) per folder the expansion stopped at
+        frontier: List[Tuple[Dict[str, Any], Optional[str], int]] = []
+        expanded = [(root, root_item.get("ProgenyEditDate"), depth)]
+        self._attach(root, root_item, depth, frontier)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="sharefile-tree") as executor:
+            while frontier:
+                to_fetch = []
+                for node, watermark, levels in frontier:
+                    cached = None if refresh else self.cache.get((host, node["id"]), watermark, levels)
+                    if cached is not None:
+                        node.update(cached)
+                        stats["cached"] += 1
+                    else:
+                        to_fetch.append((node, watermark, levels))
+                if not to_fetch:
+                    break
+
+                stats["calls"] += len(to_fetch)
+                stats["waves"] += 1
+                # Each child listing keeps the request's span and request id
+                futures = [
+                    submit_in_context(executor, sf_api.get_item_tree, node["id"], min(self.expand_levels, levels))
+                    for node, _, levels in to_fetch
+                ]
+                frontier = []
+                for (node, watermark, levels), future in zip(to_fetch, futures):
+                    item = future.result()
+                    if not item or "Children" not in item:
+                        stats["complete"] = False
+                        continue
+                    self._attach(node, item, levels, frontier)
+                    expanded.append((node, item.get("ProgenyEditDate", watermark), levels))
+
+        # Cache only what loaded completely; a failed branch would otherwise be served as empty
+        if stats["complete"]:
+            for node, watermark, levels in expanded:
+                self.cache.put((host, node["id"]), watermark, levels, node)
+        return {**stats, "tree": root}
+
+    def _attach(self, node: Dict[str, Any], item: Dict[str, Any], levels: int,
+                frontier: List[Tuple[Dict[str, Any], Optional[str], int]]):
+        """Fill node's children from an expanded item; folders whose children weren't inlined join the frontier"""
+        children = item.get("Children")
+        if children is None or levels <= 0:
+            if levels > 0:
+                frontier.append((node, item.get("ProgenyEditDate"), levels))
+            return
+        node["children"] = []
+        node["file_count"] = 0
+        for child in children:
+            if item_kind(child) != "folder":
+                node["file_count"] += 1
+                continue
+            if not child.get("Id"):
+                continue
+            child_node = _folder_node(child)
+            node["children"].append(child_node)
+            if levels > 1:
+                self._attach(child_node, child, levels - 1, frontier)
+        node["has_children"] = bool(node["children"])
+
+# Global instance
+folder_tree = FolderTreeService()
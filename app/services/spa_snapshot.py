@@ -0,0 +1,148 @@
+import hashlib
+import json
+from typing import Optional, Set
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.spa import Spa, SpaStatus, OnboardingInfo
+from app.models.document import Document, DocumentStatus, PaymentMethod
+from app.models.snapshot import SpaSnapshot
+
+STEP_ACTIONS = {
+    SpaStatus.invited: "Submit your business information",
+    SpaStatus.info_submitted: "Sign your onboarding documents",
+    SpaStatus.documents_signed: "Set up a payment method",
+    SpaStatus.payment_setup: "Waiting for final review",
+    SpaStatus.completed: None,
+}
+
+_DIRTY_KEY = "dirty_spa_snapshots"
+
+# Columns build_snapshot reads; updates to any other column leave the snapshot as it is
+SNAPSHOT_COLUMNS = {
+    Spa: {"name", "contact_email", "status", "created_at"},
+    OnboardingInfo: {"spa_id", "business_name", "address", "license_number", "submitted_at"},
+    Document: {"spa_id", "name", "status", "signed_at", "signing_url"},
+    PaymentMethod: {"spa_id", "setup_at"},
+}
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def build_snapshot(db: Session, spa: Spa) -> dict:
+    """Collect everything the spa portal shows into one JSON-serializable dict"""
+    from app.services.onboarding import STATUS_ORDER
+
+    # Queried rather than read through spa.onboarding_info, which stays None once loaded
+    # even after an info row is added by spa_id in the same session
+    info = db.query(OnboardingInfo).filter(OnboardingInfo.spa_id == spa.id).first()
+    documents = db.query(Document).filter(Document.spa_id == spa.id).order_by(Document.name).all()
+    payment_method = db.query(PaymentMethod).filter(PaymentMethod.spa_id == spa.id).first()
+    signed = sum(1 for document in documents if document.status == DocumentStatus.signed)
+
+    return {
+        "spa": {
+            "id": spa.id,
+            "name": spa.name,
+            "contact_email": spa.contact_email,
+            "status": spa.status.value,
+            "created_at": _isoformat(spa.created_at),
+        },
+        "onboarding_info": {
+            "business_name": info.business_name,
+            "address": info.address,
+            "license_number": info.license_number,
+            "submitted_at": _isoformat(info.submitted_at),
+        } if info else None,
+        "documents": [
+            {
+                "id": document.id,
+                "name": document.name,
+                "status": document.status.value,
+                "signed_at": _isoformat(document.signed_at),
+                "signing_url": document.signing_url if document.status == DocumentStatus.pending else None,
+            }
+            for document in documents
+        ],
+        "payment_method": {
+            "configured": True,
+            "setup_at": _isoformat(payment_method.setup_at),
+        } if payment_method else None,
+        "progress": {
+            "status": spa.status.value,
+            "step": STATUS_ORDER.index(spa.status) + 1,
+            "total_steps": len(STATUS_ORDER),
+            "steps": [status.value for status in STATUS_ORDER],
+            "documents_signed": signed,
+            "documents_total": len(documents),
+            "next_action": STEP_ACTIONS[spa.status],
+        },
+    }
+
+def refresh_snapshot(db: Session, spa_id: str) -> Optional[SpaSnapshot]:
+    """Rebuild and store the snapshot for one spa. The caller is responsible for committing."""
+    spa = db.get(Spa, spa_id)
+    if spa is None:
+        db.query(SpaSnapshot).filter(SpaSnapshot.spa_id == spa_id).delete()
+        return None
+
+    data = build_snapshot(db, spa)
+    etag = hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    snapshot = db.get(SpaSnapshot, spa_id)
+    if snapshot is None:
+        try:
+            with db.begin_nested():
+                snapshot = SpaSnapshot(spa_id=spa_id, data=data, etag=etag)
+                db.add(snapshot)
+            return snapshot
+        except IntegrityError:
+            # Another transaction stored this spa's first snapshot concurrently; update it instead
+            snapshot = db.query(SpaSnapshot).filter(SpaSnapshot.spa_id == spa_id).with_for_update().populate_existing().one()
+    if snapshot.etag != etag:
+        snapshot.data = data
+        snapshot.etag = etag
+    return snapshot
+
+def get_snapshot(db: Session, spa_id: str) -> Optional[SpaSnapshot]:
+    """Primary-key read of a spa's snapshot, building it on first access"""
+    snapshot = db.get(SpaSnapshot, spa_id)
+    if snapshot is None:
+        snapshot = refresh_snapshot(db, spa_id)
+        if snapshot is not None:
+            db.commit()
+    return snapshot
+
+def _spa_id_for(obj) -> Optional[str]:
+    if isinstance(obj, Spa):
+        return obj.id
+    if isinstance(obj, (Document, PaymentMethod, OnboardingInfo)):
+        return obj.spa_id
+    return None
+
+def _changes_snapshot(obj) -> bool:
+    """Whether an updated object changed a column the snapshot shows"""
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in SNAPSHOT_COLUMNS.get(type(obj), ()))
+
+@event.listens_for(SessionLocal, "before_flush")
+def _collect_changed_spas(session: Session, flush_context, instances):
+    """Remember which spas were touched so their snapshots are rebuilt before commit"""
+    dirty: Set[str] = session.info.setdefault(_DIRTY_KEY, set())
+    updated = [obj for obj in session.dirty if _changes_snapshot(obj)]
+    for obj in list(session.new) + updated + list(session.deleted):
+        spa_id = _spa_id_for(obj)
+        if spa_id:
+            dirty.add(spa_id)
+
+@event.listens_for(SessionLocal, "before_commit")
+def _rebuild_changed_snapshots(session: Session):
+    session.flush()  # Make pending changes visible and collect their spa ids
+    dirty: Set[str] = session.info.pop(_DIRTY_KEY, set())
+    for spa_id in dirty:
+        refresh_snapshot(session, spa_id)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changed_spas(session: Session):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,228 @@
+import hashlib
+import hmac
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import requests
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from app.models.document import PaymentMethod
+from app.models.job import Job, JobStatus
+from app.models.spa import Spa, SpaStatus
+from app.models.webhook import WebhookEvent
+from app.services.job_queue import job_queue, PRIORITY_INTERACTIVE
+from app.services.onboarding import set_spa_status
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Event types that carry a completed payment method setup
+SETUP_EVENT_TYPES = {"setup_intent.succeeded", "payment_method.attached"}
+
+class SignatureVerificationError(Exception):
+    pass
+
+def verify_signature(payload: bytes, signature_header: str, secret: str, tolerance: int = 300) -> None:
+    """
+    Verify a Stripe-Signature header (``t=<timestamp>,v1=<hmac>``).
+    Raises SignatureVerificationError if the payload was not signed with secret.
+    """
+    if not signature_header or not secret:
+        raise SignatureVerificationError("Missing signature or webhook secret")
+
+    timestamp = None
+    signatures = []
+    for part in signature_header.split(","):
+        key, _, value = part.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+
+    if not timestamp or not signatures:
+        raise SignatureVerificationError("Malformed Stripe-Signature header")
+
+    signed_payload = f"{timestamp}.".encode("utf-8") + payload
+    expected = hmac.new(secret.encode("utf-8"), signed_payload, hashlib.sha256).hexdigest()
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise SignatureVerificationError("Signature mismatch")
+
+    try:
+        if abs(time.time() - int(timestamp)) > tolerance:
+            raise SignatureVerificationError("Timestamp outside tolerance")
+    except ValueError:
+        raise SignatureVerificationError("Invalid timestamp")
+
+class StripeAPI:
+    def __init__(self):
+        self.secret_key = os.getenv("STRIPE_SECRET_KEY")
+        self.api_base = os.getenv("STRIPE_API_BASE", "https://api.stripe.com").rstrip("/")
+
+    def _request(self, method: str, path: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
+        response = requests.request(
+            method,
+            f"{self.api_base}/v1{path}",
+            auth=(self.secret_key, ""),
+            data=data,
+            timeout=15
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def create_customer(self, email: str, spa_id: str) -> Dict[str, Any]:
+        return self._request("POST", "/customers", {"email": email, "metadata[spa_id]": spa_id})
+
+    def create_setup_intent(self, customer_id: str, spa_id: str) -> Dict[str, Any]:
+        return self._request("POST", "/setup_intents", {
+            "customer": customer_id,
+            "usage": "off_session",
+            "metadata[spa_id]": spa_id
+        })
+
+    def retrieve_setup_intent(self, setup_intent_id: str) -> Dict[str, Any]:
+        return self._request("GET", f"/setup_intents/{setup_intent_id}")
+
+def record_event(db: Session, event: Dict[str, Any]) -> bool:
+    """
+    Persist a verified event to the webhook inbox.
+    Returns False when the event id was already received (replay or duplicate delivery).
+    """
+    event_id = event.get("id")
+    if not event_id:
+        raise ValueError("Event has no id")
+
+    if db.get(WebhookEvent, event_id) is not None:
+        return False
+
+    db.add(WebhookEvent(id=event_id, source="stripe", event_type=event.get("type", ""), payload=event))
+    schedule_processing(db)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent delivery of the same event won the insert
+        db.rollback()
+        return False
+
+    job_queue.notify()
+    return True
+
+def schedule_processing(db: Session):
+    """Enqueue a stripe.process_events job unless one is already waiting"""
+    pending = db.query(Job.id).filter(
+        Job.job_type == "stripe.process_events",
+        Job.status == JobStatus.queued
+    ).first()
+    if not pending:
+        job_queue.enqueue(db, "stripe.process_events", priority=PRIORITY_INTERACTIVE, commit=False)
+
+def _setup_from_event(event: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Extract spa/customer/payment method ids from a Stripe-shaped event"""
+    obj = event.get("data", {}).get("object", {})
+    metadata = obj.get("metadata") or {}
+    if event.get("type") == "setup_intent.succeeded":
+        return {
+            "spa_id": metadata.get("spa_id"),
+            "customer": obj.get("customer"),
+            "payment_method": obj.get("payment_method"),
+        }
+    if event.get("type") == "payment_method.attached":
+        return {
+            "spa_id": metadata.get("spa_id"),
+            "customer": obj.get("customer"),
+            "payment_method": obj.get("id"),
+        }
+    return None
+
+def upsert_payment_methods(db: Session, setups: List[Dict[str, str]]) -> int:
+    """
+    Insert or update payment_methods for a batch of setups with a fixed number of queries,
+    then move each spa from documents_signed to payment_setup (a spa still signing moves
+    when its last document is signed).
+    Later entries for the same spa win, and a row inserted concurrently for the same spa
+    (unique on spa_id) is updated instead. The caller is responsible for committing.
+    """
+    by_spa: Dict[str, Dict[str, str]] = {}
+    by_customer: Dict[str, Dict[str, str]] = {}
+    for setup in setups:
+        if not setup.get("payment_method") or not setup.get("customer"):
+            continue
+        if setup.get("spa_id"):
+            by_spa[setup["spa_id"]] = setup
+        else:
+            by_customer[setup["customer"]] = setup
+
+    if by_customer:
+        # Events without spa metadata can only update a customer we already know
+        for payment_method in db.query(PaymentMethod).filter(
+            PaymentMethod.stripe_customer_id.in_(list(by_customer.keys()))
+        ).all():
+            by_spa.setdefault(payment_method.spa_id, {**by_customer[payment_method.stripe_customer_id],
+                                                      "spa_id": payment_method.spa_id})
+
+    if not by_spa:
+        return 0
+
+    # Locked so a signing that completes meanwhile sees this batch's rows (mark_document_signed)
+    spas = {spa.id: spa for spa in db.query(Spa).filter(
+        Spa.id.in_(list(by_spa.keys()))).with_for_update().populate_existing().all()}
+    existing = {
+        payment_method.spa_id: payment_method
+        for payment_method in db.query(PaymentMethod).filter(PaymentMethod.spa_id.in_(list(spas.keys()))).all()
+    }
+
+    now = datetime.utcnow()
+    for spa_id, spa in spas.items():
+        setup = by_spa[spa_id]
+        payment_method = existing.get(spa_id)
+        if payment_method is None:
+            try:
+                with db.begin_nested():
+                    db.add(PaymentMethod(
+                        spa_id=spa_id,
+                        stripe_customer_id=setup["customer"],
+                        stripe_payment_method_id=setup["payment_method"],
+                        setup_at=now
+                    ))
+            except IntegrityError:
+                # A concurrent confirm or webhook inserted this spa's row first; update it instead
+                # (a locking read sees the committed row, whatever the transaction's snapshot)
+                payment_method = db.query(PaymentMethod).filter(
+                    PaymentMethod.spa_id == spa_id).with_for_update().one()
+        if payment_method is not None:
+            payment_method.stripe_customer_id = setup["customer"]
+            payment_method.stripe_payment_method_id = setup["payment_method"]
+            payment_method.setup_at = now
+
+        if spa.status == SpaStatus.documents_signed:
+            set_spa_status(db, spa, SpaStatus.payment_setup)
+
+    return len(spas)
+
+def process_pending_events(db: Session, batch_size: int = 200) -> Dict[str, int]:
+    """Apply unprocessed inbox events in one batched upsert"""
+    events = db.query(WebhookEvent).filter(
+        WebhookEvent.source == "stripe",
+        WebhookEvent.processed_at.is_(None)
+    ).order_by(WebhookEvent.received_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    setups = []
+    for event in events:
+        if event.event_type in SETUP_EVENT_TYPES:
+            setup = _setup_from_event(event.payload)
+            if setup:
+                setups.append(setup)
+
+    updated = upsert_payment_methods(db, setups)
+
+    now = datetime.utcnow()
+    for event in events:
+        event.processed_at = now
+
+    if len(events) == batch_size:
+        schedule_processing(db)
+    db.commit()
+    return {"events": len(events), "payment_methods": updated}
@@ -6,9 +6,9 @@ from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models.sharefile import ShareFileCredentials
 from app.services.sharefile import ShareFileAPI
+from app.services.event_hub import event_hub
+from app.services.metrics import token_refresh_total
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class TokenRefreshService:
@@ -100,6 +100,8 @@ class TokenRefreshService:
                 credentials.expires_at = datetime.utcnow() + timedelta(hours=8)
                 
                 db.commit()
+                token_refresh_total.inc(outcome="success")
+                self._publish_result(credentials, True)
                 return True
             else:
                 # Mark credentials as inactive if refresh fails multiple times
@@ -109,12 +111,27 @@ class TokenRefreshService:
                     db.commit()
                     logger.warning(f"Disabled auto-refresh for organization-wide ShareFile credentials after multiple failures")
                 
+                token_refresh_total.inc(outcome="failure")
+                self._publish_result(credentials, False)
                 return False
                 
         except Exception as e:
             logger.error(f"Exception in refresh_credentials: {e}")
+            token_refresh_total.inc(outcome="error")
             return False
             
+    def _publish_result(self, credentials: ShareFileCredentials, success: bool):
+        """Push the refresh outcome to live admin dashboards"""
+        event_hub.publish("token_refresh", {
+            "status": "success" if success else "error",
+            "subdomain": credentials.subdomain,
+            "apicp": credentials.apicp,
+            "token_valid": success,
+            "last_refreshed": credentials.last_refreshed.isoformat() if credentials.last_refreshed else None,
+            "expires_at": credentials.expires_at.isoformat() if credentials.expires_at else None,
+            "is_active": credentials.is_active
+        })
+            
     async def force_refresh_organization_token(self) -> dict:
         """Force refresh organization-wide ShareFile token"""
         db = SessionLocal()
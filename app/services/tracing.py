@@ -0,0 +1,330 @@
+"""
+Lightweight OpenTelemetry-style tracing.
+
+Spans follow the W3C trace context model and are exported in OTLP/JSON,
+either over HTTP to a collector or as JSON lines to a file (for tests).
+Sampling is decided once per trace at the root span; unsampled traces
+only pay for a context variable lookup per instrumented call.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+import requests
+
+logger = logging.getLogger(__name__)
+
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "status", "status_message", "sampled")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes: Dict[str, Any] = {}
+        self.status = STATUS_UNSET
+        self.status_message = None
+        self.sampled = sampled
+
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def set_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+def submit_in_context(executor: Executor, func: Callable, *args) -> Future:
+    """
+    executor.submit, run in a copy of the caller's context so the work keeps the
+    current span and request id (pool threads otherwise start with neither)
+    """
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+async def run_in_context(executor: Optional[Executor], func: Callable, *args):
+    """loop.run_in_executor with the caller's context, as submit_in_context"""
+    return await asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, func, *args)
+
+def parse_traceparent(header: Optional[str]):
+    """Return (trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+class FileExporter:
+    """Append each batch as OTLP/JSON lines; intended for tests and local debugging"""
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, payload: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(payload) + "\n")
+
+class OTLPHTTPExporter:
+    """POST batches to an OTLP/HTTP collector (JSON encoding)"""
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.session = requests.Session()
+
+    def export(self, payload: Dict[str, Any]):
+        response = self.session.post(self.endpoint, json=payload, timeout=5)
+        response.raise_for_status()
+
+class Tracer:
+    def __init__(self):
+        self.service_name = os.getenv("OTEL_SERVICE_NAME", "docuspa")
+        self.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0.05"))
+        self.batch_size = 256
+        self.flush_interval = 5.0
+        self.max_queue = 10000
+        self.exporter = None
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=self.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self):
+        """Select the exporter from TRACE_EXPORTER (none, otlp, file) and start the export thread"""
+        kind = os.getenv("TRACE_EXPORTER", "none").lower()
+        if kind == "otlp":
+            self.exporter = OTLPHTTPExporter(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"))
+        elif kind == "file":
+            self.exporter = FileExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+        else:
+            self.exporter = None
+            return
+
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    @contextmanager
+    def start_span(self, name: str, kind: int = KIND_INTERNAL, attributes: Dict[str, Any] = None,
+                   root: bool = False, traceparent: Optional[str] = None):
+        """
+        Start a span as a child of the current one.
+        Without a current span nothing is recorded unless root=True, so background
+        threads don't create a trace per DB query.
+        """
+        parent = _current_span.get()
+        if not self.enabled or (parent is None and not root):
+            yield None
+            return
+
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, kind, parent.sampled)
+        else:
+            incoming = parse_traceparent(traceparent)
+            if incoming:
+                trace_id, parent_id, sampled = incoming
+            else:
+                trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+                sampled = random.random() < self.sample_rate
+            span = Span(name, trace_id, parent_id, kind, sampled)
+
+        if attributes and span.sampled:
+            span.attributes.update(attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if span.sampled:
+                self._enqueue(span)
+
+    def _enqueue(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _export_loop(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(timeout, 0.5)))
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "docuspa"},
+                    "spans": [span.to_otlp() for span in batch],
+                }],
+            }]
+        }
+        try:
+            self.exporter.export(payload)
+        except Exception as e:
+            logger.warning("Trace export failed: %s", e)
+
+# Global instance
+tracer = Tracer()
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per request and honoring incoming traceparent headers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with tracer.start_span(f"{scope['method']} {scope['path']}", kind=KIND_SERVER, root=True,
+                               traceparent=traceparent) as span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = STATUS_ERROR
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"traceparent", span.traceparent.encode("latin-1"))
+                    ]
+                await send(message)
+
+            span.set_attribute("http.method", scope["method"])
+            span.set_attribute("http.target", scope["path"])
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Name by route template once routing has happened, keeping span names low-cardinality
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    span.name = f"{scope['method']} {route.path}"
+                    span.set_attribute("http.route", route.path)
+
+def instrument_engine(engine):
+    """Record a client span around every SQL statement executed inside a traced request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "QUERY"
+        manager = tracer.start_span(f"db {operation}", kind=KIND_CLIENT, attributes={
+            "db.system": engine.dialect.name,
+            "db.statement": statement[:500],
+        })
+        manager.__enter__()
+        conn.info.setdefault("_trace_spans", []).append(manager)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("_trace_spans")
+        if spans:
+            spans.pop().__exit__(None, None, None)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("_trace_spans") if conn is not None else None
+        if spans:
+            error = exception_context.original_exception
+            spans.pop().__exit__(type(error), error, error.__traceback__)
@@ -0,0 +1,553 @@
+// Check authentication
+const token = localStorage.getItem('access_token');
+if (!token) {
+    window.location.href = '/';
+}
+
+let currentClients = [];
+let currentStats = null;
+let liveEvents = null;
+
+// Load dashboard data
+async function loadDashboard() {
+    try {
+        // Load statistics
+        const statsResponse = await fetch('/admin/dashboard-stats', {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        if (statsResponse.ok) {
+            currentStats = await statsResponse.json();
+            renderStats(currentStats);
+        }
+
+        // Load clients list
+        const clientsResponse = await fetch('/admin/spas', {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        if (clientsResponse.ok) {
+            currentClients = await clientsResponse.json();
+            renderClientsTable(currentClients);
+        }
+    } catch (error) {
+        console.error('Error loading dashboard:', error);
+    }
+}
+
+function renderStats(stats) {
+    document.getElementById('totalSpas').textContent = stats.total_spas;
+    document.getElementById('invitedCount').textContent = stats.invited;
+    document.getElementById('infoSubmittedCount').textContent = stats.info_submitted;
+    document.getElementById('documentsSignedCount').textContent = stats.documents_signed;
+    document.getElementById('paymentSetupCount').textContent = stats.payment_setup;
+    document.getElementById('completedCount').textContent = stats.completed;
+}
+
+// Live updates: apply pushed changes locally instead of re-fetching the dashboard
+async function fetchEventTicket() {
+    try {
+        const response = await fetch('/admin/events/ticket', {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+        return response.ok ? (await response.json()).ticket : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+async function connectLiveEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+
+    const ticket = await fetchEventTicket();
+    if (!ticket) {
+        return;
+    }
+    liveEvents = new EventSource(`/admin/events?ticket=${encodeURIComponent(ticket)}`);
+
+    // Tickets are single-use, so the browser's own reconnect would be refused: reconnect with a
+    // fresh ticket and reload whatever changed while disconnected
+    liveEvents.onerror = () => {
+        liveEvents.close();
+        setTimeout(() => connectLiveEvents().then(loadDashboard), 5000);
+    };
+
+    liveEvents.addEventListener('spa_status', (event) => {
+        const change = JSON.parse(event.data);
+        const client = currentClients.find(c => c.id === change.spa_id);
+        if (client) {
+            client.status = change.status;
+            renderClientsTable(currentClients);
+        }
+        if (currentStats) {
+            currentStats[change.old_status] -= 1;
+            currentStats[change.status] += 1;
+            renderStats(currentStats);
+        }
+    });
+
+    // New spas and missed events (slow connection) fall back to one full reload
+    liveEvents.addEventListener('spa_created', () => loadDashboard());
+    liveEvents.addEventListener('resync', () => loadDashboard());
+}
+
+function renderClientsTable(clients) {
+    const tbody = document.getElementById('clientsTableBody');
+
+    if (clients.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="4" style="text-align: center;">No clients found</td></tr>';
+        return;
+    }
+
+    tbody.innerHTML = clients.map(client => `
+        <tr>
+            <td>${client.name}</td>
+            <td>${client.contact_email}</td>
+            <td><span class="status-badge status-${client.status}">${client.status.replace('_', ' ')}</span></td>
+            <td>${new Date(client.created_at).toLocaleDateString()}</td>
+        </tr>
+    `).join('');
+}
+
+function openAddClientModal() {
+    document.getElementById('addClientModal').style.display = 'block';
+}
+
+function closeAddClientModal() {
+    document.getElementById('addClientModal').style.display = 'none';
+    document.getElementById('addClientForm').reset();
+}
+
+document.getElementById('addClientForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const formData = new FormData(e.target);
+    const clientData = {
+        name: formData.get('name'),
+        contact_email: formData.get('contact_email')
+    };
+
+    try {
+        const response = await fetch('/admin/spas', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify(clientData)
+        });
+
+        if (response.ok) {
+            closeAddClientModal();
+            if (!liveEvents || liveEvents.readyState !== EventSource.OPEN) {
+                loadDashboard(); // Live events refresh the dashboard when connected
+            }
+            alert('Client created successfully!');
+        } else {
+            const error = await response.json();
+            alert(`Error: ${error.detail}`);
+        }
+    } catch (error) {
+        alert('Network error. Please try again.');
+    }
+});
+
+function setupShareFile() {
+    window.open('/sharefile-setup', '_blank');
+}
+
+async function testShareFileConnection() {
+    try {
+        const response = await fetch('/admin/sharefile/test', {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        const result = await response.json();
+        if (result.status === 'oauth2_required') {
+            alert('ShareFile requires OAuth2 setup. Click "Setup ShareFile OAuth2" button first.');
+        } else if (result.authenticated) {
+            alert('ShareFile connection successful!');
+        } else {
+            alert('ShareFile connection failed: ' + (result.error || result.message));
+        }
+    } catch (error) {
+        alert('Error testing ShareFile connection');
+    }
+}
+
+function logout() {
+    localStorage.removeItem('access_token');
+    window.location.href = '/';
+}
+
+// Enhanced ShareFile files loading with auto-refresh features
+async function loadShareFileFiles() {
+    try {
+        const response = await fetch('/admin/sharefile/files', {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        const data = await response.json();
+
+        // Update status with enhanced information
+        const statusDiv = document.getElementById('sharefileStatus');
+        if (data.status === 'success') {
+            let statusText = `<span style="color: #28a745;">✅ ShareFile Connected</span> - ${data.total_items} items found`;
+            if (data.token_refreshed) {
+                statusText += ` <span style="color: #007bff; font-size: 0.875rem;">(🔄 Token auto-refreshed)</span>`;
+            }
+            statusDiv.innerHTML = statusText;
+        } else if (data.status === 'not_authenticated') {
+            statusDiv.innerHTML = `<span style="color: #ffc107;">⚠️ ShareFile Not Connected</span> - <a href="/sharefile-setup" target="_blank" style="color: #007bff; font-weight: bold;">🚀 Enhanced Setup</a>`;
+        } else if (data.status === 'authentication_failed') {
+            statusDiv.innerHTML = `<span style="color: #dc3545;">🔄 Token Refresh Failed</span> - <a href="/sharefile-setup" target="_blank" style="color: #007bff;">Reconnect ShareFile</a>`;
+        } else {
+            statusDiv.innerHTML = `<span style="color: #dc3545;">❌ ShareFile Error</span> - ${data.message}`;
+        }
+
+        // Render folders with enhanced UI
+        const foldersDiv = document.getElementById('sharefileFolders');
+        if (data.folders && data.folders.length > 0) {
+            foldersDiv.innerHTML = data.folders.map(folder => `
+                <div style="padding: 0.75rem; border: 1px solid #ddd; margin: 0.25rem 0; border-radius: 6px; cursor: pointer; background: #f8f9fa; transition: all 0.2s;" 
+                     onmouseover="this.style.background='#e9ecef'" onmouseout="this.style.background='#f8f9fa'"
+                     onclick="loadFolderContents('${folder.id}', '${folder.name}')">
+                    <div style="display: flex; align-items: center;">
+                        <span style="margin-right: 8px; font-size: 1.2em;">📁</span>
+                        <span style="font-weight: 500;">${folder.name}</span>
+                    </div>
+                </div>
+            `).join('');
+        } else {
+            foldersDiv.innerHTML = '<div style="color: #666; font-style: italic; padding: 1rem; text-align: center;">No folders found</div>';
+        }
+
+        // Render files with enhanced UI
+        const filesDiv = document.getElementById('sharefileFiles');
+        if (data.files && data.files.length > 0) {
+            filesDiv.innerHTML = data.files.map(file => `
+                <div style="padding: 0.75rem; border: 1px solid #ddd; margin: 0.25rem 0; border-radius: 6px; background: #f8f9fa; transition: all 0.2s;"
+                     onmouseover="this.style.background='#e9ecef'" onmouseout="this.style.background='#f8f9fa'">
+                    <div style="display: flex; align-items: center; justify-content: space-between;">
+                        <div style="flex: 1;">
+                            <div style="font-weight: 500; display: flex; align-items: center;">
+                                <span style="margin-right: 8px; font-size: 1.1em;">📄</span>
+                                ${file.name}
+                            </div>
+                            <div style="font-size: 0.875rem; color: #666; margin-top: 4px;">
+                                📏 ${formatFileSize(file.size)} | 📅 ${formatDate(file.modified)}
+                            </div>
+                        </div>
+                        <div style="display: flex; gap: 5px; margin-left: 10px;">
+                            <button onclick="downloadFile('${file.id}', '${file.name}')" 
+                                    style="background: #28a745; color: white; border: none; padding: 4px 8px; border-radius: 4px; font-size: 0.75rem; cursor: pointer;" 
+                                    title="Download file">
+                                ⬇️
+                            </button>
+                            <button onclick="viewFile('${file.id}', '${file.name}')" 
+                                    style="background: #17a2b8; color: white; border: none; padding: 4px 8px; border-radius: 4px; font-size: 0.75rem; cursor: pointer;" 
+                                    title="View file">
+                                👁️
+                            </button>
+                            <button onclick="assignFileToSpa('${file.id}', '${file.name}')" 
+                                    style="background: #007bff; color: white; border: none; padding: 4px 8px; border-radius: 4px; font-size: 0.75rem; cursor: pointer;" 
+                                    title="Assign to SPA">
+                                ✉️
+                            </button>
+                        </div>
+                    </div>
+                </div>
+            `).join('');
+        } else {
+            filesDiv.innerHTML = '<div style="color: #666; font-style: italic; padding: 1rem; text-align: center;">No files found</div>';
+        }
+
+    } catch (error) {
+        document.getElementById('sharefileStatus').innerHTML = `<span style="color: #dc3545;">❌ Error loading ShareFile</span>`;
+        console.error('ShareFile loading error:', error);
+    }
+}
+
+function formatFileSize(bytes) {
+    if (bytes === 0) return '0 B';
+    const k = 1024;
+    const sizes = ['B', 'KB', 'MB', 'GB'];
+    const i = Math.floor(Math.log(bytes) / Math.log(k));
+    return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
+}
+
+function formatDate(dateString) {
+    if (!dateString) return 'Unknown';
+    return new Date(dateString).toLocaleDateString();
+}
+
+async function loadFolderContents(folderId, folderName = 'folder') {
+    try {
+        // Show loading state
+        document.getElementById('sharefileStatus').innerHTML = `<span style="color: #007bff;">🔄 Loading folder contents...</span>`;
+
+        const response = await fetch(`/admin/sharefile/files?folder_id=${folderId}`, {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        const data = await response.json();
+
+        if (data.status === 'success') {
+            // Update status to show we're inside a folder
+            let statusText = `<span style="color: #28a745;">✅ ShareFile Connected</span> - Inside folder: <strong>${folderName}</strong> (${data.total_items} items)`;
+            document.getElementById('sharefileStatus').innerHTML = statusText;
+
+            // Add back button for folders
+            const foldersDiv = document.getElementById('sharefileFolders');
+            let folderHtml = `
+                <div style="padding: 0.75rem; border: 1px solid #007bff; margin: 0.25rem 0; border-radius: 6px; cursor: pointer; background: #e3f2fd; transition: all 0.2s;" 
+                     onclick="loadShareFileFiles()">
+                    <div style="display: flex; align-items: center;">
+                        <span style="margin-right: 8px; font-size: 1.2em;">⬅️</span>
+                        <span style="font-weight: 500; color: #007bff;">Back to root folder</span>
+                    </div>
+                </div>
+            `;
+
+            // Add subfolders if any
+            if (data.folders && data.folders.length > 0) {
+                folderHtml += data.folders.map(folder => `
+                    <div style="padding: 0.75rem; border: 1px solid #ddd; margin: 0.25rem 0; border-radius: 6px; cursor: pointer; background: #f8f9fa; transition: all 0.2s;" 
+                         onmouseover="this.style.background='#e9ecef'" onmouseout="this.style.background='#f8f9fa'"
+                         onclick="loadFolderContents('${folder.id}', '${folder.name}')">
+                        <div style="display: flex; align-items: center;">
+                            <span style="margin-right: 8px; font-size: 1.2em;">�</span>
+                            <span style="font-weight: 500;">${folder.name}</span>
+                        </div>
+                    </div>
+                `).join('');
+            } else {
+                folderHtml += '<div style="color: #666; font-style: italic; padding: 1rem; text-align: center;">No subfolders found</div>';
+            }
+
+            foldersDiv.innerHTML = folderHtml;
+
+            // Render files in this folder
+            const filesDiv = document.getElementById('sharefileFiles');
+            if (data.files && data.files.length > 0) {
+                filesDiv.innerHTML = data.files.map(file => `
+                    <div style="padding: 0.75rem; border: 1px solid #ddd; margin: 0.25rem 0; border-radius: 6px; background: #f8f9fa; transition: all 0.2s;"
+                         onmouseover="this.style.background='#e9ecef'" onmouseout="this.style.background='#f8f9fa'">
+                        <div style="display: flex; align-items: center; justify-content: space-between;">
+                            <div style="flex: 1;">
+                                <div style="font-weight: 500; display: flex; align-items: center;">
+                                    <span style="margin-right: 8px; font-size: 1.1em;">📄</span>
+                                    ${file.name}
+                                </div>
+                                <div style="font-size: 0.875rem; color: #666; margin-top: 4px;">
+                                    📏 ${file.size_display || formatFileSize(file.size)} | 📅 ${file.modified || 'Unknown'}
+                                </div>
+                            </div>
+                            <div style="display: flex; gap: 5px; margin-left: 10px;">
+                                <button onclick="downloadFile('${file.id}', '${file.name}')" 
+                                        style="background: #28a745; color: white; border: none; padding: 4px 8px; border-radius: 4px; font-size: 0.75rem; cursor: pointer;" 
+                                        title="Download file">
+                                    ⬇️
+                                </button>
+                                <button onclick="viewFile('${file.id}', '${file.name}')" 
+                                        style="background: #17a2b8; color: white; border: none; padding: 4px 8px; border-radius: 4px; font-size: 0.75rem; cursor: pointer;" 
+                                        title="View file">
+                                    👁️
+                                </button>
+                                <button onclick="assignFileToSpa('${file.id}', '${file.name}')" 
+                                        style="background: #007bff; color: white; border: none; padding: 4px 8px; border-radius: 4px; font-size: 0.75rem; cursor: pointer;" 
+                                        title="Assign to SPA">
+                                    ✉️
+                                </button>
+                            </div>
+                        </div>
+                    </div>
+                `).join('');
+            } else {
+                filesDiv.innerHTML = '<div style="color: #666; font-style: italic; padding: 1rem; text-align: center;">No files found in this folder</div>';
+            }
+        } else {
+            // Handle error
+            document.getElementById('sharefileStatus').innerHTML = `<span style="color: #dc3545;">❌ Error loading folder: ${data.message}</span>`;
+        }
+
+    } catch (error) {
+        document.getElementById('sharefileStatus').innerHTML = `<span style="color: #dc3545;">❌ Error loading folder contents</span>`;
+        console.error('Error loading folder contents:', error);
+    }
+}
+
+// Downloads go through the server proxy, which adds ShareFile authentication
+function proxyDownloadUrl(fileId) {
+    return `/admin/sharefile/file/${encodeURIComponent(fileId)}/proxy-download`;
+}
+
+// File details lookups made together are sent as one batch-info request
+let pendingFileInfo = null;
+
+function getFileInfo(fileId) {
+    if (!pendingFileInfo) {
+        const batch = { ids: new Set() };
+        batch.promise = new Promise(resolve => setTimeout(resolve, 0)).then(() => {
+            pendingFileInfo = null;
+            return fetchFileInfo([...batch.ids]);
+        });
+        pendingFileInfo = batch;
+    }
+    pendingFileInfo.ids.add(fileId);
+    return pendingFileInfo.promise.then(files => files[fileId] || null);
+}
+
+async function fetchFileInfo(fileIds) {
+    const token = localStorage.getItem('access_token');
+    const response = await fetch('/admin/sharefile/files/batch-info', {
+        method: 'POST',
+        headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ ids: fileIds })
+    });
+
+    if (!response.ok) {
+        const error = new Error(`HTTP ${response.status}: ${response.statusText}`);
+        error.status = response.status;
+        throw error;
+    }
+
+    const data = await response.json();
+    if (data.status !== 'success') {
+        throw new Error(data.status);
+    }
+    return data.files;
+}
+
+async function downloadFile(fileId, fileName) {
+    try {
+        const token = localStorage.getItem('access_token');
+        if (!token) {
+            alert('❌ Authentication required. Please log in again.');
+            return;
+        }
+
+        const response = await fetch(proxyDownloadUrl(fileId), {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        if (!response.ok) {
+            if (response.status === 401) {
+                alert('❌ Authentication expired. Please log in again.');
+                return;
+            }
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+
+        const blob = await response.blob();
+        const url = window.URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = fileName;
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+        window.URL.revokeObjectURL(url);
+
+        // Show success message
+        const statusDiv = document.getElementById('sharefileStatus');
+        const originalContent = statusDiv.innerHTML;
+        statusDiv.innerHTML = `<span style="color: #28a745;">✅ Downloading: ${fileName}</span>`;
+        setTimeout(() => {
+            statusDiv.innerHTML = originalContent;
+        }, 3000);
+    } catch (error) {
+        console.error('Download error:', error);
+        alert(`❌ Error downloading ${fileName}: ${error.message}`);
+    }
+}
+
+async function viewFile(fileId, fileName) {
+    try {
+        const token = localStorage.getItem('access_token');
+        if (!token) {
+            alert('❌ Authentication required. Please log in again.');
+            return;
+        }
+
+        // File details decide whether it can be previewed
+        const file = await getFileInfo(fileId);
+
+        if (file) {
+            // Check if file can be previewed in browser
+            const mimeType = file.mime_type || '';
+            const extension = file.extension || '';
+
+            if (mimeType.startsWith('image/') || 
+                mimeType === 'application/pdf' || 
+                mimeType.startsWith('text/') ||
+                extension.toLowerCase().match(/\\.(pdf|jpg|jpeg|png|gif|txt|html|css|js|json)$/)) {
+
+                // Open in new window for preview
+                const previewWindow = window.open(proxyDownloadUrl(fileId), '_blank');
+                if (!previewWindow) {
+                    alert('❌ Pop-up blocked. Please allow pop-ups for file viewing or use download instead.');
+                } else {
+                    // Show success message
+                    const statusDiv = document.getElementById('sharefileStatus');
+                    const originalContent = statusDiv.innerHTML;
+                    statusDiv.innerHTML = `<span style="color: #17a2b8;">👁️ Opening: ${fileName}</span>`;
+                    setTimeout(() => {
+                        statusDiv.innerHTML = originalContent;
+                    }, 3000);
+                }
+            } else {
+                // Show file info and offer download
+                const info = `📄 File Information: ${fileName}\\n\\n` +
+                            `📏 Size: ${file.size_display}\\n` +
+                            `📅 Modified: ${file.modified}\\n` +
+                            `🔧 Type: ${file.mime_type || 'Unknown'}\\n\\n` +
+                            `❓ This file type cannot be previewed in the browser.\\n` +
+                            `Would you like to download it instead?`;
+
+                if (confirm(info)) {
+                    downloadFile(fileId, fileName);
+                }
+            }
+        } else {
+            alert(`❌ Error: Could not get file information for ${fileName}`);
+        }
+    } catch (error) {
+        if (error.status === 401) {
+            alert('❌ Authentication expired. Please log in again.');
+            return;
+        }
+        console.error('View error:', error);
+        alert(`❌ Error viewing ${fileName}: ${error.message}`);
+    }
+}
+
+function assignFileToSpa(fileId, fileName) {
+    // TODO: Implement file assignment to spa clients
+    alert(`📄 Assign File: ${fileName}\n\n🔗 File ID: ${fileId}\n\n🚀 File assignment to spa clients will be implemented next!\n\nFeatures planned:\n• Select target spa client\n• Assign for digital signing\n• Track document status\n• Automated notifications`);
+}
+
+// Load dashboard and ShareFile on page load
+loadDashboard();
+connectLiveEvents();
+loadShareFileFiles();
@@ -0,0 +1,31 @@
+document.getElementById('loginForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const email = document.getElementById('email').value;
+    const password = document.getElementById('password').value;
+    const messageDiv = document.getElementById('message');
+
+    try {
+        const response = await fetch('/auth/login', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ email, password })
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            localStorage.setItem('access_token', data.access_token);
+            messageDiv.innerHTML = '<div class="success">Login successful! Redirecting...</div>';
+            setTimeout(() => {
+                window.location.href = '/dashboard';
+            }, 1000);
+        } else {
+            messageDiv.innerHTML = `<div class="error">${data.detail || 'Login failed'}</div>`;
+        }
+    } catch (error) {
+        messageDiv.innerHTML = '<div class="error">Network error. Please try again.</div>';
+    }
+});
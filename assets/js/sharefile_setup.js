@@ -0,0 +1,389 @@
+let currentStep = 1;
+let setupInProgress = false;
+
+// Initialize on page load
+window.onload = function() {
+    checkShareFileStatus();
+    connectLiveEvents();
+
+    // Handle automatic callback from ShareFile
+    if (window.location.search.includes('code=')) {
+        handleAutomaticCallback();
+    }
+};
+
+function updateProgressStep(step) {
+    for (let i = 1; i <= 4; i++) {
+        const element = document.getElementById(`step${i}`);
+        element.className = 'progress-step';
+        if (i < step) element.classList.add('completed');
+        if (i === step) element.classList.add('active');
+    }
+    currentStep = step;
+}
+
+async function checkShareFileStatus() {
+    try {
+        const token = localStorage.getItem('access_token');
+        if (!token) {
+            document.getElementById('status').innerHTML = 
+                '<div class="error">⚠️ Please <a href="/" style="color: #dc3545; font-weight: bold;">log in</a> to continue with ShareFile setup.</div>';
+            return;
+        }
+
+        const response = await fetch('/admin/sharefile/status', {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+
+        const data = await response.json();
+        renderShareFileStatus(data);
+    } catch (error) {
+        document.getElementById('status').innerHTML = 
+            '<div class="error">❌ Error checking ShareFile status. Trying manual setup...</div>';
+        console.error('Status check error:', error);
+        showManualFallback();
+    }
+}
+
+function renderShareFileStatus(data) {
+    const statusDiv = document.getElementById('status');
+
+    if (data.status === 'connected') {
+        statusDiv.innerHTML = `
+            <div class="success">
+                🎉 ShareFile Connected & Healthy!
+                <div style="margin-top: 10px;">
+                    <strong>📍 Subdomain:</strong> ${data.subdomain} &nbsp;|&nbsp; 
+                    <strong>🌐 API:</strong> ${data.apicp} &nbsp;|&nbsp;
+                    <strong>🔄 Token:</strong> ${data.token_valid ? '🟢 Valid' : '🟡 Refreshing...'}
+                </div>
+                <div style="margin-top: 8px; color: #666;">
+                    <small>Last Updated: ${data.last_refreshed ? new Date(data.last_refreshed).toLocaleString() : 'Initial setup'}</small>
+                </div>
+            </div>
+        `;
+        updateProgressStep(4);
+        showTokenManagement(data);
+    } else if (data.status === 'token_invalid') {
+        statusDiv.innerHTML = `
+            <div class="warning">
+                ⚠️ ShareFile Connection Needs Refresh
+                <div style="margin-top: 10px;">Your ShareFile connection exists but the token has expired. This is normal and happens automatically.</div>
+            </div>
+        `;
+        updateProgressStep(3);
+        showTokenManagement(data);
+    } else {
+        statusDiv.innerHTML = `
+            <div class="error">
+                🔌 ShareFile Not Connected
+                <div style="margin-top: 10px;">Let's get you connected with our enhanced one-click process!</div>
+            </div>
+        `;
+        updateProgressStep(2);
+        showAutomatedFlow();
+    }
+}
+
+// Token refresh results are pushed by the server instead of re-polling the status endpoint
+let liveEvents = null;
+async function connectLiveEvents() {
+    const token = localStorage.getItem('access_token');
+    if (!token || !window.EventSource) {
+        return;
+    }
+
+    let ticket;
+    try {
+        const response = await fetch('/admin/events/ticket', {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        if (!response.ok) {
+            return;
+        }
+        ticket = (await response.json()).ticket;
+    } catch (error) {
+        return;
+    }
+
+    liveEvents = new EventSource(`/admin/events?ticket=${encodeURIComponent(ticket)}`);
+    // Tickets are single-use: reconnect with a fresh one and re-check what changed meanwhile
+    liveEvents.onerror = () => {
+        liveEvents.close();
+        setTimeout(() => connectLiveEvents().then(checkShareFileStatus), 5000);
+    };
+    liveEvents.addEventListener('token_refresh', (event) => {
+        const result = JSON.parse(event.data);
+        renderShareFileStatus({
+            status: result.token_valid ? 'connected' : 'token_invalid',
+            subdomain: result.subdomain,
+            apicp: result.apicp,
+            token_valid: result.token_valid,
+            last_refreshed: result.last_refreshed
+        });
+    });
+    liveEvents.addEventListener('resync', () => checkShareFileStatus());
+}
+
+function showAutomatedFlow() {
+    document.getElementById('automatedFlow').style.display = 'block';
+    document.getElementById('manualFallback').style.display = 'none';
+    document.getElementById('tokenManagement').style.display = 'none';
+    getQuickAuthUrl();
+}
+
+function showTokenManagement(data = {}) {
+    document.getElementById('tokenManagement').style.display = 'block';
+    document.getElementById('automatedFlow').style.display = 'none';
+    document.getElementById('manualFallback').style.display = 'none';
+
+    // Show token details
+    if (data.subdomain) {
+        document.getElementById('tokenDetails').innerHTML = `
+            <h4>📋 Connection Details</h4>
+            <div class="status-grid">
+                <div><strong>Subdomain:</strong><br>${data.subdomain}</div>
+                <div><strong>API Endpoint:</strong><br>${data.apicp}</div>
+                <div><strong>Token Status:</strong><br>${data.token_valid ? '🟢 Valid' : '🟡 Needs Refresh'}</div>
+                <div><strong>Last Updated:</strong><br>${data.last_refreshed ? new Date(data.last_refreshed).toLocaleDateString() : 'Initial'}</div>
+            </div>
+        `;
+    }
+}
+
+function showManualFallback() {
+    document.getElementById('manualFallback').style.display = 'block';
+    document.getElementById('automatedFlow').style.display = 'none';
+    document.getElementById('tokenManagement').style.display = 'none';
+}
+
+async function getQuickAuthUrl() {
+    try {
+        const token = localStorage.getItem('access_token');
+        const response = await fetch('/admin/sharefile/auth-url', {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+
+        const data = await response.json();
+
+        // Set up the quick auth link
+        const authLink = document.getElementById('quickAuthLink');
+        authLink.href = data.authorization_url;
+
+        // Add click tracking
+        authLink.onclick = function() {
+            document.getElementById('authProgress').innerHTML = `
+                <div class="loading">
+                    🔄 Opening ShareFile authorization...
+                    <div style="margin-top: 10px;">Complete the authorization in the new tab and you'll be redirected back automatically!</div>
+                </div>
+            `;
+            updateProgressStep(3);
+        };
+
+    } catch (error) {
+        document.getElementById('authProgress').innerHTML = 
+            `<div class="error">❌ Error getting authorization URL: ${error.message}</div>`;
+        showManualFallback();
+    }
+}
+
+async function refreshToken() {
+    document.getElementById('connectionResults').innerHTML = 
+        '<div class="loading">🔄 Refreshing ShareFile token...</div>';
+
+    try {
+        const token = localStorage.getItem('access_token');
+        const response = await fetch('/admin/sharefile/refresh-token', {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+
+        const data = await response.json();
+
+        if (data.status === 'success') {
+            document.getElementById('connectionResults').innerHTML = 
+                `<div class="success">✅ Token refreshed successfully! Updated at ${new Date().toLocaleString()}</div>`;
+            if (!liveEvents || liveEvents.readyState !== EventSource.OPEN) {
+                setTimeout(checkShareFileStatus, 1500);
+            }
+        } else {
+            document.getElementById('connectionResults').innerHTML = 
+                `<div class="error">❌ Refresh failed: ${data.message}</div>`;
+        }
+    } catch (error) {
+        document.getElementById('connectionResults').innerHTML = 
+            `<div class="error">❌ Refresh error: ${error.message}</div>`;
+    }
+}
+
+async function testConnection() {
+    document.getElementById('connectionResults').innerHTML = 
+        '<div class="loading">🧪 Testing ShareFile API connection...</div>';
+
+    try {
+        const token = localStorage.getItem('access_token');
+        const response = await fetch('/admin/sharefile/test-connection', {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+
+        const data = await response.json();
+
+        if (data.status === 'success') {
+            document.getElementById('connectionResults').innerHTML = `
+                <div class="success">
+                    ✅ ShareFile API Connection Successful! 
+                    <br><br><strong>📁 Home Folder:</strong> ${data.home_folder.name} (ID: ${data.home_folder.id})
+                    <br><strong>🌐 Endpoint:</strong> ${data.connection_details.subdomain}.${data.connection_details.apicp}
+                    <br><strong>🔄 Last Token Refresh:</strong> ${data.connection_details.last_refreshed ? new Date(data.connection_details.last_refreshed).toLocaleString() : 'Initial setup'}
+                    <br><br><em>Your ShareFile integration is working perfectly!</em>
+                </div>
+            `;
+        } else if (data.status === 'not_authenticated') {
+            document.getElementById('connectionResults').innerHTML = `
+                <div class="error">
+                    ⚠️ Not Connected: ${data.message}
+                    <br><br>Please complete the OAuth2 setup above first.
+                </div>
+            `;
+        } else {
+            let errorHtml = `<div class="error">❌ Connection test failed: ${data.message}`;
+
+            if (data.debug_info) {
+                errorHtml += `
+                    <br><br><strong>🔍 Debug Information:</strong>
+                    <br>• <strong>Subdomain:</strong> ${data.debug_info.subdomain}
+                    <br>• <strong>API Endpoint:</strong> ${data.debug_info.apicp}
+                    <br>• <strong>Test URL:</strong> ${data.debug_info.endpoint_tested}
+                `;
+                if (data.debug_info.error_type) {
+                    errorHtml += `<br>• <strong>Error Type:</strong> ${data.debug_info.error_type}`;
+                }
+                if (data.debug_info.has_refresh_token !== undefined) {
+                    errorHtml += `<br>• <strong>Has Refresh Token:</strong> ${data.debug_info.has_refresh_token}`;
+                    errorHtml += `<br>• <strong>Last Refreshed:</strong> ${data.debug_info.last_refreshed || 'Never'}`;
+                }
+            }
+
+            if (data.recommendation) {
+                errorHtml += `<br><br><strong>💡 Recommendation:</strong><br>${data.recommendation}`;
+            }
+
+            errorHtml += '</div>';
+            document.getElementById('connectionResults').innerHTML = errorHtml;
+        }
+    } catch (error) {
+        document.getElementById('connectionResults').innerHTML = 
+            `<div class="error">❌ Test error: ${error.message}</div>`;
+    }
+}
+
+// Handle automatic callback
+function handleAutomaticCallback() {
+    const urlParams = new URLSearchParams(window.location.search);
+    const code = urlParams.get('code');
+    const subdomain = urlParams.get('subdomain'); 
+    const apicp = urlParams.get('apicp');
+    const appcp = urlParams.get('appcp');
+
+    if (code && subdomain && apicp) {
+        updateProgressStep(3);
+        document.getElementById('status').innerHTML = 
+            '<div class="loading">🔄 Processing ShareFile authorization... Almost done!</div>';
+
+        completeAutomaticOAuth(code, subdomain, apicp, appcp);
+    }
+}
+
+async function completeAutomaticOAuth(code, subdomain, apicp, appcp) {
+    if (setupInProgress) return;
+    setupInProgress = true;
+
+    try {
+        const token = localStorage.getItem('access_token');
+        const params = new URLSearchParams({
+            code: code,
+            subdomain: subdomain,
+            apicp: apicp,
+            state: 'admin_setup'
+        });
+
+        if (appcp) params.append('appcp', appcp);
+
+        const response = await fetch('/admin/sharefile/callback?' + params, {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+
+        const data = await response.json();
+
+        if (data.status === 'success') {
+            document.getElementById('status').innerHTML = `
+                <div class="success">
+                    🎉 ShareFile Integration Complete!
+                    <div style="margin-top: 10px;">
+                        <strong>✅ Connected to:</strong> ${data.subdomain}.${data.apicp}
+                        <br><strong>🔄 Auto-refresh:</strong> Enabled
+                        <br><strong>📁 File access:</strong> Ready
+                    </div>
+                </div>
+            `;
+            updateProgressStep(4);
+
+            // Clean URL
+            window.history.replaceState({}, document.title, window.location.pathname);
+
+            setTimeout(() => {
+                showTokenManagement(data);
+            }, 2000);
+        } else {
+            throw new Error(data.message || 'Setup failed');
+        }
+
+    } catch (error) {
+        document.getElementById('status').innerHTML = 
+            `<div class="error">❌ Automatic setup failed: ${error.message}</div>`;
+        showManualFallback();
+    } finally {
+        setupInProgress = false;
+    }
+}
+
+// Manual fallback functions
+async function getAuthUrl() {
+    try {
+        const token = localStorage.getItem('access_token');
+        const response = await fetch('/admin/sharefile/auth-url', {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+
+        const data = await response.json();
+        document.getElementById('authUrlResult').innerHTML = `
+            <div class="success">
+                <strong>Authorization URL Generated:</strong>
+                <br><a href="${data.authorization_url}" target="_blank" class="auth-link">Open ShareFile Authorization</a>
+            </div>
+        `;
+    } catch (error) {
+        document.getElementById('authUrlResult').innerHTML = 
+            `<div class="error">❌ Error: ${error.message}</div>`;
+    }
+}
+
+async function completeManualOAuth() {
+    const code = document.getElementById('code').value;
+    const subdomain = document.getElementById('subdomain').value;
+    const apicp = document.getElementById('apicp').value;
+
+    if (!code || !subdomain || !apicp) {
+        document.getElementById('manualResult').innerHTML = 
+            '<div class="error">❌ Please fill in all required fields</div>';
+        return;
+    }
+
+    document.getElementById('manualResult').innerHTML = 
+        '<div class="loading">🔄 Setting up ShareFile connection...</div>';
+
+    completeAutomaticOAuth(code, subdomain, apicp);
+}
@@ -0,0 +1,81 @@
+const token = localStorage.getItem('access_token');
+
+async function getAuthUrl() {
+    try {
+        const response = await fetch('/admin/sharefile/auth-url', {
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            document.getElementById('authUrlResult').innerHTML = `
+                <p class="success">Authorization URL generated!</p>
+                <p><a href="${data.authorization_url}" target="_blank" class="btn">Authorize DocuSpa on ShareFile</a></p>
+                <p><small>URL: ${data.authorization_url}</small></p>
+            `;
+        } else {
+            document.getElementById('authUrlResult').innerHTML = `
+                <p class="error">Error: ${data.detail}</p>
+            `;
+        }
+    } catch (error) {
+        document.getElementById('authUrlResult').innerHTML = `
+            <p class="error">Network error: ${error.message}</p>
+        `;
+    }
+}
+
+async function completeSetup() {
+    const code = document.getElementById('code').value;
+    const subdomain = document.getElementById('subdomain').value;
+    const apicp = document.getElementById('apicp').value;
+    const appcp = document.getElementById('appcp').value;
+
+    if (!code || !subdomain || !apicp) {
+        document.getElementById('setupResult').innerHTML = `
+            <p class="error">Please fill in Code, Subdomain, and API Control Plane fields.</p>
+        `;
+        return;
+    }
+
+    try {
+        const params = new URLSearchParams({
+            code: code,
+            subdomain: subdomain,
+            apicp: apicp
+        });
+
+        if (appcp) {
+            params.append('appcp', appcp);
+        }
+
+        const response = await fetch(`/admin/sharefile/callback?${params}`, {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${token}`
+            }
+        });
+
+        const data = await response.json();
+
+        if (data.status === 'success') {
+            document.getElementById('setupResult').innerHTML = `
+                <p class="success">${data.message}</p>
+                <p>Subdomain: ${data.subdomain}</p>
+                <p>API Control Plane: ${data.apicp}</p>
+                <p>Home folder access successful!</p>
+            `;
+        } else {
+            document.getElementById('setupResult').innerHTML = `
+                <p class="error">Setup failed: ${data.message}</p>
+            `;
+        }
+    } catch (error) {
+        document.getElementById('setupResult').innerHTML = `
+            <p class="error">Network error: ${error.message}</p>
+        `;
+    }
+}
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure worker cold start: process launch until /health answers.
+
+Also times the schema check every worker used to run at import
+(Base.metadata.create_all against an existing schema), for comparison
+with the deploy-time `alembic upgrade head` that replaced it.
+
+    DATABASE_URL=sqlite:///bench.db python benchmarks/cold_start.py --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_to_ready(port: int, timeout: float = 60.0) -> float:
+    """Seconds from spawning a single uvicorn worker to its first 200 from /health"""
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.ConnectionError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {process.returncode}")
+            time.sleep(0.005)
+        raise RuntimeError("Server did not become ready")
+    finally:
+        process.terminate()
+        process.wait()
+
+def time_schema_check() -> float:
+    """What each worker paid at import before migrations: connect and reflect every table"""
+    code = (
+        "import time; from sqlalchemy import create_engine; import os;"
+        "from app.database import Base;"
+        "from app.models import user, spa, document, sharefile, job, notification, webhook, snapshot, change_counter;"
+        "engine = create_engine(os.environ['DATABASE_URL']);"
+        "start = time.perf_counter(); Base.metadata.create_all(bind=engine);"
+        "print(time.perf_counter() - start)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL must point at a migrated database")
+
+    ready = [time_to_ready(args.port) for _ in range(args.runs)]
+    schema = [time_schema_check() for _ in range(args.runs)]
+
+    print(f"{'measurement':<34}{'median ms':>10}{'min ms':>10}{'max ms':>10}")
+    for name, values in (("launch to first /health 200", ready), ("create_all schema check (removed)", schema)):
+        print(f"{name:<34}{statistics.median(values) * 1000:>10.0f}{min(values) * 1000:>10.0f}{max(values) * 1000:>10.0f}")
+
+if __name__ == "__main__":
+    main()
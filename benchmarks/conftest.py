@@ -0,0 +1,43 @@
+"""
+Fixtures shared by the benchmarks that run against the local ShareFile
+stand-in (fake_sharefile.py).
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.sharefile import ShareFileAPI
+from fake_sharefile import serve
+
+@pytest.fixture
+def serve_fake(monkeypatch):
+    """Serve a FakeShareFile on a free port, with SHAREFILE_API_HOST pointing at it, for the test"""
+    servers = []
+
+    def start(fake):
+        server = serve("127.0.0.1", 0, fake)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setenv("SHAREFILE_API_HOST", f"http://127.0.0.1:{server.server_address[1]}")
+        return fake
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def sharefile_api():
+    """Makes ShareFileAPI clients with stand-in credentials; keyword arguments override attributes"""
+    def make(**settings) -> ShareFileAPI:
+        api = ShareFileAPI()
+        api.access_token, api.subdomain, api.apicp = "token", "docuspa", "sharefile.com"
+        for name, value in settings.items():
+            setattr(api, name, value)
+        return api
+    return make
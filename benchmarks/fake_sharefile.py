@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Local ShareFile stand-in for load tests.
+
+Serves the subset of the API DocuSpa uses (/oauth/token, /sf/v3/Items(...)
+with $expand=Children, /Children, /Download, /CreateSigningLink, /SigningStatus) with deterministic
+synthetic folders and configurable latency and error rates.
+
+    python benchmarks/fake_sharefile.py --port 9100 --latency-ms 80 --error-rate 0.01
+    SHAREFILE_API_HOST=http://127.0.0.1:9100 uvicorn main:app
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+ITEM_PATH = re.compile(r"^/sf/v3/Items\(([^)]*)\)(?:/(\w+))?$")
+
+class FakeShareFile:
+    def __init__(self, folder_size: int = 200, subfolders: int = 10, download_bytes: int = 5 * 1024 * 1024,
+                 latency_ms: float = 50, jitter_ms: float = 20, error_rate: float = 0.0, seed: int = 42,
+                 retry_after: Optional[int] = None):
+        self.folder_size = folder_size
+        self.subfolders = subfolders
+        self.download_bytes = download_bytes
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after  # Retry-After seconds sent with injected 503s
+        self.seed = seed
+        self.epoch = datetime(2024, 1, 1)
+        self.requests = 0
+
+    def delay(self):
+        latency = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    def item(self, item_id: str) -> dict:
+        """Metadata for an item; ids starting with 'fo' are folders, everything else a file"""
+        rng = random.Random(f"{self.seed}:{item_id}")
+        created = self.epoch + timedelta(minutes=rng.randint(0, 500000))
+        modified = created + timedelta(minutes=rng.randint(0, 50000))
+        if item_id == "home" or item_id.startswith("fo"):
+            return {
+                "Id": item_id,
+                "Name": "Home" if item_id == "home" else f"Folder {item_id[-6:]}",
+                "odata.type": "ShareFile.Api.Models.Folder",
+                "FileSizeBytes": 0,
+                "CreationDate": created.isoformat() + "Z",
+                "LastWriteTime": modified.isoformat() + "Z",
+                # Newest edit anywhere below the folder; the synthetic tree never changes
+                "ProgenyEditDate": modified.isoformat() + "Z",
+                "HasChildren": True,
+            }
+        extension = rng.choice(["pdf", "docx", "xlsx", "png", "txt"])
+        return {
+            "Id": item_id,
+            "Name": f"Document {item_id[-6:]}.{extension}",
+            "odata.type": "ShareFile.Api.Models.File",
+            "FileSizeBytes": rng.randint(1024, 50 * 1024 * 1024),
+            "CreationDate": created.isoformat() + "Z",
+            "LastWriteTime": modified.isoformat() + "Z",
+            "MimeType": {"pdf": "application/pdf", "png": "image/png", "txt": "text/plain"}.get(
+                extension, "application/octet-stream"),
+            "Extension": extension,
+        }
+
+    def expanded(self, item_id: str, levels: int) -> dict:
+        """Item with `levels` levels of Children inline, as $expand=Children/Children/... returns it"""
+        item = self.item(item_id)
+        if levels > 0 and item["odata.type"].endswith("Folder"):
+            item["Children"] = [self.expanded(child["Id"], levels - 1) for child in self.children(item_id)["value"]]
+        return item
+
+    def children(self, folder_id: str) -> dict:
+        items = []
+        for index in range(self.folder_size):
+            prefix = "fo" if index < self.subfolders else "fi"
+            items.append(self.item(f"{prefix}{folder_id[-8:]}{index:06d}"))
+        return {"odata.count": len(items), "value": items}
+
+def make_handler(fake: FakeShareFile):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _json(self, status: int, body: dict, headers: Optional[dict] = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _begin(self) -> bool:
+            fake.requests += 1
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            fake.delay()
+            if fake.should_fail():
+                headers = {"Retry-After": str(fake.retry_after)} if fake.retry_after is not None else None
+                self._json(503, {"code": "ServiceUnavailable", "message": "Injected failure"}, headers)
+                return False
+            return True
+
+        def do_POST(self):
+            if not self._begin():
+                return
+            path = urlparse(self.path).path
+            if path == "/oauth/token":
+                self._json(200, {
+                    "access_token": f"bench-access-{random.getrandbits(32):08x}",
+                    "refresh_token": "bench-refresh",
+                    "token_type": "bearer",
+                    "expires_in": 28800,
+                })
+                return
+            match = ITEM_PATH.match(path)
+            if match and match.group(2) == "CreateSigningLink":
+                self._json(200, {"url": f"https://sign.example.test/{match.group(1)}"})
+                return
+            self._json(404, {"code": "NotFound"})
+
+        def do_GET(self):
+            if not self._begin():
+                return
+            url = urlparse(self.path)
+            match = ITEM_PATH.match(url.path)
+            if not match:
+                self._json(404, {"code": "NotFound"})
+                return
+
+            item_id, action = match.group(1), match.group(2)
+            if action is None:
+                expand = parse_qs(url.query).get("$expand", [""])[0]
+                self._json(200, fake.expanded(item_id, expand.count("Children")))
+            elif action == "Children":
+                self._json(200, fake.children(item_id))
+            elif action == "SigningStatus":
+                self._json(200, {"status": random.choice(["pending", "signed"])})
+            elif action == "Download":
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(fake.download_bytes))
+                self.end_headers()
+                chunk = b"\0" * 65536
+                remaining = fake.download_bytes
+                while remaining > 0:
+                    self.wfile.write(chunk[:min(remaining, len(chunk))])
+                    remaining -= len(chunk)
+            else:
+                self._json(404, {"code": "NotFound"})
+
+    return Handler
+
+def serve(host: str, port: int, fake: FakeShareFile) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ShareFile stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with injected 503s")
+    parser.add_argument("--folder-size", type=int, default=200, help="Items returned per /Children listing")
+    parser.add_argument("--download-mb", type=float, default=5)
+    args = parser.parse_args()
+
+    fake = FakeShareFile(
+        folder_size=args.folder_size,
+        download_bytes=int(args.download_mb * 1024 * 1024),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+    )
+    server = serve(args.host, args.port, fake)
+    print(f"Fake ShareFile listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Stand-in read replicas for local testing of replica routing.
+
+Copies a primary SQLite database into one or more replica files every
+--interval seconds, each copy applied --lag seconds after it was taken, so
+the app sees replicas with real (simulated) replication lag. Ctrl+Z pauses
+replication: the replicas fall behind, the app stops reading from them, and
+they rejoin once it resumes.
+
+    export DATABASE_URL=sqlite:///primary.db
+    alembic upgrade head && python benchmarks/seed.py --spas 1000
+    python benchmarks/replica_standin.py --primary primary.db --replica replica1.db --replica replica2.db --lag 1 &
+    DATABASE_REPLICA_URLS=sqlite:///replica1.db,sqlite:///replica2.db uvicorn main:app --port 8000
+
+With MySQL containers, point DATABASE_REPLICA_URLS at real replicas instead.
+"""
+
+import argparse
+import collections
+import sqlite3
+import time
+
+def replicate(primary: str, replicas: list, interval: float, lag: float):
+    pending = collections.deque()
+    while True:
+        # Snapshot the primary now, apply it once it is `lag` seconds old
+        snapshot = sqlite3.connect(":memory:")
+        with sqlite3.connect(primary) as source:
+            source.backup(snapshot)
+        pending.append((time.time(), snapshot))
+
+        while pending and time.time() - pending[0][0] >= lag:
+            _, ready = pending.popleft()
+            for path in replicas:
+                with sqlite3.connect(path, timeout=30) as target:
+                    ready.backup(target)
+            ready.close()
+        time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--primary", required=True, help="Primary SQLite database file")
+    parser.add_argument("--replica", action="append", required=True, help="Replica file (repeatable)")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between copies")
+    parser.add_argument("--lag", type=float, default=1.0, help="Seconds each copy waits before it is applied")
+    args = parser.parse_args()
+    replicate(args.primary, args.replica, args.interval, args.lag)
+
+if __name__ == "__main__":
+    main()
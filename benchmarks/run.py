@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Load-test scenarios against a running DocuSpa instance.
+
+Reports throughput and p50/p95/p99 latency per scenario and optionally
+compares them with a stored baseline, failing when a scenario regresses.
+
+    python benchmarks/run.py --scenario dashboard --concurrency 20 --duration 30
+    python benchmarks/run.py --scenario all --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --scenario all --baseline benchmarks/baseline.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+import requests
+
+# Matches the account created by benchmarks/seed.py
+ADMIN_EMAIL = os.getenv("BENCH_EMAIL", "bench-admin@docuspa.com")
+ADMIN_PASSWORD = os.getenv("BENCH_PASSWORD", "benchmark123!")
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+class Client:
+    """One keep-alive session per worker thread, logged in as the benchmark admin"""
+    def __init__(self, base_url: str, token: str = None):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.session.get(f"{self.base_url}{path}", timeout=60, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.session.post(f"{self.base_url}{path}", timeout=60, **kwargs)
+
+def login(base_url: str) -> str:
+    response = requests.post(f"{base_url.rstrip('/')}/auth/login",
+                             json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}, timeout=30)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+# Each scenario issues one logical user action and returns True on success
+
+def scenario_login_storm(client: Client, iteration: int) -> bool:
+    response = client.post("/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    return response.status_code == 200
+
+def scenario_dashboard(client: Client, iteration: int) -> bool:
+    stats = client.get("/admin/dashboard-stats")
+    spas = client.get("/admin/spas")
+    return stats.status_code == 200 and spas.status_code == 200
+
+def scenario_folder_browsing(client: Client, iteration: int) -> bool:
+    folder_id = None if iteration % 5 == 0 else f"fohome{iteration % 10:06d}"
+    response = client.get("/admin/sharefile/files", params={"folder_id": folder_id} if folder_id else None)
+    return response.status_code == 200 and response.json().get("status") == "success"
+
+def scenario_large_download(client: Client, iteration: int) -> bool:
+    with client.get(f"/admin/sharefile/file/fibench{iteration % 100:06d}/proxy-download", stream=True) as response:
+        if response.status_code != 200:
+            return False
+        for _ in response.iter_content(chunk_size=65536):
+            pass
+    return True
+
+SCENARIOS: Dict[str, Callable[[Client, int], bool]] = {
+    "login_storm": scenario_login_storm,
+    "dashboard": scenario_dashboard,
+    "folder_browsing": scenario_folder_browsing,
+    "large_download": scenario_large_download,
+}
+
+def run_scenario(name: str, base_url: str, token: str, concurrency: int, duration: float,
+                 max_requests: int = None) -> Dict[str, float]:
+    action = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        nonlocal errors, counter
+        client = Client(base_url, token)
+        while time.monotonic() < deadline:
+            with lock:
+                if max_requests is not None and counter >= max_requests:
+                    return
+                iteration = counter
+                counter += 1
+            start = time.perf_counter()
+            try:
+                ok = action(client, iteration)
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+    wall = time.perf_counter() - started
+    # Anything but a failed request is a bug in the scenario or client; don't report numbers without it
+    for future in futures:
+        future.result()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "concurrency": concurrency,
+        "duration_s": round(wall, 2),
+    }
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Return a message per scenario whose p95 or throughput regressed beyond tolerance"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {previous['rps']} -> {current['rps']}")
+    return regressions
+
+def print_table(results: Dict[str, dict], baseline: Dict[str, dict] = None):
+    print(f"{'scenario':<18}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in results.items():
+        print(f"{name:<18}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+        if baseline and name in baseline:
+            base = baseline[name]
+            print(f"{'  baseline':<18}{base['requests']:>10}{base['errors']:>8}{base['rps']:>10}"
+                  f"{base['p50_ms']:>10}{base['p95_ms']:>10}{base['p99_ms']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="DocuSpa load-test scenarios")
+    parser.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--scenario", default="all", choices=["all"] + list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per scenario")
+    parser.add_argument("--requests", type=int, default=None, help="Stop a scenario after this many actions")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare against a stored baseline JSON file")
+    parser.add_argument("--save-baseline", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression, as a fraction")
+    args = parser.parse_args()
+
+    token = login(args.base_url)
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {}
+    for name in names:
+        print(f"Running {name} ({args.concurrency} workers, {args.duration}s)...")
+        results[name] = run_scenario(name, args.base_url, token, args.concurrency, args.duration, args.requests)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)["scenarios"]
+
+    print()
+    print_table(results, baseline)
+
+    document = {
+        "recorded_at": datetime.utcnow().isoformat(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "scenarios": results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as handle:
+            json.dump(document, handle, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions beyond tolerance:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print("\nNo regressions beyond tolerance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Seed a benchmark dataset into DATABASE_URL (SQLite or MySQL).
+
+Creates an admin account, organization-wide ShareFile credentials for the
+stand-in server, and N spas with documents spread across every status.
+
+    DATABASE_URL=sqlite:///bench.db python benchmarks/seed.py --spas 10000 --documents 3
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, insert
+
+from app.database import SessionLocal, Base, get_engine
+from app.models.user import User, UserRole
+from app.models.spa import Spa, SpaStatus, OnboardingInfo
+from app.models.document import Document, DocumentStatus, PaymentMethod
+from app.models.sharefile import ShareFileCredentials
+from app.models.types import new_id
+from app.models.notification import NotificationEvent
+from app.models.snapshot import SpaSnapshot
+from app.models import job, webhook  # noqa: F401 - register tables
+from app.services.auth import get_password_hash
+
+ADMIN_EMAIL = "bench-admin@docuspa.com"
+ADMIN_PASSWORD = "benchmark123!"
+BATCH = 1000
+
+def seed(spas: int, documents: int, reset: bool, seed_value: int = 42):
+    rng = random.Random(seed_value)
+    Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    try:
+        if reset:
+            for model in (SpaSnapshot, NotificationEvent, PaymentMethod, OnboardingInfo, Document,
+                          ShareFileCredentials, User, Spa):
+                db.execute(delete(model))
+            db.commit()
+
+        admin = db.query(User).filter(User.email == ADMIN_EMAIL).first()
+        if admin is None:
+            admin = User(email=ADMIN_EMAIL, password_hash=get_password_hash(ADMIN_PASSWORD), role=UserRole.admin)
+            db.add(admin)
+            db.flush()
+
+        db.query(ShareFileCredentials).filter(ShareFileCredentials.organization_wide == True).delete()
+        db.add(ShareFileCredentials(
+            created_by_user_id=admin.id,
+            organization_wide=True,
+            access_token="bench-access",
+            refresh_token="bench-refresh",
+            subdomain="bench",
+            apicp="sharefile.test",
+            appcp="sharefile.test",
+            expires_at=datetime.utcnow() + timedelta(days=365),
+            is_active=True
+        ))
+        db.commit()
+
+        statuses = list(SpaStatus)
+        spa_rows, document_rows = [], []
+        for index in range(spas):
+            spa_id = new_id()
+            status = rng.choice(statuses)
+            spa_rows.append({
+                "id": spa_id,
+                "name": f"Bench Spa {index:06d}",
+                "contact_email": f"spa{index:06d}@bench.docuspa.com",
+                "status": status,
+            })
+            for number in range(documents):
+                signed = status not in (SpaStatus.invited, SpaStatus.info_submitted)
+                document_rows.append({
+                    "id": new_id(),
+                    "spa_id": spa_id,
+                    "sharefile_id": f"fi{index:08d}{number:02d}",
+                    "name": f"Agreement {number + 1}.pdf",
+                    "status": DocumentStatus.signed if signed else DocumentStatus.pending,
+                    "signed_at": datetime.utcnow() if signed else None,
+                })
+            if len(spa_rows) >= BATCH:
+                _flush(db, spa_rows, document_rows)
+        _flush(db, spa_rows, document_rows)
+
+        print(f"Seeded {spas} spas and {spas * documents} documents")
+        print(f"Admin login: {ADMIN_EMAIL} / {ADMIN_PASSWORD}")
+    finally:
+        db.close()
+
+def _flush(db, spa_rows, document_rows):
+    if spa_rows:
+        db.execute(insert(Spa), spa_rows)
+    if document_rows:
+        db.execute(insert(Document), document_rows)
+    db.commit()
+    spa_rows.clear()
+    document_rows.clear()
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a DocuSpa benchmark dataset")
+    parser.add_argument("--spas", type=int, default=1000)
+    parser.add_argument("--documents", type=int, default=3, help="Documents per spa")
+    parser.add_argument("--reset", action="store_true", help="Delete existing spas and users first")
+    args = parser.parse_args()
+    seed(args.spas, args.documents, args.reset)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Fingerprinted asset builds (build_assets.py) across successive deploys.
+
+    pytest benchmarks/test_build_assets.py
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_assets import build
+from app.services.assets import DIST_DIR, MANIFEST_PATH
+
+def _release(root, script: str) -> dict:
+    source = root / "assets" / "js" / "app.js"
+    source.parent.mkdir(parents=True, exist_ok=True)
+    source.write_text(script)
+    return build(str(root))
+
+def test_previous_build_survives_one_deploy(tmp_path):
+    first = _release(tmp_path, "console.log(1);")
+    second = _release(tmp_path, "console.log(2);")
+    dist = tmp_path / DIST_DIR
+    # Old workers still link the first build during the rolling reload
+    assert (dist / first["js/app.js"]).exists()
+    assert (dist / (first["js/app.js"] + ".gz")).exists()
+    assert (dist / second["js/app.js"]).exists()
+    assert json.loads((tmp_path / MANIFEST_PATH).read_text()) == second
+
+    third = _release(tmp_path, "console.log(3);")
+    assert not (dist / first["js/app.js"]).exists()
+    assert not (dist / (first["js/app.js"] + ".gz")).exists()
+    assert (dist / second["js/app.js"]).exists()
+    assert (dist / third["js/app.js"]).exists()
+    assert not (dist / "manifest.json.tmp").exists()
+
+def test_rebuilding_the_same_release_keeps_the_build_before_it(tmp_path):
+    # A deploy retried on the same release: the workers may still be on the first build
+    first = _release(tmp_path, "console.log(1);")
+    second = _release(tmp_path, "console.log(2);")
+    assert _release(tmp_path, "console.log(2);") == second
+    assert (tmp_path / DIST_DIR / first["js/app.js"]).exists()
+    assert (tmp_path / DIST_DIR / second["js/app.js"]).exists()
@@ -0,0 +1,102 @@
+"""
+Connection pool admission control and liveness checks (app/services/db_pool.py).
+
+    pytest benchmarks/test_db_pool.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.db_pool import AdmissionQueuePool, PoolSaturatedError, add_liveness_check, pool_settings
+from app.services.metrics import db_pool_liveness_checks_total
+
+def _liveness_checks() -> dict:
+    return {outcome: db_pool_liveness_checks_total._values.get(("primary", outcome), 0) for outcome in ("alive", "dead")}
+
+@pytest.fixture
+def engine(tmp_path):
+    # One connection, no overflow: the second concurrent checkout has to wait
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=AdmissionQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.5)
+    yield engine
+    engine.dispose()
+
+def test_pool_settings_split_budget_across_workers(monkeypatch):
+    monkeypatch.setenv("DB_MAX_CONNECTIONS", "40")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    settings = pool_settings()
+    assert settings["pool_size"] + settings["max_overflow"] == 10
+    assert settings["pool_size"] == 5
+
+def test_event_loop_checkout_is_shed_quickly(engine):
+    engine.pool.loop_wait = 0.05
+    held = engine.connect()
+
+    async def request():
+        start = time.perf_counter()
+        with pytest.raises(PoolSaturatedError):
+            engine.connect()
+        return time.perf_counter() - start
+
+    try:
+        # Waiting any longer would stall every other request on the loop
+        assert asyncio.run(request()) < 0.3
+    finally:
+        held.close()
+
+def test_thread_checkout_waits_for_a_returned_connection(engine):
+    held = engine.connect()
+    threading.Timer(0.1, held.close).start()
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+
+def test_waiters_beyond_limit_are_shed(engine):
+    engine.pool.max_waiters = 1
+    held = engine.connect()
+    waiter_errors = []
+
+    def wait():
+        try:
+            engine.connect().close()
+        except PoolSaturatedError as e:
+            waiter_errors.append(e)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    time.sleep(0.05)
+    try:
+        start = time.perf_counter()
+        with pytest.raises(PoolSaturatedError):
+            engine.connect()
+        # Refused at once rather than after pool_timeout
+        assert time.perf_counter() - start < 0.1
+    finally:
+        held.close()
+        waiter.join()
+    assert waiter_errors == []
+
+def test_idle_connections_are_pinged_and_replaced_when_dead(engine):
+    add_liveness_check(engine, idle_seconds=0.05)
+    before = _liveness_checks()
+
+    with engine.connect() as connection:
+        dbapi_connection = connection.connection.dbapi_connection
+    # Reused right away: no round trip
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert _liveness_checks() == before
+
+    # The server dropped the connection while it sat idle
+    dbapi_connection.close()
+    time.sleep(0.1)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+        assert connection.connection.dbapi_connection is not dbapi_connection
+    assert _liveness_checks()["dead"] == before["dead"] + 1
@@ -0,0 +1,110 @@
+"""
+CPU cost of encoding large admin payloads: FastAPI's default path (Pydantic
+models + jsonable_encoder + stdlib json) versus FastJSONResponse on plain dicts.
+
+    pytest benchmarks/test_fast_json.py -s                  # prints CPU ms per response
+    pytest benchmarks/test_fast_json.py --benchmark-autosave
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.fast_json import FastJSONResponse, dumps
+from app.services.sharefile_items import normalize_items
+from test_sharefile_items import make_items, HAS_BENCHMARK
+
+ROWS = 10_000
+MIN_SPEEDUP = 2.0
+
+def make_spa_rows(count: int) -> list:
+    epoch = datetime(2024, 1, 1)
+    statuses = ["invited", "info_submitted", "documents_signed", "payment_setup", "completed"]
+    return [
+        {
+            "id": str(uuid.UUID(int=index)),
+            "name": f"Bench Spa {index:06d}",
+            "contact_email": f"spa{index:06d}@bench.docuspa.com",
+            "status": statuses[index % len(statuses)],
+            "created_at": (epoch + timedelta(minutes=index)).isoformat(),
+        }
+        for index in range(count)
+    ]
+
+class SpaResponse(BaseModel):
+    """Same fields as app.routes.admin.SpaResponse (importing the router needs a database)"""
+    id: str
+    name: str
+    contact_email: str
+    status: str
+    created_at: str
+
+def default_spa_list(rows: list) -> bytes:
+    """What GET /admin/spas did before: one SpaResponse per row, then jsonable_encoder and json"""
+    models = [SpaResponse(**row) for row in rows]
+    return JSONResponse(jsonable_encoder(models)).body
+
+def fast_spa_list(rows: list) -> bytes:
+    return FastJSONResponse(rows).body
+
+def default_listing(payload: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+def fast_listing(payload: dict) -> bytes:
+    return FastJSONResponse(payload).body
+
+def _cpu_per_call(func, argument, rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.process_time()
+        func(argument)
+        best = min(best, time.process_time() - start)
+    return best
+
+@pytest.fixture(scope="module")
+def spa_rows():
+    return make_spa_rows(ROWS)
+
+@pytest.fixture(scope="module")
+def listing():
+    files, folders = normalize_items(make_items(ROWS))
+    return {"status": "success", "files": files, "folders": folders, "total_items": ROWS}
+
+def test_output_is_equivalent(spa_rows, listing):
+    import json
+    assert json.loads(fast_spa_list(spa_rows)) == json.loads(default_spa_list(spa_rows))
+    assert json.loads(fast_listing(listing)) == json.loads(default_listing(listing))
+
+def test_dumps_handles_internal_types():
+    assert dumps({"when": datetime(2024, 1, 2, 3, 4, 5), 1: "x"}) == b'{"when":"2024-01-02T03:04:05","1":"x"}'
+
+@pytest.mark.parametrize("name, default, fast, data", [
+    ("spa list", default_spa_list, fast_spa_list, "spa_rows"),
+    ("folder listing", default_listing, fast_listing, "listing"),
+])
+def test_cpu_saved_per_response(request, name, default, fast, data):
+    """Regression gate and report: CPU per 10k-row response on both paths"""
+    payload = request.getfixturevalue(data)
+    default_cpu = _cpu_per_call(default, payload)
+    fast_cpu = _cpu_per_call(fast, payload)
+    print(f"\n{name} ({ROWS} rows): default {default_cpu * 1000:.1f} ms CPU, "
+          f"fast {fast_cpu * 1000:.1f} ms CPU, saved {(default_cpu - fast_cpu) * 1000:.1f} ms")
+    assert default_cpu / fast_cpu >= MIN_SPEEDUP
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark not installed")
+@pytest.mark.parametrize("path", ["default", "fast"])
+def test_benchmark_spa_list(benchmark, spa_rows, path):
+    benchmark(default_spa_list if path == "default" else fast_spa_list, spa_rows)
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark not installed")
+@pytest.mark.parametrize("path", ["default", "fast"])
+def test_benchmark_folder_listing(benchmark, listing, path):
+    benchmark(default_listing if path == "default" else fast_listing, listing)
@@ -0,0 +1,72 @@
+"""
+Per-route HTTP metrics (app/services/metrics.py MetricsMiddleware).
+
+    pytest benchmarks/test_http_metrics.py
+"""
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.metrics import REGISTRY, MetricsMiddleware
+
+def _sample(name: str, labels: str) -> float:
+    prefix = f"{name}{{{labels}}} "
+    line = next((line for line in REGISTRY.render().splitlines() if line.startswith(prefix)), None)
+    return float(line[len(prefix):]) if line else 0.0
+
+def _requests(route: str, status: str, method: str = "GET") -> float:
+    return _sample("docuspa_http_requests_total", f'method="{method}",route="{route}",status="{status}"')
+
+def _in_flight(method: str) -> float:
+    return _sample("docuspa_http_requests_in_flight", f'method="{method}"')
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    seen = {}
+
+    @app.get("/metrics-test/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    @app.patch("/metrics-test/busy")
+    async def busy():
+        seen["in_flight"] = _in_flight("PATCH")
+        return {}
+
+    @app.delete("/metrics-test/boom")
+    async def boom():
+        raise RuntimeError("handler failed")
+
+    app.state.seen = seen
+    return app
+
+def test_requests_are_labelled_by_route_template():
+    client = TestClient(_app())
+    before = _requests("/metrics-test/items/{item_id}", "200")
+    for item_id in ("fi1", "fi2", "fi3"):
+        assert client.get(f"/metrics-test/items/{item_id}").status_code == 200
+    assert _requests("/metrics-test/items/{item_id}", "200") == before + 3
+    # Raw paths never become label values
+    assert "/metrics-test/items/fi1" not in REGISTRY.render()
+
+    before = _requests("unmatched", "404")
+    assert client.get("/metrics-test/nowhere/fi1").status_code == 404
+    assert _requests("unmatched", "404") == before + 1
+    assert "/metrics-test/nowhere" not in REGISTRY.render()
+
+def test_in_flight_returns_to_zero_after_an_exception():
+    app = _app()
+    client = TestClient(app, raise_server_exceptions=False)
+    client.patch("/metrics-test/busy")
+    assert app.state.seen["in_flight"] == 1
+    assert _in_flight("PATCH") == 0
+
+    before = _requests("/metrics-test/boom", "500", method="DELETE")
+    assert client.delete("/metrics-test/boom").status_code == 500
+    assert _in_flight("DELETE") == 0
+    assert _requests("/metrics-test/boom", "500", method="DELETE") == before + 1
@@ -0,0 +1,157 @@
+"""
+Claiming, lease expiry and dead-lettering in the jobs-table queue
+(app/services/job_queue.py).
+
+    pytest benchmarks/test_job_queue.py
+    JOB_QUEUE_TEST_URL=mysql+pymysql://... pytest benchmarks/test_job_queue.py
+
+SQLite takes no row locks, so workers claiming at the same time (SKIP LOCKED)
+are only exercised against the scratch MySQL database in JOB_QUEUE_TEST_URL,
+whose jobs table is emptied.
+"""
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base
+from app.models.job import Job, JobStatus
+from app.models import user, spa, document, sharefile, job, notification, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+from app.services import job_queue as job_queue_module
+from app.services.job_queue import JobQueue
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    url = os.getenv("JOB_QUEUE_TEST_URL") or f"sqlite:///{tmp_path / 'jobs.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Job.__table__])
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.query(Job).delete()
+        db.commit()
+    monkeypatch.setattr(job_queue_module, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+def _worker(name: str, handler=None, concurrency: int = 4) -> JobQueue:
+    queue = JobQueue()
+    queue.worker_id = name
+    queue.max_workers = concurrency
+    queue.base_backoff = 0  # Retries are due immediately
+    queue.register("test.job", concurrency=concurrency)(handler or (lambda db, payload: payload))
+    return queue
+
+def _enqueue(sessions, count: int, **options) -> list:
+    with sessions() as db:
+        jobs = [_worker("producer").enqueue(db, "test.job", {"index": index}, commit=False, **options)
+                for index in range(count)]
+        db.commit()
+        return [job.id for job in jobs]
+
+def _job(sessions, job_id) -> Job:
+    with sessions() as db:
+        return db.get(Job, job_id)
+
+def test_claimed_jobs_are_not_claimed_again(sessions):
+    job_ids = _enqueue(sessions, 6)
+    first, second = _worker("first"), _worker("second")
+
+    claimed_first = {job_id for job_id, _, _ in first.claim_jobs()}
+    claimed_second = {job_id for job_id, _, _ in second.claim_jobs()}
+    assert len(claimed_first) == 4
+    assert claimed_second == set(job_ids) - claimed_first
+    # Both workers are full and nothing is left queued
+    assert first.claim_jobs() == [] and _worker("third").claim_jobs() == []
+    assert {_job(sessions, job_id).locked_by for job_id in claimed_first} == {"first"}
+
+@pytest.mark.skipif(not os.getenv("JOB_QUEUE_TEST_URL"), reason="needs row locks (JOB_QUEUE_TEST_URL)")
+def test_concurrent_workers_claim_each_job_once(sessions):
+    job_ids = _enqueue(sessions, 200)
+    workers = [_worker(f"worker-{index}", concurrency=200) for index in range(8)]
+    claims, start = [], threading.Barrier(len(workers))
+
+    def claim(queue):
+        start.wait()
+        while True:
+            batch = queue.claim_jobs()
+            if not batch:
+                return
+            claims.extend(job_id for job_id, _, _ in batch)
+
+    threads = [threading.Thread(target=claim, args=(queue,)) for queue in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claims) == sorted(job_ids)
+
+def test_expired_lease_is_requeued(sessions):
+    [job_id] = _enqueue(sessions, 1)
+    crashed = _worker("crashed")
+    assert crashed.claim_jobs()
+
+    # Lease still held: nothing to requeue
+    survivor = _worker("survivor")
+    survivor.requeue_stale_jobs()
+    assert _job(sessions, job_id).status == JobStatus.running
+
+    with sessions() as db:
+        db.get(Job, job_id).locked_at = datetime.utcnow() - survivor.lease_timeout - timedelta(seconds=1)
+        db.commit()
+    survivor.requeue_stale_jobs()
+    requeued = _job(sessions, job_id)
+    assert requeued.status == JobStatus.queued
+    assert requeued.locked_by is None
+    assert requeued.last_error == "Lease expired while running"
+
+    [(claimed_id, _, payload)] = survivor.claim_jobs()
+    assert claimed_id == job_id and payload == {"index": 0}
+    assert _job(sessions, job_id).attempts == 2
+
+def test_renewed_lease_is_not_requeued(sessions):
+    [job_id] = _enqueue(sessions, 1)
+    busy = _worker("busy")
+    assert busy.claim_jobs()
+    with sessions() as db:
+        db.get(Job, job_id).locked_at = datetime.utcnow() - busy.lease_timeout - timedelta(seconds=1)
+        db.commit()
+
+    busy.renew_leases()
+    _worker("other").requeue_stale_jobs()
+    assert _job(sessions, job_id).status == JobStatus.running
+
+def test_failing_job_is_dead_lettered_after_max_attempts(sessions):
+    def fail(db, payload):
+        raise RuntimeError("ShareFile said no")
+
+    [job_id] = _enqueue(sessions, 1, max_attempts=3)
+    queue = _worker("worker", handler=fail)
+    for attempt in range(1, 4):
+        [(claimed_id, job_type, payload)] = queue.claim_jobs()
+        queue.run_job(claimed_id, job_type, payload)
+        failed = _job(sessions, job_id)
+        assert failed.attempts == attempt
+        assert failed.status == (JobStatus.dead if attempt == 3 else JobStatus.queued)
+        assert failed.last_error.startswith("RuntimeError: ShareFile said no")
+    assert queue.claim_jobs() == []
+    assert queue._active == {"test.job": 0}
+
+    with sessions() as db:
+        assert queue.retry_dead_job(db, job_id)
+    assert _job(sessions, job_id).status == JobStatus.queued
+
+def test_succeeded_job_records_result(sessions):
+    [job_id] = _enqueue(sessions, 1)
+    queue = _worker("worker")
+    [(claimed_id, job_type, payload)] = queue.claim_jobs()
+    queue.run_job(claimed_id, job_type, payload)
+    done = _job(sessions, job_id)
+    assert done.status == JobStatus.succeeded
+    assert done.result == {"index": 0}
+    assert done.locked_by is None
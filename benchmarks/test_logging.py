@@ -0,0 +1,101 @@
+"""
+The queued logging pipeline (app/logging_config.py) and request id
+propagation, including into ShareFile calls made off the event loop.
+
+    pytest benchmarks/test_logging.py
+"""
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.logging_config import JSONFormatter, RequestIdMiddleware, configure_logging, request_id_var, shutdown_logging
+from app.routes.admin import _off_loop
+from fake_sharefile import FakeShareFile
+
+logger = logging.getLogger("benchmarks.test_logging")
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """configure_logging() writing JSON to a buffer; call the fixture for the written records"""
+    monkeypatch.setenv("LOG_FORMAT", "json")
+    monkeypatch.setenv("LOG_LEVEL", "INFO")
+    monkeypatch.setenv("LOG_ERROR_RATE_WINDOW", "0.2")
+    output = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", output)
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    configure_logging()
+
+    def records() -> list:
+        shutdown_logging()  # Drains the queue
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    yield records
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+def test_records_are_formatted_on_the_listener_thread(pipeline, monkeypatch):
+    formatted_on = set()
+    format_record = JSONFormatter.format
+
+    def recording_format(self, record):
+        formatted_on.add(threading.current_thread().name)
+        return format_record(self, record)
+
+    monkeypatch.setattr(JSONFormatter, "format", recording_format)
+    token = request_id_var.set("req-pipeline")
+    try:
+        logger.info("Listed %d items", 3, extra={"folder_id": "fo1"})
+    finally:
+        request_id_var.reset(token)
+
+    [record] = [record for record in pipeline() if record["logger"] == logger.name]
+    assert record["msg"] == "Listed 3 items"
+    assert record["request_id"] == "req-pipeline"
+    assert record["folder_id"] == "fo1"
+    assert threading.current_thread().name not in formatted_on
+
+def test_repeated_warnings_are_rate_limited(pipeline):
+    def warn():
+        logger.warning("ShareFile is slow")  # One call site
+
+    for _ in range(15):
+        warn()
+    time.sleep(0.3)
+    warn()
+
+    warnings = [record for record in pipeline() if record["logger"] == logger.name]
+    assert len(warnings) == 11
+    assert warnings[-1]["suppressed"] == 5
+
+def test_request_id_reaches_sharefile_logs(pipeline, serve_fake, sharefile_api):
+    fake = serve_fake(FakeShareFile(latency_ms=0, jitter_ms=0))
+    fake.error_rate = 1.0
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/listing")
+    async def listing():
+        logger.info("Listing folder")
+        # The ShareFile call runs on the route executor, like the admin routes' calls
+        return {"items": await _off_loop(sharefile_api(max_retries=0).get_items, "fo12345678")}
+
+    response = TestClient(app).get("/listing", headers={"X-Request-ID": "req-sharefile"})
+    assert response.headers["x-request-id"] == "req-sharefile"
+
+    records = pipeline()
+    assert [record["request_id"] for record in records if record["logger"] == logger.name] == ["req-sharefile"]
+    failures = [record for record in records if record["logger"] == "app.services.sharefile"]
+    assert failures and all(record["request_id"] == "req-sharefile" for record in failures)
@@ -0,0 +1,115 @@
+"""
+Coalesced onboarding emails (app/services/notifications.py): merging by
+recipient and spa, duplicate events, and flushes where some sends fail.
+
+    pytest benchmarks/test_notifications.py
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.database import Base
+from app.models.job import Job, JobStatus
+from app.models.notification import NotificationEvent
+from app.models.spa import Spa
+from app.models import user, document, sharefile, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+from app.services.notifications import NotificationService
+
+class RecordingSender:
+    """Stands in for EmailSender; fails the messages addressed to `failing`"""
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def send_batch(self, messages):
+        results = [message["To"] not in self.failing for message in messages]
+        self.sent.extend(message for message, ok in zip(messages, results) if ok)
+        return results
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)  # Email templates are loaded relative to the app root
+    engine = create_engine(f"sqlite:///{tmp_path / 'notifications.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+@pytest.fixture
+def service():
+    service = NotificationService()
+    service.sender = RecordingSender()
+    return service
+
+def _spa(db, name: str) -> Spa:
+    spa = Spa(name=name, contact_email=f"{name.lower()}@example.com")
+    db.add(spa)
+    db.commit()
+    return spa
+
+def _pending(db) -> int:
+    return db.query(NotificationEvent).filter(NotificationEvent.sent_at.is_(None)).count()
+
+def test_events_coalesce_per_recipient_and_spa(db, service):
+    serenity, lotus = _spa(db, "Serenity"), _spa(db, "Lotus")
+    service.queue(db, "invite_sent", serenity)
+    service.queue(db, "documents_ready", serenity, {"document_names": ["Agreement"]})
+    service.queue(db, "invite_sent", lotus)
+    # One flush job for the whole window
+    assert db.query(Job).filter(Job.job_type == "email.flush").count() == 1
+
+    result = service.flush(db)
+    assert result == {"events": 3, "messages": 2, "failed": 0}
+    by_recipient = {message["To"]: message for message in service.sender.sent}
+    assert set(by_recipient) == {"serenity@example.com", "lotus@example.com"}
+    assert by_recipient["serenity@example.com"]["Subject"] == "SpaDoc updates for Serenity"
+    assert "Agreement" in by_recipient["serenity@example.com"].get_content()
+    assert by_recipient["lotus@example.com"]["Subject"] == "Welcome to SpaDoc — Begin Your Setup"
+    assert _pending(db) == 0
+
+def test_identical_events_are_sent_once(db, service):
+    spa = _spa(db, "Serenity")
+    for _ in range(3):
+        service.queue(db, "reminder", spa)
+
+    assert service.flush(db)["messages"] == 1
+    [message] = service.sender.sent
+    assert message["Subject"] == "Reminder: finish your SpaDoc onboarding"
+    assert message.get_content().count("This is a reminder") == 1
+    assert _pending(db) == 0
+
+def test_partial_failure_commits_sent_and_retries_the_rest(db, service):
+    serenity, lotus = _spa(db, "Serenity"), _spa(db, "Lotus")
+    service.queue(db, "invite_sent", serenity)
+    service.queue(db, "invite_sent", lotus)
+    db.query(Job).delete()
+    db.commit()
+    service.sender = RecordingSender(failing={"lotus@example.com"})
+
+    result = service.flush(db)
+    assert result == {"events": 2, "messages": 1, "failed": 1}
+    unsent = db.query(NotificationEvent).filter(NotificationEvent.sent_at.is_(None)).all()
+    assert [event.recipient for event in unsent] == ["lotus@example.com"]
+    # A later flush picks up what failed
+    retry = db.query(Job).filter(Job.job_type == "email.flush", Job.status == JobStatus.queued).one()
+    assert retry.run_at > datetime.utcnow()
+
+    service.sender = RecordingSender()
+    assert service.flush(db) == {"events": 1, "messages": 1, "failed": 0}
+    assert _pending(db) == 0
+
+def test_total_failure_raises_for_job_retry(db, service):
+    spa = _spa(db, "Serenity")
+    service.queue(db, "invite_sent", spa)
+    service.sender = RecordingSender(failing={"serenity@example.com"})
+
+    with pytest.raises(RuntimeError):
+        service.flush(db)
+    db.rollback()
+    assert _pending(db) == 1
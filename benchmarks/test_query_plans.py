@@ -0,0 +1,183 @@
+"""
+Query-plan regression test: every hot query must be answered from an index.
+
+Each query below is run through the ORM exactly as the app issues it, the
+emitted SQL is captured and EXPLAINed, and the test fails if the plan reads
+a whole table (SQLite "SCAN <table>", MySQL type=ALL).
+
+    pytest benchmarks/test_query_plans.py                  # migrated + seeded scratch SQLite database
+    QUERY_PLAN_URL=mysql+pymysql://... pytest benchmarks/test_query_plans.py -s
+
+QUERY_PLAN_URL must point at a database already migrated with
+`alembic upgrade head` and seeded with benchmarks/seed.py.
+"""
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base
+from app.models.user import User, UserRole
+from app.models.spa import Spa, SpaStatus
+from app.models.document import Document, DocumentStatus, PaymentMethod
+from app.models.sharefile import ShareFileCredentials, ShareFileItem
+from app.models.types import new_id
+from app.services.change_tracking import get_version
+from app.models import job, notification, webhook, snapshot, change_counter  # noqa: F401 - register tables
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPAS = 2000
+# Rotated-out credentials, so the credential lookups have rows to skip
+INACTIVE_CREDENTIALS = 200
+INDEXED_FOLDERS = 100
+
+def _refresh_cutoff():
+    return datetime.utcnow() - timedelta(hours=4)
+
+# name -> (db, sample spa id) -> runs the query the way the app does
+HOT_QUERIES = {
+    # app/routes/admin.py dashboard stats
+    "spas change counter": lambda db, spa_id: get_version(db, "spas"),
+    "dashboard status count": lambda db, spa_id: db.query(Spa).filter(Spa.status == SpaStatus.invited).count(),
+    # app/services/spa_snapshot.py build_snapshot
+    "spa documents": lambda db, spa_id: db.query(Document).filter(Document.spa_id == spa_id).order_by(Document.name).all(),
+    "spa payment method": lambda db, spa_id: db.query(PaymentMethod).filter(PaymentMethod.spa_id == spa_id).first(),
+    "spa onboarding info": lambda db, spa_id: db.get(Spa, spa_id).onboarding_info,
+    # app/services/onboarding.py signing progress
+    "unsigned document count": lambda db, spa_id: db.query(Document).filter(
+        Document.spa_id == spa_id,
+        Document.status != DocumentStatus.signed
+    ).count(),
+    # app/services/background_jobs.py poll_signing_status
+    "signing status poll": lambda db, spa_id: db.query(Document.id).filter(
+        Document.status == DocumentStatus.pending,
+        Document.signing_url.isnot(None),
+        (Document.status_checked_at.is_(None)) | (Document.status_checked_at < _refresh_cutoff())
+    ).order_by(Document.status_checked_at).limit(500).all(),
+    # app/services/sharefile.py get_organization_api and the admin ShareFile routes
+    "organization credentials": lambda db, spa_id: db.query(ShareFileCredentials).filter(
+        ShareFileCredentials.organization_wide == True,
+        ShareFileCredentials.is_active == True
+    ).first(),
+    # app/services/token_refresh.py refresh_expiring_tokens
+    "token refresh scan": lambda db, spa_id: db.query(ShareFileCredentials).filter(
+        ShareFileCredentials.is_active == True,
+        ShareFileCredentials.auto_refresh == True,
+        ShareFileCredentials.organization_wide == True,
+        ShareFileCredentials.refresh_token.isnot(None)
+    ).filter(
+        (ShareFileCredentials.last_refreshed < _refresh_cutoff()) |
+        (ShareFileCredentials.last_refreshed.is_(None))
+    ).all(),
+    # app/services/notifications.py admin recipients
+    "admin recipients": lambda db, spa_id: db.query(User.email).filter(User.role == UserRole.admin).all(),
+    # app/routes/auth.py login
+    "user by email": lambda db, spa_id: db.query(User).filter(User.email == "bench-admin@docuspa.com").first(),
+    # app/services/sharefile_index.py browsing from the index and the sync's work queue
+    "indexed folder children": lambda db, spa_id: db.query(ShareFileItem).filter(
+        ShareFileItem.parent_id == "fo00000001").order_by(ShareFileItem.name).all(),
+    "index root folder": lambda db, spa_id: db.query(ShareFileItem).filter(ShareFileItem.parent_id.is_(None)).first(),
+    "index folders to list": lambda db, spa_id: db.query(ShareFileItem).filter(
+        ShareFileItem.needs_listing == True).order_by(ShareFileItem.depth).limit(50).all(),
+}
+
+def _migrate_and_seed(url: str):
+    env = {**os.environ, "DATABASE_URL": url}
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True, capture_output=True)
+    subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "seed.py"), "--spas", str(SPAS)],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+    engine = create_engine(url)
+    with Session(engine) as db:
+        admin_id = db.query(User.id).filter(User.role == UserRole.admin).scalar()
+        db.execute(insert(User), [
+            {"id": new_id(), "role": UserRole.spa_user, "email": f"portal{index:06d}@bench.docuspa.com",
+             "password_hash": "x", "spa_id": spa_id}
+            for index, (spa_id,) in enumerate(db.query(Spa.id).all())
+        ])
+        db.execute(insert(ShareFileCredentials), [
+            {"id": new_id(), "created_by_user_id": admin_id, "organization_wide": True, "is_active": False,
+             "access_token": "revoked", "subdomain": "bench", "apicp": "sharefile.test", "appcp": "sharefile.test"}
+            for _ in range(INACTIVE_CREDENTIALS)
+        ])
+        # A mirrored ShareFile tree: home, 100 folders of 50 files each
+        now = datetime.utcnow()
+        db.execute(insert(ShareFileItem), [
+            {"id": "home", "parent_id": None, "name": "Home", "item_type": "folder", "depth": 0,
+             "needs_listing": False, "synced_at": now}
+        ] + [
+            {"id": f"fo{folder:08d}", "parent_id": "home", "name": f"Folder {folder}", "item_type": "folder",
+             "depth": 1, "needs_listing": folder % 10 == 0, "synced_at": now}
+            for folder in range(INDEXED_FOLDERS)
+        ] + [
+            {"id": f"fi{folder:08d}{index:04d}", "parent_id": f"fo{folder:08d}", "name": f"Document {index}.pdf",
+             "item_type": "file", "depth": 2, "needs_listing": False, "synced_at": now}
+            for folder in range(INDEXED_FOLDERS) for index in range(50)
+        ])
+        db.commit()
+    # Planner statistics, as production has them
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return engine
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    url = os.getenv("QUERY_PLAN_URL")
+    if url:
+        return create_engine(url)
+    return _migrate_and_seed(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+
+@pytest.fixture(scope="module")
+def sample_spa_id(engine):
+    with Session(engine) as db:
+        spa_id = db.query(Document.spa_id).first()
+    if spa_id is None:
+        pytest.skip("Database has no documents; seed it with benchmarks/seed.py")
+    return spa_id[0]
+
+def capture_statements(engine, run) -> list:
+    """SQL and parameters the ORM sends while `run` executes"""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+def full_scans(connection, statement: str, parameters) -> list:
+    """Tables the plan reads in full; an empty list means every table is reached through an index"""
+    tables = set(Base.metadata.tables)
+    if connection.dialect.name == "sqlite":
+        plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        scans = []
+        for row in plan:
+            match = re.match(r"SCAN (?:TABLE )?(\w+)", row.detail)
+            if match and match.group(1) in tables and "USING" not in row.detail:
+                scans.append(row.detail)
+        return scans
+    plan = connection.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+    return [f"{row['table']} type=ALL rows={row['rows']}" for row in plan if row["type"] == "ALL" and row["table"] in tables]
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(engine, sample_spa_id, name):
+    with Session(engine) as db:
+        statements = capture_statements(engine, lambda: HOT_QUERIES[name](db, sample_spa_id))
+        # Lazy loads run the main query first; every statement has to use an index
+        statements = [(sql, parameters) for sql, parameters in statements if sql.lstrip().upper().startswith("SELECT")]
+        assert statements, f"{name} issued no query"
+        connection = db.connection()
+        for sql, parameters in statements:
+            scans = full_scans(connection, sql, parameters)
+            assert not scans, f"{name} reads a whole table ({'; '.join(scans)}):\n{sql}"
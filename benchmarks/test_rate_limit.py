@@ -0,0 +1,96 @@
+"""
+ShareFile API quota limiter (app/services/rate_limit.py).
+
+    pytest benchmarks/test_rate_limit.py
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import sharefile
+from app.services.rate_limit import BACKGROUND, INTERACTIVE, RateLimitExceeded, SharedTokenBucket
+from app.services.resilience import CircuitBreakerRegistry
+from fake_sharefile import FakeShareFile
+
+def _take_for(state_file: str, seconds: float, taken):
+    bucket = SharedTokenBucket(rate=20, burst=5, state_file=state_file)
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        if bucket.try_take(INTERACTIVE) == 0.0:
+            with taken.get_lock():
+                taken.value += 1
+        else:
+            time.sleep(0.001)
+
+def test_background_leaves_reserve_for_interactive():
+    bucket = SharedTokenBucket(rate=1, burst=10, reserve=0.5, max_wait={INTERACTIVE: 0, BACKGROUND: 0})
+    background = 0
+    with pytest.raises(RateLimitExceeded):
+        while True:
+            bucket.acquire(BACKGROUND)
+            background += 1
+    assert background == 5
+    # Admins still get the reserved half without waiting
+    for _ in range(5):
+        bucket.acquire(INTERACTIVE)
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(INTERACTIVE)
+
+def test_waits_for_refill_within_limit():
+    bucket = SharedTokenBucket(rate=50, burst=1, max_wait={INTERACTIVE: 0.5})
+    bucket.acquire(INTERACTIVE)
+    start = time.perf_counter()
+    bucket.acquire(INTERACTIVE)
+    assert 0.01 < time.perf_counter() - start < 0.1
+
+def test_bucket_is_shared_across_processes(tmp_path):
+    if sys.platform == "win32":
+        pytest.skip("shared quota needs fcntl")
+    state_file = str(tmp_path / "quota")
+    context = multiprocessing.get_context("fork")
+    taken = context.Value("i", 0)
+    workers = [context.Process(target=_take_for, args=(state_file, 1.0, taken)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # One budget for all four: the burst plus a second of refill, not four times that
+    assert 20 <= taken.value <= 5 + 20 + 3
+
+def test_bulk_jobs_do_not_throttle_browsing(monkeypatch, serve_fake, sharefile_api):
+    serve_fake(FakeShareFile(folder_size=5, latency_ms=0, jitter_ms=0))
+    monkeypatch.setattr(sharefile, "circuit_breakers", CircuitBreakerRegistry(failure_threshold=5, reset_timeout=1))
+    monkeypatch.setattr(sharefile, "rate_limiter", SharedTokenBucket(
+        rate=20, burst=10, reserve=0.5, max_wait={INTERACTIVE: 0.5, BACKGROUND: 30}))
+
+    stop = threading.Event()
+
+    def bulk():
+        api = sharefile_api(priority=BACKGROUND)
+        while not stop.is_set():
+            api.get_document_status("fi12345678")
+
+    jobs = [threading.Thread(target=bulk) for _ in range(4)]
+    for job in jobs:
+        job.start()
+    try:
+        time.sleep(0.5)
+        latencies = []
+        for _ in range(5):
+            start = time.perf_counter()
+            assert sharefile_api(priority=INTERACTIVE).get_items("fo12345678")["value"]
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.1)
+    finally:
+        stop.set()
+        for job in jobs:
+            job.join()
+    # The jobs keep the bucket at the reserve; browsing draws on it without queueing behind them
+    assert max(latencies) < 0.1
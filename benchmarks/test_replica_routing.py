@@ -0,0 +1,112 @@
+"""
+Read-replica routing (app/services/replication.py) against SQLite stand-ins.
+
+    pytest benchmarks/test_replica_routing.py
+
+The primary and replica are separate SQLite files; "replication" is a file
+copy (as benchmarks/replica_standin.py does), so lag is whatever the test
+makes it.
+"""
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, RoutingSession
+from app.models.spa import Spa, SpaStatus
+from app.models import user, document, sharefile, job, notification, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+from app.services.replication import ReplicaMonitor
+
+def _replicate(primary, replica):
+    with sqlite3.connect(primary.url.database) as source, sqlite3.connect(replica.url.database) as target:
+        source.backup(target)
+
+def _count_queries(engine) -> list:
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+@pytest.fixture
+def cluster(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(primary)
+    monitor = ReplicaMonitor(engines=[replica], primary=primary, max_lag=5, check_interval=1, heartbeat_interval=1)
+    make_session = sessionmaker(class_=RoutingSession, bind=primary)
+    with make_session() as db:
+        db.add(Spa(name="Primary Spa", contact_email="spa@example.com", status=SpaStatus.invited))
+        db.commit()
+    return primary, replica, monitor, make_session
+
+def test_reads_go_to_caught_up_replica(cluster):
+    primary, replica, monitor, make_session = cluster
+    monitor.write_heartbeat()
+    _replicate(primary, replica)
+    monitor.check(monitor.states[replica])
+    assert monitor.states[replica].healthy
+
+    primary_queries, replica_queries = _count_queries(primary), _count_queries(replica)
+    with make_session() as db:
+        db.info["replica"] = monitor.pick()
+        assert db.query(Spa).count() == 1
+    assert replica_queries and not primary_queries
+
+def test_writes_pin_session_to_primary(cluster):
+    primary, replica, monitor, make_session = cluster
+    monitor.write_heartbeat()
+    _replicate(primary, replica)
+    monitor.check(monitor.states[replica])
+
+    replica_queries = _count_queries(replica)
+    with make_session() as db:
+        db.info["replica"] = monitor.pick()
+        db.add(Spa(name="Second Spa", contact_email="two@example.com", status=SpaStatus.invited))
+        db.flush()
+        # The replica doesn't have the new row yet; the session must read it from the primary
+        assert db.query(Spa).count() == 2
+        db.commit()
+    assert not replica_queries
+
+def test_lagging_replica_is_skipped(cluster):
+    primary, replica, monitor, make_session = cluster
+    monitor.write_heartbeat()
+    _replicate(primary, replica)
+    # Replication stalled ten seconds ago
+    with replica.begin() as connection:
+        connection.exec_driver_sql(f"UPDATE replication_heartbeats SET beat_at_ms = {int((time.time() - 10) * 1000)}")
+    monitor.check(monitor.states[replica])
+    assert not monitor.states[replica].healthy
+    assert monitor.states[replica].lag >= 10
+    assert monitor.pick() is None
+
+def test_unreachable_replica_falls_back_to_primary(cluster, tmp_path):
+    primary, replica, monitor, make_session = cluster
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    monitor = ReplicaMonitor(engines=[replica, broken], primary=primary, max_lag=5, check_interval=1, heartbeat_interval=1)
+    monitor.write_heartbeat()
+    _replicate(primary, replica)
+    for state in monitor.states.values():
+        monitor.check(state)
+    assert not monitor.states[broken].healthy
+    assert {monitor.pick() for _ in range(10)} == {replica}
+
+def test_recent_writer_waits_for_replay(cluster):
+    primary, replica, monitor, make_session = cluster
+    monitor.write_heartbeat()
+    _replicate(primary, replica)
+    monitor.check(monitor.states[replica])
+    applied_at = monitor.states[replica].applied_at
+
+    # A write committed after the replica's newest heartbeat: that client reads from the primary
+    assert monitor.pick(last_write=applied_at + 0.5) is None
+    time.sleep(0.01)
+    monitor.write_heartbeat()
+    _replicate(primary, replica)
+    monitor.check(monitor.states[replica])
+    assert monitor.pick(last_write=applied_at + 0.005) is replica
@@ -0,0 +1,119 @@
+"""
+Batched file details (app/services/sharefile_metadata.py) and the download URL
+route against the local stand-in server.
+
+    pytest benchmarks/test_sharefile_batch_info.py
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base
+from app.logging_config import request_id_var
+from app.models.sharefile import ShareFileCredentials
+from app.models import user, spa, document, sharefile, job, notification, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+from app.routes.admin import get_file_download_url
+from app.services.sharefile_metadata import ItemInfoService
+from fake_sharefile import FakeShareFile
+
+LATENCY_MS = 20
+
+@pytest.fixture
+def fake(serve_fake):
+    return serve_fake(FakeShareFile(latency_ms=LATENCY_MS, jitter_ms=0))
+
+def _file_ids(count: int) -> list:
+    return [f"fi{index:08d}" for index in range(count)]
+
+def test_batch_is_deduplicated_and_parallel(fake, sharefile_api):
+    service = ItemInfoService()
+    service.concurrency = 8
+    ids = _file_ids(24)
+
+    start = time.perf_counter()
+    result = service.resolve(sharefile_api(), ids + ids[:10] + [""])
+    batch_seconds = time.perf_counter() - start
+    assert fake.requests == 24
+    assert result["calls"] == 24
+    assert list(result["items"]) == ids
+    assert all(result["items"][item_id]["Id"] == item_id for item_id in ids)
+
+    # One /info call per file, as the preview flow used to make them
+    api = sharefile_api()
+    start = time.perf_counter()
+    for item_id in ids:
+        api.get_item(item_id)
+    serial_seconds = time.perf_counter() - start
+    assert batch_seconds < serial_seconds / 3
+
+def test_repeat_lookups_come_from_cache(fake, sharefile_api):
+    service = ItemInfoService()
+    ids = _file_ids(10)
+    service.resolve(sharefile_api(), ids)
+
+    fake.requests = 0
+    result = service.resolve(sharefile_api(), ids[:5] + _file_ids(12)[10:])
+    assert fake.requests == 2
+    assert result["cached"] == 5
+    assert service.uncached(sharefile_api(), _file_ids(12)) == []
+
+    fake.requests = 0
+    service.resolve(sharefile_api(), ids, refresh=True)
+    assert fake.requests == 10
+
+def test_concurrent_requests_share_fetches(fake, sharefile_api):
+    service = ItemInfoService()
+    ids = _file_ids(16)
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(service.resolve(sharefile_api(), ids))) for _ in range(4)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert fake.requests == 16
+    assert sum(result["calls"] for result in results) == 16
+    assert all(list(result["items"]) == ids for result in results)
+
+def test_missing_items_are_not_cached(fake, sharefile_api):
+    service = ItemInfoService()
+    api = sharefile_api()
+    original = api.get_item
+    api.get_item = lambda item_id: None if item_id == "fi00000003" else original(item_id)
+    result = service.resolve(api, _file_ids(5))
+    assert result["items"]["fi00000003"] is None
+    assert service.uncached(sharefile_api(), _file_ids(5)) == ["fi00000003"]
+
+def test_lookups_keep_request_context(fake, sharefile_api):
+    service = ItemInfoService()
+    api = sharefile_api()
+    original = api.get_item
+    seen = []
+    api.get_item = lambda item_id: seen.append(request_id_var.get()) or original(item_id)
+    token = request_id_var.set("info-request")
+    try:
+        service.resolve(api, _file_ids(6))
+    finally:
+        request_id_var.reset(token)
+    assert seen == ["info-request"] * 6
+
+def test_download_url_needs_no_sharefile_call(fake, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'info.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(ShareFileCredentials(access_token="token", subdomain="docuspa", apicp="sharefile.com",
+                                    appcp="sharefile.com"))
+        db.commit()
+        admin = SimpleNamespace(id="admin", role=SimpleNamespace(value="admin"))
+        response = asyncio.run(get_file_download_url("fi00000001", current_user=admin, db=db))
+    assert response["download_url"] == "/admin/sharefile/file/fi00000001/proxy-download"
+    assert fake.requests == 0
@@ -0,0 +1,178 @@
+"""
+Incremental ShareFile tree sync and index browsing (app/services/sharefile_index.py)
+against the local stand-in server.
+
+    pytest benchmarks/test_sharefile_index.py
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base
+from app.models.sharefile import ShareFileCredentials, ShareFileItem
+from app.models import user, spa, document, sharefile, job, notification, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+from app.routes.admin import get_file_info, get_sharefile_files
+from app.services.sharefile_index import ShareFileIndexService, sharefile_index
+from app.services.sharefile_metadata import item_info
+from fake_sharefile import FakeShareFile
+from starlette.requests import Request
+
+class TreeFake(FakeShareFile):
+    """A small, editable folder tree; folders report ProgenyEditDate like ShareFile does"""
+    def __init__(self):
+        super().__init__(latency_ms=0, jitter_ms=0)
+        self.tree = {
+            "home": ["foprojects", "fowelcome", "fiReadme"],
+            "foprojects": ["foarchive", "fiPlan", "fiBudget"],
+            "foarchive": ["fiOld1", "fiOld2"],
+            "fowelcome": ["fiIntro"],
+        }
+        self.edits = {}
+        self.listed = []
+        self.clock = 0
+
+    def item(self, item_id: str) -> dict:
+        item = super().item(item_id)
+        if item_id in self.tree:
+            item["ProgenyEditDate"] = self.edits.get(item_id, "2024-01-01T00:00:00Z")
+        return item
+
+    def children(self, folder_id: str) -> dict:
+        self.listed.append(folder_id)
+        items = [self.item(child) for child in self.tree.get(folder_id, [])]
+        return {"odata.count": len(items), "value": items}
+
+    def touch(self, *folder_ids):
+        """An edit below these folders (the path from home down)"""
+        self.clock += 1
+        for folder_id in folder_ids:
+            self.edits[folder_id] = f"2024-02-01T00:00:{self.clock:02d}Z"
+
+@pytest.fixture
+def fake(serve_fake):
+    return serve_fake(TreeFake())
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+@pytest.fixture
+def index():
+    return ShareFileIndexService()
+
+def _ids(items) -> set:
+    return {item["Id"] for item in items}
+
+ADMIN = SimpleNamespace(id="admin", role=SimpleNamespace(value="admin"))
+
+def _request(etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": headers})
+
+def _connect(db):
+    db.add(ShareFileCredentials(access_token="token", subdomain="docuspa", apicp="sharefile.com",
+                                appcp="sharefile.com"))
+    db.commit()
+
+def test_sync_mirrors_tree(fake, db, index, sharefile_api):
+    stats = index.sync(db, sharefile_api())
+    assert stats["status"] == "complete"
+    assert sorted(fake.listed) == sorted(fake.tree)
+    assert db.query(ShareFileItem).count() == 1 + sum(len(children) for children in fake.tree.values())
+
+    # Browsing the index returns what ShareFile would
+    for folder_id, children in fake.tree.items():
+        assert _ids(index.folder_items(db, folder_id)) == set(children)
+    assert _ids(index.folder_items(db)) == set(fake.tree["home"])
+    assert db.get(ShareFileItem, "foarchive").depth == 2
+
+def test_unchanged_subtrees_are_not_listed(fake, db, index, sharefile_api):
+    index.sync(db, sharefile_api())
+    fake.listed.clear()
+    assert index.sync(db, sharefile_api())["listed"] == 0
+    assert fake.listed == []
+
+    # A new file deep down: only the folders on its path are listed again
+    fake.tree["foarchive"].append("fiNew")
+    fake.touch("home", "foprojects", "foarchive")
+    stats = index.sync(db, sharefile_api())
+    assert fake.listed == ["home", "foprojects", "foarchive"]
+    assert stats["status"] == "complete"
+    assert "fiNew" in _ids(index.folder_items(db, "foarchive"))
+
+def test_removed_folder_takes_its_subtree(fake, db, index, sharefile_api):
+    index.sync(db, sharefile_api())
+    fake.tree["foprojects"].remove("foarchive")
+    fake.touch("home", "foprojects")
+    index.sync(db, sharefile_api())
+    for item_id in ("foarchive", "fiOld1", "fiOld2"):
+        assert db.get(ShareFileItem, item_id) is None
+    assert db.get(ShareFileItem, "fiPlan") is not None
+
+def test_partial_pass_falls_back_to_live_and_resumes(fake, db, index, sharefile_api):
+    stats = index.sync(db, sharefile_api(), max_folders=2)
+    assert stats["status"] == "partial"
+    assert stats["pending"] == 2
+    # Not listed yet: the route lists these live
+    assert index.folder_items(db, "foarchive") is None
+    assert index.folder_items(db) is not None
+
+    stats = index.sync(db, sharefile_api(), max_folders=2)
+    assert stats["status"] == "complete"
+    assert _ids(index.folder_items(db, "foarchive")) == {"fiOld1", "fiOld2"}
+
+def test_unavailable_upstream_leaves_index_untouched(fake, db, index, sharefile_api):
+    index.sync(db, sharefile_api())
+    before = db.query(ShareFileItem).count()
+    fake.touch("home", "fowelcome")
+    fake.error_rate = 1.0
+    api = sharefile_api()
+    api.max_retries = 0
+    assert index.sync(db, api)["status"] == "error"
+    assert db.query(ShareFileItem).count() == before
+
+def test_search_by_name(fake, db, index, sharefile_api):
+    index.sync(db, sharefile_api())
+    names = {row.name: row.id for row in db.query(ShareFileItem)}
+    target = next(name for name in names if name.startswith("Document") and names[name] == "fiBudget")
+    assert [row.id for row in index.search(db, target[-8:], item_type="file")] == ["fiBudget"]
+    assert {row.id for row in index.search(db, "", item_type="folder")} == set(fake.tree)
+
+def test_file_info_revalidates_from_index(fake, db, sharefile_api):
+    _connect(db)
+    sharefile_index.sync(db, sharefile_api())
+    item_info.cache.clear()
+    response = asyncio.run(get_file_info("fiPlan", _request(), current_user=ADMIN, db=db))
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    # Not in the lookup cache any more; the index still vouches for the file
+    item_info.cache.clear()
+    fake.requests = 0
+    response = asyncio.run(get_file_info("fiPlan", _request(etag), current_user=ADMIN, db=db))
+    assert response.status_code == 304
+    assert fake.requests == 0
+
+def test_listing_revalidates_without_sharefile_calls(fake, db, monkeypatch):
+    _connect(db)
+    monkeypatch.setattr(sharefile_index, "enabled", False)
+    response = asyncio.run(get_sharefile_files(_request(), "foprojects", current_user=ADMIN, db=db))
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    fake.requests = 0
+    response = asyncio.run(get_sharefile_files(_request(etag), "foprojects", current_user=ADMIN, db=db))
+    assert response.status_code == 304
+    # Neither the token check nor the listing went to ShareFile
+    assert fake.requests == 0
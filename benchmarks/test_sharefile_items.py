@@ -0,0 +1,175 @@
+"""
+Benchmarks for the folder listing normalization (app/services/sharefile_items.py).
+
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks/test_sharefile_items.py --benchmark-autosave
+    pytest benchmarks/test_sharefile_items.py --benchmark-compare --benchmark-compare-fail=mean:15%
+
+The equivalence and speedup checks run without pytest-benchmark; the speedup
+gate compares against the original inline loop on the same machine, so it
+catches slowdowns regardless of hardware.
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.sharefile_items import normalize_items, format_timestamp
+
+try:
+    import pytest_benchmark  # noqa: F401
+    HAS_BENCHMARK = True
+except ImportError:
+    HAS_BENCHMARK = False
+
+SIZES = [10, 1_000, 100_000]
+MIN_SPEEDUP = 1.5
+
+def make_items(count: int, seed: int = 7) -> list:
+    """Synthetic listing mixing the shapes ShareFile returns"""
+    rng = random.Random(seed)
+    epoch = datetime(2023, 1, 1)
+    items = []
+    for index in range(count):
+        created = epoch + timedelta(seconds=rng.randint(0, 60_000_000), microseconds=rng.randint(0, 999_999))
+        item = {
+            "Id": f"fi{index:08d}",
+            "Name": f"Document {index}.pdf",
+            "CreationDate": created.isoformat() + "Z",
+            "LastWriteTime": (created + timedelta(days=rng.randint(0, 90))).isoformat() + "Z",
+            "FileSizeBytes": rng.choice([0, 512, 40_000, 7_500_000, 3_200_000_000]),
+            "url": f"https://bench.sharefile.test/Items(fi{index:08d})",
+        }
+        shape = index % 5
+        if shape == 0:
+            item["Type"] = "Folder"
+            item["Id"] = f"fo{index:08d}"
+        elif shape == 1:
+            item["odata.type"] = "ShareFile.Api.Models.File"
+        elif shape == 2:
+            item["odata.type"] = "ShareFile.Api.Models.Folder"
+        elif shape == 3:
+            item["HasChildren"] = True
+            del item["LastWriteTime"]
+            item["ModificationDate"] = "2024-02-29"
+        items.append(item)
+    return items
+
+def reference_normalize(items):
+    """The loop as it was inlined in get_sharefile_files, kept as the correctness and speed reference"""
+    files = []
+    folders = []
+    for item in items:
+        item_type = item.get('Type', '').lower()
+        if not item_type:
+            odata_type = item.get('odata.type', item.get('@odata.type', ''))
+            if 'folder' in odata_type.lower():
+                item_type = 'folder'
+            elif 'file' in odata_type.lower():
+                item_type = 'file'
+            elif 'Children' in item or item.get('HasChildren', False):
+                item_type = 'folder'
+            elif '.' in item.get('Name', ''):
+                item_type = 'file'
+            elif item.get('FileSizeBytes', 0) > 0:
+                item_type = 'file'
+            else:
+                item_type = 'file'
+
+        item_name = item.get('Name', 'Unknown')
+        item_size = item.get('FileSizeBytes', 0)
+        if item_size > 0:
+            if item_size >= 1024 * 1024 * 1024:
+                size_display = f"{item_size / (1024 * 1024 * 1024):.2f} GB"
+            elif item_size >= 1024 * 1024:
+                size_display = f"{item_size / (1024 * 1024):.2f} MB"
+            elif item_size >= 1024:
+                size_display = f"{item_size / 1024:.2f} KB"
+            else:
+                size_display = f"{item_size} bytes"
+        else:
+            size_display = "Unknown size"
+
+        created_date = item.get('CreationDate', '')
+        modified_date = item.get('LastWriteTime', item.get('ModificationDate', ''))
+        try:
+            if created_date:
+                from datetime import datetime
+                created_display = datetime.fromisoformat(created_date.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M')
+            else:
+                created_display = 'Unknown'
+        except:
+            created_display = 'Unknown'
+        try:
+            if modified_date:
+                from datetime import datetime
+                modified_display = datetime.fromisoformat(modified_date.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M')
+            else:
+                modified_display = 'Unknown'
+        except:
+            modified_display = 'Unknown'
+
+        item_data = {
+            "id": item.get('Id'),
+            "name": item_name,
+            "type": item.get('Type'),
+            "size": item_size,
+            "size_display": size_display,
+            "created": created_display,
+            "modified": modified_display,
+            "download_url": item.get('url', item.get('Uri')) if item_type != 'folder' else None,
+            "is_folder": item_type == 'folder'
+        }
+        if item_type == 'folder':
+            folders.append(item_data)
+        else:
+            files.append(item_data)
+    return files, folders
+
+def _best_of(func, items, rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(items)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def test_matches_reference_output():
+    items = make_items(2_000)
+    assert normalize_items(items) == reference_normalize(items)
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-03-05T14:07:09.123Z", "2024-03-05 14:07"),
+    ("2024-03-05T14:07:09+02:00", "2024-03-05 14:07"),
+    ("2024-03-05", "2024-03-05 00:00"),
+    ("", "Unknown"),
+    ("not a date", "Unknown"),
+])
+def test_format_timestamp(value, expected):
+    assert format_timestamp(value) == expected
+
+def test_speedup_over_reference():
+    """Regression gate: the transformer must stay clearly faster than the original loop"""
+    items = make_items(20_000)
+    reference = _best_of(reference_normalize, items)
+    current = _best_of(normalize_items, items)
+    assert reference / current >= MIN_SPEEDUP, f"speedup {reference / current:.2f}x < {MIN_SPEEDUP}x"
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark not installed")
+@pytest.mark.parametrize("count", SIZES)
+def test_benchmark_normalize_items(benchmark, count):
+    items = make_items(count)
+    files, folders = benchmark(normalize_items, items)
+    assert len(files) + len(folders) == count
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="pytest-benchmark not installed")
+@pytest.mark.parametrize("count", SIZES)
+def test_benchmark_reference(benchmark, count):
+    items = make_items(count)
+    files, folders = benchmark(reference_normalize, items)
+    assert len(files) + len(folders) == count
@@ -0,0 +1,176 @@
+"""
+Timeouts, retries, circuit breaking and stale listings around ShareFile calls
+(app/services/sharefile.py, app/services/resilience.py) against the local
+stand-in server.
+
+    pytest benchmarks/test_sharefile_resilience.py
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import sharefile
+from app.services.rate_limit import INTERACTIVE, RateLimitExceeded, SharedTokenBucket
+from app.services.resilience import CircuitBreakerRegistry, RetryBudget, parse_retry_after
+from app.services.sharefile import StaleListingCache
+from fake_sharefile import FakeShareFile
+
+@pytest.fixture
+def fake(serve_fake, monkeypatch):
+    # Fresh shared state per test
+    monkeypatch.setattr(sharefile, "circuit_breakers", CircuitBreakerRegistry(failure_threshold=3, reset_timeout=0.3))
+    monkeypatch.setattr(sharefile, "retry_budget", RetryBudget(ratio=0.1, min_per_second=0, max_tokens=10))
+    monkeypatch.setattr(sharefile, "stale_listings", StaleListingCache(max_entries=10, max_age=60))
+    return serve_fake(FakeShareFile(folder_size=20, latency_ms=0, jitter_ms=0))
+
+@pytest.fixture
+def client(sharefile_api):
+    """API clients with short retry delays"""
+    return functools.partial(sharefile_api, retry_base_delay=0.01, retry_max_delay=0.02)
+
+def test_transient_failures_are_retried(fake, client):
+    fake.error_rate = 1.0
+    threading.Timer(0.005, setattr, (fake, "error_rate", 0.0)).start()
+    assert client(max_retries=5).get_items("fo12345678")["value"]
+
+def test_writes_are_not_retried(fake, client):
+    fake.error_rate = 1.0
+    assert client(max_retries=5)._make_request("POST", "/Items(fo12345678)/CreateSigningLink", json={}) is None
+    assert fake.requests == 1
+
+def test_circuit_opens_and_fails_fast(fake, client):
+    fake.error_rate = 1.0
+    api = client(max_retries=0)
+    for _ in range(3):
+        assert api.get_items("fo12345678") is None
+    assert fake.requests == 3
+
+    # Open: rejected without reaching the server
+    start = time.perf_counter()
+    assert api.get_items("fo12345678") is None
+    assert time.perf_counter() - start < 0.05
+    assert fake.requests == 3
+
+    # After reset_timeout a probe goes through and closes the circuit on success
+    fake.error_rate = 0.0
+    time.sleep(0.35)
+    assert api.get_items("fo12345678")["value"]
+    assert api.get_items("fo12345678")["value"]
+    assert fake.requests == 5
+
+def test_half_open_probe_survives_aborted_attempts(fake, monkeypatch, client):
+    fake.error_rate = 1.0
+    api = client(max_retries=0)
+    for _ in range(3):
+        assert api.get_items("fo12345678") is None
+    fake.error_rate = 0.0
+    time.sleep(0.35)
+
+    # Out of quota while half-open: the call never goes out, and the probe stays available
+    monkeypatch.setattr(sharefile, "rate_limiter", SharedTokenBucket(rate=0.001, burst=1, max_wait={INTERACTIVE: 0}))
+    sharefile.rate_limiter.acquire(INTERACTIVE)
+    url = f"{api.host_url()}/sf/v3/Items(fo12345678)/Children"
+    with pytest.raises(RateLimitExceeded):
+        api._timed_request("GET", url, "/Items(fo12345678)/Children", priority=INTERACTIVE)
+    monkeypatch.setattr(sharefile, "rate_limiter", SharedTokenBucket(rate=100, burst=10))
+
+    # An attempt failing with something other than a request error gives the probe back too
+    send = api._send
+    api._send = lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("tracer failed"))
+    with pytest.raises(RuntimeError):
+        api._timed_request("GET", url, "/Items(fo12345678)/Children")
+    api._send = send
+
+    assert api.get_items("fo12345678")["value"]
+    assert sharefile.circuit_breakers.get(urlparse(url).netloc).state == "closed"
+
+def test_stale_listing_served_while_upstream_down(fake, client):
+    api = client(max_retries=0)
+    fresh = api.get_items("fo12345678")
+    assert not api.served_stale
+
+    fake.error_rate = 1.0
+    api = client(max_retries=0)
+    assert api.get_items("fo12345678") == fresh
+    assert api.served_stale
+    # Never listed before: nothing to fall back to
+    assert api.get_items("fo87654321") is None
+
+def test_token_check_does_not_mark_listings_stale(fake, client):
+    client(max_retries=0).get_items()
+
+    fake.error_rate = 1.0
+    api = client(max_retries=0)
+    # The cached home folder carries the request through an outage
+    assert api.ensure_valid_token()
+    assert not api.served_stale
+
+    fake.error_rate = 0.0
+    assert api.get_items("fo12345678")["value"]
+    assert not api.served_stale
+
+def test_item_lookups_stay_out_of_stale_cache(fake, client):
+    api = client(max_retries=0)
+    listing = api.get_items()
+    for index in range(20):
+        assert api.get_item(f"fi{index:08d}")
+    fake.error_rate = 1.0
+    # Ten listing slots, twenty lookups since: the home listing is still there
+    assert api.get_items() == listing
+    assert api.get_item("fi00000001") is None
+
+def test_retry_after_is_honored(fake, client):
+    fake.error_rate, fake.retry_after = 1.0, 1
+    threading.Timer(0.3, setattr, (fake, "error_rate", 0.0)).start()
+    start = time.perf_counter()
+    assert client(max_retries=2).get_items("fo12345678")["value"]
+    # Backoff alone would have retried within 20ms, while the server was still failing
+    assert time.perf_counter() - start >= 1.0
+    assert fake.requests == 2
+
+def test_retry_budget_caps_retries(fake, monkeypatch, client):
+    monkeypatch.setattr(sharefile, "retry_budget", RetryBudget(ratio=0.25, min_per_second=0, max_tokens=10))
+    monkeypatch.setattr(sharefile, "circuit_breakers", CircuitBreakerRegistry(failure_threshold=1000, reset_timeout=1))
+    sharefile.retry_budget.tokens = 0
+    fake.error_rate = 1.0
+    api = client(max_retries=3)
+    for _ in range(20):
+        api.get_items("fo12345678")
+    # 20 calls earn 5 retries at a 25% ratio, instead of 3 retries each
+    assert fake.requests == 25
+
+def test_deadline_bounds_hung_upstream(fake, client):
+    fake.latency_ms = 3000
+    start = time.perf_counter()
+    assert client(read_timeout=15, deadline=0.5).get_items("fo12345678") is None
+    assert time.perf_counter() - start < 1.0
+
+def test_download_goes_through_resilience_layer(fake, client):
+    fake.download_bytes = 100_000
+    response = client().open_download("fi12345678")
+    assert response.status_code == 200
+    assert len(b"".join(response.iter_content(8192))) == 100_000
+    response.close()
+
+    # A hung download is bounded by the deadline and counts against the breaker
+    fake.latency_ms = 3000
+    start = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        client(max_retries=0, read_timeout=15, deadline=0.3).open_download("fi12345678")
+    assert time.perf_counter() - start < 1.0
+    assert sharefile.circuit_breakers.get(urlparse(client().host_url()).netloc).failures == 1
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
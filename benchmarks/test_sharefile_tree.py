@@ -0,0 +1,136 @@
+"""
+Folder tree traversal with nested $expand and the subtree cache
+(app/services/sharefile_tree.py) against the local stand-in server.
+
+    pytest benchmarks/test_sharefile_tree.py
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.logging_config import request_id_var
+from app.services.sharefile import ShareFileAPI
+from app.services.sharefile_items import extract_items, item_kind
+from app.services.sharefile_tree import FolderTreeService
+from fake_sharefile import FakeShareFile
+
+LATENCY_MS = 20
+
+class EditableFake(FakeShareFile):
+    """Synthetic tree whose folders can be marked as changed below"""
+    def __init__(self):
+        super().__init__(folder_size=15, subfolders=10, latency_ms=LATENCY_MS, jitter_ms=0)
+        self.edited = set()
+
+    def item(self, item_id: str) -> dict:
+        item = super().item(item_id)
+        if item_id in self.edited:
+            item["ProgenyEditDate"] = "2025-06-01T00:00:00Z"
+        return item
+
+@pytest.fixture
+def fake(serve_fake):
+    return serve_fake(EditableFake())
+
+def _walk_one_call_per_folder(api: ShareFileAPI, folder_id: str, depth: int) -> dict:
+    """What the picker would do without $expand: list every folder's children"""
+    node = {"id": folder_id, "children": []}
+    if depth == 0:
+        return node
+    for item in extract_items(api.get_items(folder_id)):
+        if item_kind(item) == "folder":
+            node["children"].append(_walk_one_call_per_folder(api, item["Id"], depth - 1))
+    return node
+
+def _folder_ids(node: dict, depth: int) -> set:
+    ids = {node["id"]}
+    if depth > 0:
+        for child in node["children"] or []:
+            ids |= _folder_ids(child, depth - 1)
+    return ids
+
+def test_three_levels_in_two_waves(fake, sharefile_api):
+    service = FolderTreeService()
+    service.expand_levels, service.concurrency = 2, 8
+
+    start = time.perf_counter()
+    result = service.build(sharefile_api(), "home", 3)
+    expanded_seconds = time.perf_counter() - start
+    assert result["complete"]
+    assert result["waves"] == 2
+
+    fake.requests = 0
+    start = time.perf_counter()
+    reference = _walk_one_call_per_folder(sharefile_api(), "home", 3)
+    walk_seconds = time.perf_counter() - start
+    assert fake.requests == 1 + 10 + 100
+
+    assert _folder_ids(result["tree"], 3) == _folder_ids(reference, 3)
+    assert len(_folder_ids(result["tree"], 3)) == 1 + 10 + 100 + 1000
+    assert expanded_seconds < walk_seconds / 3
+
+def test_unchanged_subtrees_come_from_cache(fake, sharefile_api):
+    service = FolderTreeService()
+    first = service.build(sharefile_api(), "home", 3)
+    assert first["cached"] == 0
+
+    fake.requests = 0
+    second = service.build(sharefile_api(), "home", 3)
+    # Only the root is fetched; every deeper subtree's watermark still matches
+    assert fake.requests == 1
+    assert second["cached"] == 100
+    assert _folder_ids(second["tree"], 3) == _folder_ids(first["tree"], 3)
+
+    # An edit below one level-2 folder: just that subtree is fetched again
+    changed = first["tree"]["children"][4]["children"][7]["id"]
+    fake.edited.add(changed)
+    fake.requests = 0
+    third = service.build(sharefile_api(), "home", 3)
+    assert fake.requests == 2
+    assert third["cached"] == 99
+
+    fake.requests = 0
+    service.build(sharefile_api(), "home", 3, refresh=True)
+    assert fake.requests == 1 + 100
+
+def test_cached_subtree_is_cut_to_requested_depth(fake, sharefile_api):
+    service = FolderTreeService()
+    service.expand_levels = 1
+    service.build(sharefile_api(), "home", 3)
+    fake.requests = 0
+    shallow = service.build(sharefile_api(), "home", 2)
+    assert shallow["calls"] == 1
+    for child in shallow["tree"]["children"]:
+        assert all(grandchild["children"] is None for grandchild in child["children"])
+
+def test_failed_branch_marks_tree_partial(fake, sharefile_api):
+    service = FolderTreeService()
+    api = sharefile_api()
+    api.max_retries = 0
+    original = api.get_item_tree
+    api.get_item_tree = lambda item_id, levels: None if item_id != "home" and item_id.endswith("0003") else original(item_id, levels)
+    result = service.build(api, "home", 3)
+    assert not result["complete"]
+    # Nothing is cached from an incomplete tree
+    fake.requests = 0
+    assert service.build(sharefile_api(), "home", 3)["cached"] == 0
+
+def test_child_listings_keep_request_context(fake, sharefile_api):
+    service = FolderTreeService()
+    service.expand_levels = 1
+    api = sharefile_api()
+    original = api.get_item_tree
+    seen = []
+    api.get_item_tree = lambda item_id, levels: seen.append(request_id_var.get()) or original(item_id, levels)
+    token = request_id_var.set("tree-request")
+    try:
+        service.build(api, "home", 2)
+    finally:
+        request_id_var.reset(token)
+    assert len(seen) == 11
+    assert set(seen) == {"tree-request"}
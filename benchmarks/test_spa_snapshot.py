@@ -0,0 +1,102 @@
+"""
+Spa portal snapshots (app/services/spa_snapshot.py): rebuilt in the same
+commit as every onboarding change, and only when a change shows in them.
+
+    pytest benchmarks/test_spa_snapshot.py
+"""
+import json
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import database
+from app.database import Base, SessionLocal
+from app.models.document import Document, PaymentMethod
+from app.models.snapshot import SpaSnapshot
+from app.models.spa import Spa, SpaStatus, OnboardingInfo
+from app.models import user, sharefile, job, notification, webhook, change_counter, replication  # noqa: F401 - register tables
+from app.services import spa_snapshot
+from app.services.onboarding import mark_document_signed, set_spa_status
+from app.services.stripe_payments import upsert_payment_methods
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'snapshots.db'}")
+    Base.metadata.create_all(engine)
+    # The rebuild hooks are registered on SessionLocal; it must not create the app's engine
+    monkeypatch.setattr(database, "_engine", engine)
+    with SessionLocal(bind=engine) as session:
+        yield session
+
+@pytest.fixture
+def rebuilds(monkeypatch):
+    rebuilt = []
+    refresh = spa_snapshot.refresh_snapshot
+
+    def counting(db, spa_id):
+        rebuilt.append(spa_id)
+        return refresh(db, spa_id)
+
+    monkeypatch.setattr(spa_snapshot, "refresh_snapshot", counting)
+    return rebuilt
+
+def _assert_current(db, spa: Spa):
+    # A new spa's snapshot is built on first read; after that only the commit hook updates it
+    stored = spa_snapshot.get_snapshot(db, spa.id)
+    fresh = spa_snapshot.build_snapshot(db, spa)
+    assert stored.data == json.loads(json.dumps(fresh))
+    assert stored.data["progress"]["status"] == spa.status.value
+
+def test_snapshot_follows_every_transition(db):
+    spa = Spa(name="Serenity", contact_email="serenity@example.com")
+    db.add(spa)
+    db.commit()
+    _assert_current(db, spa)
+
+    db.add(OnboardingInfo(spa_id=spa.id, business_name="Serenity LLC", address="1 Main St", license_number="L-1"))
+    set_spa_status(db, spa, SpaStatus.info_submitted)
+    db.add_all([Document(spa_id=spa.id, sharefile_id=f"fi{index}", name=f"Doc {index}") for index in range(2)])
+    db.commit()
+    _assert_current(db, spa)
+
+    for document in db.query(Document).filter(Document.spa_id == spa.id).order_by(Document.name):
+        mark_document_signed(db, document)
+        db.commit()
+        _assert_current(db, spa)
+    assert spa.status == SpaStatus.documents_signed
+
+    upsert_payment_methods(db, [{"spa_id": spa.id, "customer": "cus_1", "payment_method": "pm_1"}])
+    db.commit()
+    _assert_current(db, spa)
+    assert db.get(SpaSnapshot, spa.id).data["payment_method"]["configured"]
+
+    set_spa_status(db, spa, SpaStatus.completed)
+    db.commit()
+    _assert_current(db, spa)
+    assert db.get(SpaSnapshot, spa.id).data["progress"]["next_action"] is None
+
+def test_only_changes_the_snapshot_shows_rebuild_it(db, rebuilds):
+    spa = Spa(name="Serenity", contact_email="serenity@example.com", status=SpaStatus.documents_signed)
+    db.add(spa)
+    db.flush()
+    document = Document(spa_id=spa.id, sharefile_id="fi1", name="Agreement")
+    payment_method = PaymentMethod(spa_id=spa.id, stripe_customer_id="cus_1", stripe_payment_method_id="pm_1")
+    db.add_all([document, payment_method])
+    db.commit()
+    assert rebuilds == [spa.id]
+
+    # Bookkeeping columns the portal never shows
+    rebuilds.clear()
+    document.status_checked_at = spa.created_at
+    payment_method.stripe_payment_method_id = "pm_2"
+    db.commit()
+    assert rebuilds == []
+
+    document.signing_url = "https://sign.example.com/1"
+    db.commit()
+    assert rebuilds == [spa.id]
+    assert db.get(SpaSnapshot, spa.id).data["documents"][0]["signing_url"] == "https://sign.example.com/1"
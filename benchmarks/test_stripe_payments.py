@@ -0,0 +1,68 @@
+"""
+Payment method setups from Stripe (app/services/stripe_payments.py) against the
+onboarding flow, including events that arrive before signing is complete.
+
+    pytest benchmarks/test_stripe_payments.py
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base
+from app.models.document import Document, DocumentStatus, PaymentMethod
+from app.models.spa import Spa, SpaStatus
+from app.models import user, sharefile, job, notification, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+from app.services.onboarding import mark_document_signed
+from app.services.stripe_payments import upsert_payment_methods
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'payments.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+def _signing_spa(db, documents: int = 2) -> Spa:
+    spa = Spa(name="Spa", contact_email="spa@example.com", status=SpaStatus.info_submitted)
+    db.add(spa)
+    db.flush()
+    db.add_all([Document(spa_id=spa.id, sharefile_id=f"fi{index}", name=f"Doc {index}") for index in range(documents)])
+    db.commit()
+    return spa
+
+def _setup(spa: Spa) -> dict:
+    return {"spa_id": spa.id, "customer": "cus_1", "payment_method": "pm_1"}
+
+def test_setup_after_signing_advances_spa(db):
+    spa = _signing_spa(db, documents=1)
+    mark_document_signed(db, spa.documents[0])
+    db.commit()
+    assert spa.status == SpaStatus.documents_signed
+
+    upsert_payment_methods(db, [_setup(spa)])
+    db.commit()
+    assert spa.status == SpaStatus.payment_setup
+
+def test_setup_before_signing_completes_advances_spa_on_last_signature(db):
+    spa = _signing_spa(db)
+    upsert_payment_methods(db, [_setup(spa)])
+    db.commit()
+    # Recorded, but the spa can't skip signing
+    assert db.query(PaymentMethod).filter(PaymentMethod.spa_id == spa.id).count() == 1
+    assert spa.status == SpaStatus.info_submitted
+
+    first, second = spa.documents
+    mark_document_signed(db, first)
+    db.commit()
+    assert spa.status == SpaStatus.info_submitted
+
+    mark_document_signed(db, second)
+    db.commit()
+    db.refresh(spa)
+    assert spa.status == SpaStatus.payment_setup
+    assert all(document.status == DocumentStatus.signed for document in spa.documents)
@@ -0,0 +1,88 @@
+"""
+Span parentage across an admin ShareFile route (app/services/tracing.py):
+ShareFile calls made on the route executor and DB queries must land in the
+request's trace, under its server span.
+
+    pytest benchmarks/test_tracing.py
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base, get_db
+from app.models.sharefile import ShareFileCredentials
+from app.models import user, spa, document, sharefile, job, notification, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+from app.routes import admin
+from app.routes.auth import get_current_user
+from app.services.sharefile_index import sharefile_index
+from app.services.tracing import KIND_CLIENT, KIND_SERVER, FileExporter, TracingMiddleware, instrument_engine, tracer
+from fake_sharefile import FakeShareFile
+
+@pytest.fixture
+def spans(tmp_path, monkeypatch):
+    """Every sampled span, recorded instead of exported"""
+    recorded = []
+    monkeypatch.setattr(tracer, "exporter", FileExporter(str(tmp_path / "traces.jsonl")))
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    monkeypatch.setattr(tracer, "_enqueue", recorded.append)
+    return recorded
+
+@pytest.fixture
+def client(tmp_path, serve_fake, monkeypatch):
+    serve_fake(FakeShareFile(latency_ms=0, jitter_ms=0))
+    # Listings go to ShareFile rather than the local index
+    monkeypatch.setattr(sharefile_index, "enabled", False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'tracing.db'}")
+    Base.metadata.create_all(engine)
+    instrument_engine(engine)
+    sessions = sessionmaker(bind=engine)
+    with sessions() as db:
+        db.add(ShareFileCredentials(access_token="token", subdomain="docuspa", apicp="sharefile.com",
+                                    appcp="sharefile.com"))
+        db.commit()
+
+    def session():
+        with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    app.add_middleware(TracingMiddleware)
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="admin", role=SimpleNamespace(value="admin"))
+    yield TestClient(app)
+    engine.dispose()
+
+def _ancestors(span, by_id) -> list:
+    chain = []
+    while span.parent_id in by_id:
+        span = by_id[span.parent_id]
+        chain.append(span)
+    return chain
+
+def test_sharefile_and_db_spans_are_under_the_server_span(client, spans):
+    response = client.get("/admin/sharefile/files", params={"folder_id": "fo12345678"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+
+    [server] = [span for span in spans if span.kind == KIND_SERVER]
+    assert server.name == "GET /admin/sharefile/files"
+    sharefile_calls = [span for span in spans if span.kind == KIND_CLIENT and span.name.startswith("sharefile ")]
+    queries = [span for span in spans if span.kind == KIND_CLIENT and span.name.startswith("db ")]
+    # The token check and the listing, both run on the route executor
+    assert len(sharefile_calls) == 2
+    assert queries
+
+    by_id = {span.span_id: span for span in spans}
+    for span in sharefile_calls + queries:
+        assert span.trace_id == server.trace_id
+        assert server in _ancestors(span, by_id), span.name
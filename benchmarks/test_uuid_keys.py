@@ -0,0 +1,73 @@
+"""
+BinaryUUID / UUIDv7 keys versus the CHAR(36) UUIDv4 keys they replaced.
+
+    pytest benchmarks/test_uuid_keys.py -s      # prints insert rate and size per layout
+    UUID_KEYS_TIMING=1 pytest benchmarks/test_uuid_keys.py -s   # also gate on insert rate (quiet machine)
+    python benchmarks/uuid_keys.py --url mysql+pymysql://... --rows 5000000
+"""
+import os
+import sys
+import uuid
+
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, event, insert, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.types import BinaryUUID, new_id, uuid7
+from uuid_keys import run_layout
+
+ROWS = 60_000
+# Page cache far smaller than the table, like a buffer pool at millions of documents
+CACHE_KIB = 512
+
+def test_uuid7_layout():
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+def test_uuid7_is_time_ordered():
+    ids = []
+    for _ in range(50):
+        ids.append(uuid7())
+        # Keys from different milliseconds sort by creation time
+        while uuid7().int >> 80 == ids[-1].int >> 80:
+            pass
+    assert ids == sorted(ids)
+
+def test_binary_uuid_round_trip():
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    table = Table("t", metadata, Column("id", BinaryUUID, primary_key=True), Column("name", String(10)))
+    metadata.create_all(engine)
+    key = new_id()
+    with engine.begin() as connection:
+        connection.execute(insert(table), [{"id": key, "name": "a"}, {"id": uuid.UUID(new_id()), "name": "b"}])
+        stored = connection.exec_driver_sql("SELECT id FROM t WHERE name = 'a'").scalar()
+        assert stored == uuid.UUID(key).bytes
+        assert connection.execute(select(table.c.id).where(table.c.id == key)).scalar() == key
+        assert connection.execute(select(table.c.id).where(table.c.id == key.upper())).scalar() == key
+        # Malformed ids simply match nothing
+        assert connection.execute(select(table.c.id).where(table.c.id == "not-a-uuid")).first() is None
+
+@pytest.fixture(scope="module")
+def layouts(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('keys') / 'keys.db'}")
+
+    @event.listens_for(engine, "connect")
+    def limit_cache(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+
+    return {layout: run_layout(engine, layout, ROWS) for layout in ("char36_v4", "binary16_v7")}
+
+def test_binary_keys_are_smaller(layouts):
+    old, new = layouts["char36_v4"], layouts["binary16_v7"]
+    print(f"\n{ROWS} documents: CHAR(36) v4 {old['rows_per_second']:.0f} rows/s {old['bytes'] / 2**20:.1f} MiB, "
+          f"BINARY(16) v7 {new['rows_per_second']:.0f} rows/s {new['bytes'] / 2**20:.1f} MiB")
+    assert new["bytes"] < old["bytes"] * 0.75
+
+# Wall-clock comparison: only meaningful on an otherwise idle machine, not in a full suite run
+@pytest.mark.skipif(os.getenv("UUID_KEYS_TIMING") != "1", reason="set UUID_KEYS_TIMING=1 to compare insert rates")
+def test_binary_keys_insert_faster(layouts):
+    old, new = layouts["char36_v4"], layouts["binary16_v7"]
+    assert new["rows_per_second"] > old["rows_per_second"]
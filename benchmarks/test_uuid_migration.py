@@ -0,0 +1,101 @@
+"""
+Migration 0002 (CHAR(36) -> BINARY(16) UUID keys) on a database with data,
+while the old code keeps writing.
+
+    pytest benchmarks/test_uuid_migration.py                       # SQLite
+    UUID_MIGRATION_URL=mysql+pymysql://... pytest benchmarks/test_uuid_migration.py
+
+UUID_MIGRATION_URL must point at a scratch MySQL 8 database (a container
+will do): every table in it is dropped. Run it before applying 0002 to
+production data.
+"""
+import os
+import subprocess
+import sys
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPAS = 500
+
+def _alembic(url: str, *args):
+    env = {**os.environ, "DATABASE_URL": url, "UUID_MIGRATION_BATCH": "100"}
+    subprocess.run([sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True, capture_output=True)
+
+def _insert_spa(connection, spa_id: str):
+    connection.execute(text(
+        "INSERT INTO spas (id, name, contact_email, status) VALUES (:id, 'Spa', 'spa@example.com', 'invited')"
+    ), {"id": spa_id})
+    connection.execute(text(
+        "INSERT INTO documents (id, spa_id, sharefile_id, name, status) VALUES (:id, :spa_id, 'fi1', 'Doc', 'pending')"
+    ), {"id": str(uuid.uuid4()), "spa_id": spa_id})
+
+def _database(tmp_path):
+    url = os.getenv("UUID_MIGRATION_URL")
+    if not url:
+        return f"sqlite:///{tmp_path / 'uuid.db'}"
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("SET foreign_key_checks = 0"))
+        for table in inspect(connection).get_table_names():
+            connection.execute(text(f"DROP TABLE {table}"))
+    engine.dispose()
+    return url
+
+def test_keys_survive_conversion_under_writes(tmp_path):
+    url = _database(tmp_path)
+    _alembic(url, "upgrade", "0001")
+    engine = create_engine(url)
+    spa_ids = [str(uuid.uuid4()) for _ in range(SPAS)]
+    with engine.begin() as connection:
+        for spa_id in spa_ids:
+            _insert_spa(connection, spa_id)
+
+    # The old code keeps inserting until the columns are swapped under it
+    written, stop = [], threading.Event()
+
+    def old_code():
+        while not stop.is_set():
+            spa_id = str(uuid.uuid4())
+            try:
+                with engine.begin() as connection:
+                    _insert_spa(connection, spa_id)
+            except Exception:
+                continue
+            written.append(spa_id)
+
+    mysql = engine.dialect.name == "mysql"
+    writer = threading.Thread(target=old_code)
+    if mysql:
+        writer.start()
+    try:
+        _alembic(url, "upgrade", "0002")
+    finally:
+        stop.set()
+        if mysql:
+            writer.join()
+
+    to_text = "BIN_TO_UUID({})" if mysql else "lower(hex({}))"
+    with engine.connect() as connection:
+        for table, column in (("spas", "id"), ("documents", "id"), ("documents", "spa_id")):
+            assert connection.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {column} IS NULL")).scalar() == 0
+        # Every document still points at its spa
+        orphans = connection.execute(text(
+            "SELECT COUNT(*) FROM documents LEFT JOIN spas ON spas.id = documents.spa_id WHERE spas.id IS NULL"
+        )).scalar()
+        assert orphans == 0
+        stored = {row[0] for row in connection.execute(text(f"SELECT {to_text.format('id')} FROM spas"))}
+    expected = spa_ids + written
+    assert len(stored) == len(expected)
+    assert stored == {spa_id if mysql else spa_id.replace("-", "") for spa_id in expected}
+    if mysql:
+        assert {fk["referred_table"] for fk in inspect(engine).get_foreign_keys("documents")} == {"spas"}
+
+    _alembic(url, "downgrade", "0001")
+    with engine.connect() as connection:
+        stored = {row[0] for row in connection.execute(text("SELECT id FROM spas"))}
+    assert stored == set(expected)
+    engine.dispose()
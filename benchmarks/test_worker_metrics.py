@@ -0,0 +1,70 @@
+"""
+/metrics across prefork workers (app/services/metrics.py WorkerMetrics).
+
+    pytest benchmarks/test_worker_metrics.py
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.metrics import REGISTRY, WorkerMetrics, http_requests_total
+
+def _serve_requests(directory: str, count: int, published, stop):
+    os.environ["METRICS_DIR"] = directory
+    for _ in range(count):
+        http_requests_total.inc(method="GET", route="/worker-metrics-test", status="200")
+    WorkerMetrics(REGISTRY).publish()
+    published.set()
+    stop.wait(10)
+
+def _sample(text: str, pid: int) -> str:
+    prefix = 'docuspa_http_requests_total{method="GET",route="/worker-metrics-test",status="200",worker="%d"}' % pid
+    return next((line for line in text.splitlines() if line.startswith(prefix)), "")
+
+def test_any_worker_reports_every_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path))
+    context = multiprocessing.get_context("fork")
+    published, stop = context.Event(), context.Event()
+    other = context.Process(target=_serve_requests, args=(str(tmp_path), 3, published, stop))
+    other.start()
+    try:
+        assert published.wait(10)
+        http_requests_total.inc(method="GET", route="/worker-metrics-test", status="200")
+        text = WorkerMetrics(REGISTRY).render()
+        assert _sample(text, other.pid).endswith(" 3")
+        assert _sample(text, os.getpid()).endswith(" 1")
+        # One HELP/TYPE block per metric, with both workers' series under it
+        assert text.count("# TYPE docuspa_http_requests_total ") == 1
+    finally:
+        stop.set()
+        other.join()
+
+    text = WorkerMetrics(REGISTRY).render()
+    assert _sample(text, other.pid) == ""
+    assert sorted(os.listdir(tmp_path)) == [f"{os.getpid()}.json"]
+
+def test_single_process_output_is_unlabelled(monkeypatch):
+    monkeypatch.delenv("METRICS_DIR", raising=False)
+    assert 'worker="' not in WorkerMetrics(REGISTRY).render()
+
+def test_publish_failures_are_logged_once(tmp_path, monkeypatch, caplog):
+    blocked = tmp_path / "not-a-directory"
+    blocked.write_text("")
+    monkeypatch.setenv("METRICS_DIR", str(blocked))
+    monkeypatch.setenv("METRICS_PUBLISH_SECONDS", "0.01")
+    exporter = WorkerMetrics(REGISTRY)
+
+    async def publish_for(seconds):
+        task = asyncio.create_task(exporter.run())
+        await asyncio.sleep(seconds)
+        task.cancel()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.metrics"):
+        asyncio.run(publish_for(0.2))
+    warnings = [record for record in caplog.records if record.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert warnings[0].exc_info
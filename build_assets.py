@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, pre-compressed static bundles from assets/.
+
+For every file under assets/ this writes static/dist/<name>.<hash>.<ext> with
+.gz (and .br when the brotli package is installed) siblings, and a
+manifest.json mapping logical paths to the built names. Run on deploy:
+
+    python build_assets.py
+
+Workers still on the previous release keep serving pages that point at the
+previous build during a rolling reload, so its files are kept; only files
+in neither the new manifest nor the one it replaces are removed. Building
+the same release again keeps the build before it. The manifest is swapped
+in atomically.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.assets import ASSETS_DIR, DIST_DIR, MANIFEST_PATH
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PREVIOUS_MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.previous.json")
+
+def _read_manifest(path: str) -> dict:
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(path: str, manifest: dict):
+    # Readers never see a half-written manifest
+    with open(path + ".tmp", "w") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def build(root: str = ".") -> dict:
+    source_dir = os.path.join(root, ASSETS_DIR)
+    dist_dir = os.path.join(root, DIST_DIR)
+    manifest_path = os.path.join(root, MANIFEST_PATH)
+    previous_path = os.path.join(root, PREVIOUS_MANIFEST_PATH)
+    os.makedirs(dist_dir, exist_ok=True)
+    current = _read_manifest(manifest_path)
+
+    manifest = {}
+    totals = {"raw": 0, "gzip": 0, "br": 0}
+    for directory, _, filenames in os.walk(source_dir):
+        for filename in sorted(filenames):
+            source = os.path.join(directory, filename)
+            logical = os.path.relpath(source, source_dir).replace(os.sep, "/")
+            with open(source, "rb") as handle:
+                content = handle.read()
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            stem, extension = os.path.splitext(logical)
+            built = f"{stem}.{digest}{extension}"
+            target = os.path.join(dist_dir, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            with open(target, "wb") as handle:
+                handle.write(content)
+            # mtime=0 keeps the .gz byte-identical between builds of the same content
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            with open(target + ".gz", "wb") as handle:
+                handle.write(compressed)
+            totals["raw"] += len(content)
+            totals["gzip"] += len(compressed)
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=11)
+                with open(target + ".br", "wb") as handle:
+                    handle.write(compressed)
+                totals["br"] += len(compressed)
+
+            manifest[logical] = built
+
+    if manifest != current:
+        _write_manifest(previous_path, current)
+        previous = current
+    else:
+        previous = _read_manifest(previous_path)
+    _write_manifest(manifest_path, manifest)
+    prune(dist_dir, set(manifest.values()) | set(previous.values()))
+
+    print(f"Built {len(manifest)} assets into {DIST_DIR}: {totals['raw']} bytes, "
+          f"{totals['gzip']} gzipped" + (f", {totals['br']} brotli" if brotli else " (brotli not installed)"))
+    return manifest
+
+def prune(dist_dir: str, keep: set):
+    """Remove built files (and their compressed siblings) that no kept manifest names"""
+    for directory, _, filenames in os.walk(dist_dir):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            built = os.path.relpath(path, dist_dir).replace(os.sep, "/")
+            if built in (os.path.basename(MANIFEST_PATH), os.path.basename(PREVIOUS_MANIFEST_PATH)):
+                continue
+            for suffix in (".gz", ".br"):
+                if built.endswith(suffix):
+                    built = built[:-len(suffix)]
+            if built not in keep:
+                os.unlink(path)
+
+if __name__ == "__main__":
+    build()
@@ -65,6 +65,9 @@ pip install -r requirements.txt
 # Install additional production dependencies
 pip install gunicorn uvicorn[standard]
 
+# Build fingerprinted, pre-compressed static bundles
+python build_assets.py
+
 echo "✅ Application setup completed as docuspa user"
 EOF
 
@@ -217,6 +220,10 @@ sudo systemctl daemon-reload
 sudo systemctl enable docuspa
 sudo systemctl enable nginx
 
+# Create or upgrade the database schema (needs DATABASE_URL in .env)
+echo "🗄️ Running database migrations..."
+sudo -u docuspa bash -c "cd /opt/docuspa && source venv/bin/activate && alembic upgrade head"
+
 # Start services
 sudo systemctl start docuspa
 sudo systemctl start nginx
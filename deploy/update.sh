@@ -34,6 +34,36 @@ if [[ $EUID -eq 0 ]]; then
     exit 1
 fi
 
+# Rollback function
+rollback_update() {
+    local commit_to_rollback_to=$1
+    
+    echo -e "${YELLOW}🔄 Rolling back to previous version...${NC}"
+    log "Starting rollback to commit: $commit_to_rollback_to"
+    
+    # Checkout previous commit
+    sudo -u "$USER" git -C "$APP_DIR" checkout "$commit_to_rollback_to"
+    
+    # Back onto the previous code the same way the update went out
+    if [ "$RESTART_REQUIRED" = "true" ]; then
+        sudo systemctl restart "$SERVICE_NAME"
+    else
+        sudo systemctl reload "$SERVICE_NAME"
+    fi
+    
+    # Wait and check
+    sleep 10
+    
+    if sudo systemctl is-active "$SERVICE_NAME" >/dev/null 2>&1; then
+        echo -e "${GREEN}✅ Rollback completed successfully${NC}"
+        log "Rollback completed successfully"
+    else
+        echo -e "${RED}❌ Rollback failed. Manual intervention required.${NC}"
+        log "Rollback failed, manual intervention required"
+        echo -e "${RED}💡 Try restoring from backup: $BACKUP_PATH${NC}"
+    fi
+}
+
 # Create backup directory if it doesn't exist
 sudo mkdir -p "$BACKUP_DIR"
 sudo chown "$USER:$USER" "$BACKUP_DIR"
@@ -91,17 +121,16 @@ else
     log "No dependency changes detected"
 fi
 
-# Check if database migrations are needed
-if [ -d "migrations" ] && [ -n "$(find migrations -name '*.py' -newer "$BACKUP_PATH" 2>/dev/null)" ]; then
-    echo -e "${YELLOW}🗄️ Running database migrations...${NC}"
-    log "Database migrations detected, running migrations"
-    
-    # Run migrations (adjust command as needed)
-    sudo -u "$USER" bash -c "source venv/bin/activate && python -c 'from app.database import Base, engine; Base.metadata.create_all(bind=engine)'"
-    log "Database migrations completed"
-fi
+# Rebuild fingerprinted static bundles
+sudo -u "$USER" bash -c "source venv/bin/activate && python build_assets.py"
+log "Static assets rebuilt"
+
+# Apply any new database migrations (a no-op when the schema is already at head)
+echo -e "${YELLOW}🗄️ Running database migrations...${NC}"
+sudo -u "$USER" bash -c "source venv/bin/activate && alembic upgrade head"
+log "Database migrations completed"
 
-# Test the application before restarting
+# Test the application before reloading
 echo -e "${YELLOW}🧪 Testing application...${NC}"
 log "Running application tests"
 
@@ -114,23 +143,45 @@ log "Application tests passed"
 
 echo -e "${GREEN}✅ Application tests passed${NC}"
 
-# Restart the service
-echo -e "${YELLOW}🔄 Restarting DocuSpa service...${NC}"
-log "Restarting DocuSpa service"
+# Reload the service: SIGHUP to the gunicorn master starts workers on the new code and
+# retires the old ones after their requests finish, so no connection is refused.
+# A full restart is needed only when the master itself changes: the unit file, the
+# launcher (app/server.py) or the installed packages.
+RESTART_REQUIRED=false
+if sudo -u "$USER" git diff --name-only "$PREVIOUS_COMMIT" HEAD | grep -qE "^(deploy/docuspa\.service|app/server\.py|requirements\.txt)$"; then
+    RESTART_REQUIRED=true
+fi
+# Units installed before the prefork launcher have no reload command
+if [ -z "$(systemctl show -p ExecReload --value "$SERVICE_NAME")" ]; then
+    RESTART_REQUIRED=true
+fi
+if sudo -u "$USER" git diff --name-only "$PREVIOUS_COMMIT" HEAD | grep -q "^deploy/docuspa.service$"; then
+    sudo cp "$APP_DIR/deploy/docuspa.service" "/etc/systemd/system/$SERVICE_NAME.service"
+    sudo systemctl daemon-reload
+    log "Service unit updated"
+fi
 
-sudo systemctl restart "$SERVICE_NAME"
+if [ "$RESTART_REQUIRED" = "true" ]; then
+    echo -e "${YELLOW}🔄 Restarting DocuSpa service...${NC}"
+    log "Restarting DocuSpa service"
+    sudo systemctl restart "$SERVICE_NAME"
+else
+    echo -e "${YELLOW}🔄 Reloading DocuSpa service...${NC}"
+    log "Reloading DocuSpa service"
+    sudo systemctl reload "$SERVICE_NAME"
+fi
 
-# Wait for service to start
+# Wait for the new workers to start
 echo -e "${YELLOW}⏳ Waiting for service to start...${NC}"
 sleep 10
 
 # Check if service is running
 if sudo systemctl is-active "$SERVICE_NAME" >/dev/null 2>&1; then
-    echo -e "${GREEN}✅ Service restarted successfully${NC}"
-    log "Service restart successful"
+    echo -e "${GREEN}✅ Service updated successfully${NC}"
+    log "Service update successful"
 else
     echo -e "${RED}❌ Service failed to start. Rolling back...${NC}"
-    log "Service restart failed, initiating rollback"
+    log "Service update failed, initiating rollback"
     
     # Rollback
     rollback_update "$PREVIOUS_COMMIT"
@@ -177,29 +228,3 @@ echo -e "${BLUE}📝 Changelog:${NC}"
 sudo -u "$USER" git -C "$APP_DIR" log --oneline "$PREVIOUS_COMMIT..HEAD"
 
 exit 0
-
-# Rollback function
-rollback_update() {
-    local commit_to_rollback_to=$1
-    
-    echo -e "${YELLOW}🔄 Rolling back to previous version...${NC}"
-    log "Starting rollback to commit: $commit_to_rollback_to"
-    
-    # Checkout previous commit
-    sudo -u "$USER" git -C "$APP_DIR" checkout "$commit_to_rollback_to"
-    
-    # Restart service
-    sudo systemctl restart "$SERVICE_NAME"
-    
-    # Wait and check
-    sleep 10
-    
-    if sudo systemctl is-active "$SERVICE_NAME" >/dev/null 2>&1; then
-        echo -e "${GREEN}✅ Rollback completed successfully${NC}"
-        log "Rollback completed successfully"
-    else
-        echo -e "${RED}❌ Rollback failed. Manual intervention required.${NC}"
-        log "Rollback failed, manual intervention required"
-        echo -e "${RED}💡 Try restoring from backup: $BACKUP_PATH${NC}"
-    fi
-}
\ No newline at end of file
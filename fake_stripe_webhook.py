@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Post Stripe-shaped, correctly signed webhook events to a running DocuSpa instance.
+Useful for testing the payment setup pipeline without a Stripe account.
+
+Usage:
+    python fake_stripe_webhook.py <spa_id> [--url http://localhost:8000] [--replay 3]
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def build_setup_intent_event(spa_id: str) -> dict:
+    """Build a setup_intent.succeeded event like Stripe sends"""
+    return {
+        "id": f"evt_{uuid.uuid4().hex[:24]}",
+        "object": "event",
+        "type": "setup_intent.succeeded",
+        "created": int(time.time()),
+        "livemode": False,
+        "data": {
+            "object": {
+                "id": f"seti_{uuid.uuid4().hex[:24]}",
+                "object": "setup_intent",
+                "status": "succeeded",
+                "customer": f"cus_{uuid.uuid4().hex[:14]}",
+                "payment_method": f"pm_{uuid.uuid4().hex[:24]}",
+                "metadata": {"spa_id": spa_id}
+            }
+        }
+    }
+
+def sign(payload: bytes, secret: str) -> str:
+    """Build a Stripe-Signature header for payload"""
+    timestamp = str(int(time.time()))
+    signature = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Send fake Stripe webhook events")
+    parser.add_argument("spa_id", help="Spa to attach the payment method to")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--replay", type=int, default=1, help="Deliver the same event this many times")
+    args = parser.parse_args()
+
+    secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+    if not secret:
+        print("❌ STRIPE_WEBHOOK_SECRET is not set")
+        return
+
+    event = build_setup_intent_event(args.spa_id)
+    payload = json.dumps(event).encode("utf-8")
+
+    for attempt in range(args.replay):
+        response = requests.post(
+            f"{args.url}/webhooks/stripe/payment-setup",
+            data=payload,
+            headers={"Content-Type": "application/json", "Stripe-Signature": sign(payload, secret)}
+        )
+        print(f"Delivery {attempt + 1}: {response.status_code} {response.text}")
+
+    print(f"✅ Sent {event['id']} for spa {args.spa_id}")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,51 @@
+import time
+STARTED_AT = time.perf_counter()  # Cold-start timer, read once the lifespan startup finishes
+
 from fastapi import FastAPI, Request, Depends, HTTPException, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import os
 import asyncio
+import logging
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from app.database import engine, SessionLocal, Base
-from app.routes import auth, admin, spa
-from app.models import user, spa as spa_model, document, sharefile
+# Load environment variables before any module reads its settings
+load_dotenv()
+
+from app.logging_config import configure_logging, RequestIdMiddleware
+from app.routes import auth, admin, spa, webhooks
+from app.models import user, spa as spa_model, document, sharefile, job, notification, webhook, snapshot, change_counter, replication
 from app.services.token_refresh import token_refresh_service
+from app.services.job_queue import job_queue
+from app.services.notifications import notification_service
+from app.services import background_jobs  # Registers job handlers
+from app.services import spa_snapshot  # Registers snapshot rebuild hooks
+from app.services import change_tracking  # Registers change counter hooks
+from app.services.event_hub import event_hub
+from app.services.leader import leader_election
+from app.services.metrics import MetricsMiddleware, startup_duration, worker_metrics
+from app.services.tracing import tracer, TracingMiddleware
+from app.services.assets import asset_url, PrecompressedStaticFiles
+from app.services.compression import CompressionMiddleware
+from app.services.page_cache import PageCache
+from app.services.replication import replica_monitor, ReadYourWritesMiddleware
+from app.services.sharefile_index import sharefile_index
 
-# Load environment variables
-load_dotenv()
+# Structured logging, written off the event loop by a background thread
+configure_logging()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Request tracing (TRACE_EXPORTER=otlp|file|none)
+tracer.configure()
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+# The schema is managed by Alembic migrations (alembic upgrade head), run once per deploy
+
+logger = logging.getLogger(__name__)
+
+async def start_background_services():
+    """Start the services that must run once per host"""
     # Startup: Start the token refresh background service
     try:
         # Start token refresh service in the background
@@ -28,7 +54,35 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Warning: Could not start token refresh service: {e}")
     
-    yield
+    try:
+        # Start the background job queue (emails, signing links, ShareFile sync)
+        asyncio.create_task(job_queue.start())
+        print("📬 Started background job queue")
+    except Exception as e:
+        print(f"Warning: Could not start job queue: {e}")
+    
+    try:
+        # Signing status checks reschedule themselves through the job queue once started
+        await asyncio.get_running_loop().run_in_executor(None, background_jobs.start_status_polling)
+    except Exception as e:
+        print(f"Warning: Could not schedule signing status polling: {e}")
+    
+    # Heartbeat row the workers use to measure read replica lag (only with DATABASE_REPLICA_URLS)
+    asyncio.create_task(replica_monitor.start_heartbeat())
+    
+    # Mirror the ShareFile folder tree into sharefile_items for browsing and search
+    asyncio.create_task(sharefile_index.start())
+
+async def stop_background_services():
+    """Stop the once-per-host services, letting running jobs finish"""
+    # Shutdown: Stop the ShareFile index sync after its current pass
+    sharefile_index.stop()
+    
+    # Shutdown: Stop the job queue, letting running jobs finish
+    try:
+        await job_queue.stop()
+    except Exception as e:
+        print(f"Warning: Error stopping job queue: {e}")
     
     # Shutdown: Stop the token refresh service
     try:
@@ -37,6 +91,54 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Warning: Error stopping token refresh service: {e}")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Live dashboard events are delivered on the server's event loop
+    event_hub.bind(asyncio.get_running_loop())
+    
+    # Render the HTML entry pages up front so the first visitor doesn't pay for it
+    page_cache.prerender(HTML_PAGES)
+    
+    try:
+        # Compile email templates once so the dispatcher never parses them per message
+        notification_service.load_templates()
+    except Exception as e:
+        print(f"Warning: Could not load email templates: {e}")
+    
+    # Token refresh and the job queue run in one worker per host (the elected leader)
+    election = asyncio.create_task(leader_election.campaign(start_background_services))
+    
+    # Every worker tracks replica lag and health to route read-only requests
+    asyncio.create_task(replica_monitor.start())
+    
+    # Every worker publishes its metrics so any one of them can answer a scrape
+    metrics_publisher = asyncio.create_task(worker_metrics.run())
+    
+    startup_seconds = time.perf_counter() - STARTED_AT
+    startup_duration.set(startup_seconds)
+    logger.info(f"Worker {os.getpid()} ready in {startup_seconds * 1000:.0f} ms")
+    
+    yield
+    
+    # Shutdown: Hand leadership to another worker once our services have stopped
+    election.cancel()
+    if leader_election.is_leader:
+        await stop_background_services()
+        leader_election.release()
+    
+    # Shutdown: Stop the replica checks and heartbeat
+    replica_monitor.stop()
+    
+    # Shutdown: Stop relaying live events between workers
+    event_hub.close()
+    
+    # Shutdown: Drop this worker's series from the server's /metrics
+    metrics_publisher.cancel()
+    worker_metrics.remove()
+    
+    # Shutdown: Export any spans still buffered
+    tracer.shutdown()
+
 app = FastAPI(
     title="DocuSpa API", 
     version="1.0.0",
@@ -44,39 +146,73 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+@app.exception_handler(PoolTimeoutError)
+async def database_busy(request: Request, exc: PoolTimeoutError):
+    """Shed load when no pooled DB connection is available in time (see app/services/db_pool.py)"""
+    return JSONResponse(status_code=503, content={"detail": "Server busy, please retry"}, headers={"Retry-After": "1"})
+
+# Read-your-writes cookie for replica routing (only with DATABASE_REPLICA_URLS)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Compress JSON/HTML bodies above COMPRESSION_MIN_SIZE (nginx does this in production too)
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency, in-flight and status metrics (exposed at /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Server span per request; DB, auth and ShareFile calls are recorded as child spans
+app.add_middleware(TracingMiddleware)
+
+# Correlation id for every log record written while handling a request
+app.add_middleware(RequestIdMiddleware)
+
+# Mount static files; built bundles under /static/dist are fingerprinted and pre-compressed
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
+# Unbuilt asset sources, used when build_assets.py has not been run (local development)
+app.mount("/assets", StaticFiles(directory="assets"), name="assets")
 
 # Setup templates
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
+
+# HTML entry pages are rendered once and served as bytes (TEMPLATE_AUTO_RELOAD=true re-renders on change)
+page_cache = PageCache(templates)
+HTML_PAGES = ["login.html", "dashboard.html", "sharefile_setup_enhanced.html", "sharefile_setup.html"]
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
 app.include_router(spa.router, prefix="/spa", tags=["spa"])
+app.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
 
 # Root endpoint to serve the login page
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return page_cache.response(request, "login.html")
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return page_cache.response(request, "dashboard.html")
 
 @app.get("/sharefile-setup", response_class=HTMLResponse)
 async def sharefile_setup(request: Request):
-    return templates.TemplateResponse("sharefile_setup_enhanced.html", {"request": request})
+    return page_cache.response(request, "sharefile_setup_enhanced.html")
 
 @app.get("/sharefile-setup-old", response_class=HTMLResponse)
 async def sharefile_setup_old(request: Request):
-    return templates.TemplateResponse("sharefile_setup.html", {"request": request})
+    return page_cache.response(request, "sharefile_setup.html")
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "DocuSpa is running"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    body = await asyncio.get_running_loop().run_in_executor(None, worker_metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Temporary debug endpoint to bypass auth issues
 @app.get("/debug/token")
 async def get_debug_token():
@@ -98,4 +234,5 @@ async def get_debug_token():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # log_config=None keeps uvicorn's own loggers on the queued pipeline
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
\ No newline at end of file
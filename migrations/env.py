@@ -0,0 +1,58 @@
+"""
+Alembic environment for DocuSpa.
+
+Migrations run once per deploy (`alembic upgrade head`), never at app
+import, so workers start without touching the schema.
+"""
+import os
+from logging.config import fileConfig
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, pool
+
+from app.database import Base
+from app.models import user, spa, document, sharefile, job, notification, webhook, snapshot, change_counter, replication  # noqa: F401 - register tables
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def database_url() -> str:
+    load_dotenv()
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set")
+    return url
+
+def run_migrations_offline():
+    """Emit the SQL to stdout (alembic upgrade head --sql) instead of running it"""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connectable = create_engine(database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite (local development, benchmarks) can only ALTER tables by copying them
+            render_as_batch=connection.dialect.name == "sqlite",
+            # SQLite reflects unknown types such as BINARY(16) as NUMERIC
+            compare_type=connection.dialect.name != "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
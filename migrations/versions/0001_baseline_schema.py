@@ -0,0 +1,176 @@
+"""baseline schema
+
+The tables main.py used to build with create_all at import. Databases that
+already have them (every install before migrations) keep them untouched:
+only missing tables are created, then the revision is recorded.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 00:25:13.758284
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_missing(existing, name, *columns, indexes=()):
+    if name in existing:
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns in indexes:
+        op.create_index(index_name, name, index_columns)
+
+
+def upgrade() -> None:
+    # Offline (--sql) output is for a fresh database
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    _create_missing(existing, 'users',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('role', sa.Enum('admin', 'spa_user', name='userrole'), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('spa_id', mysql.CHAR(length=36), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+    )
+    _create_missing(existing, 'spas',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('contact_email', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.Enum('invited', 'info_submitted', 'documents_signed', 'payment_setup', 'completed', name='spastatus'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    _create_missing(existing, 'onboarding_info',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('spa_id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('business_name', sa.String(length=255), nullable=False),
+        sa.Column('address', sa.Text(), nullable=False),
+        sa.Column('license_number', sa.String(length=100), nullable=False),
+        sa.Column('submitted_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['spa_id'], ['spas.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    _create_missing(existing, 'documents',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('spa_id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('sharefile_id', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'signed', 'failed', name='documentstatus'), nullable=False),
+        sa.Column('signed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['spa_id'], ['spas.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    _create_missing(existing, 'payment_methods',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('spa_id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('stripe_customer_id', sa.String(length=255), nullable=False),
+        sa.Column('stripe_payment_method_id', sa.String(length=255), nullable=False),
+        sa.Column('setup_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['spa_id'], ['spas.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    _create_missing(existing, 'sharefile_credentials',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('user_id', mysql.CHAR(length=36), nullable=True),
+        sa.Column('created_by_user_id', mysql.CHAR(length=36), nullable=True),
+        sa.Column('organization_wide', sa.Boolean(), nullable=True),
+        sa.Column('access_token', sa.Text(), nullable=False),
+        sa.Column('refresh_token', sa.Text(), nullable=True),
+        sa.Column('subdomain', sa.String(length=100), nullable=False),
+        sa.Column('apicp', sa.String(length=100), nullable=False),
+        sa.Column('appcp', sa.String(length=100), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_refreshed', sa.DateTime(), nullable=True),
+        sa.Column('refresh_count', sa.Integer(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('auto_refresh', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by_user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    _create_missing(existing, 'jobs',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('job_type', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('queued', 'running', 'succeeded', 'dead', name='jobstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_by', sa.String(length=255), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_jobs_status_run_at_priority', ['status', 'run_at', 'priority'])],
+    )
+    _create_missing(existing, 'notification_events',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('spa_id', mysql.CHAR(length=36), nullable=True),
+        sa.Column('event', sa.String(length=50), nullable=False),
+        sa.Column('recipient', sa.String(length=255), nullable=False),
+        sa.Column('context', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['spa_id'], ['spas.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_notification_events_sent_at_created_at', ['sent_at', 'created_at'])],
+    )
+    _create_missing(existing, 'webhook_events',
+        sa.Column('id', sa.String(length=255), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_webhook_events_source_processed_at', ['source', 'processed_at'])],
+    )
+    _create_missing(existing, 'spa_snapshots',
+        sa.Column('spa_id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('etag', sa.String(length=64), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['spa_id'], ['spas.id']),
+        sa.PrimaryKeyConstraint('spa_id'),
+    )
+    _create_missing(existing, 'change_counters',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('change_counters')
+    op.drop_table('spa_snapshots')
+    op.drop_index('ix_webhook_events_source_processed_at', table_name='webhook_events')
+    op.drop_table('webhook_events')
+    op.drop_index('ix_notification_events_sent_at_created_at', table_name='notification_events')
+    op.drop_table('notification_events')
+    op.drop_index('ix_jobs_status_run_at_priority', table_name='jobs')
+    op.drop_table('jobs')
+    op.drop_table('sharefile_credentials')
+    op.drop_table('payment_methods')
+    op.drop_table('documents')
+    op.drop_table('onboarding_info')
+    op.drop_table('spas')
+    op.drop_table('users')
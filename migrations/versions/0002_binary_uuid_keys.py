@@ -0,0 +1,175 @@
+"""binary uuid keys
+
+Converts every CHAR(36) UUID key to BINARY(16) (app.models.types.BinaryUUID).
+
+On MySQL 8 the conversion is online:
+1. foreign keys between the converted columns are dropped
+2. a BINARY(16) shadow column is added next to each UUID column, and
+   triggers keep it in step with rows the running app inserts or updates
+3. existing rows are backfilled in primary-key batches of
+   UUID_MIGRATION_BATCH rows, each committed on its own, so locks are short
+4. under a write lock on each table, the triggers are dropped and the
+   shadow columns renamed into place, and any row left without a converted
+   key is filled in (the migration stops, keeping the old columns, if one
+   still can't be)
+5. an in-place table rebuild that allows concurrent reads and writes drops
+   the old columns, and the foreign keys are recreated
+
+Run it right before restarting onto the new code: workers still on the old
+code cannot insert rows once the columns are swapped. On RDS with binary
+logging, creating the triggers needs log_bin_trust_function_creators=1.
+SQLite (development, benchmarks) is converted in place.
+benchmarks/test_uuid_migration.py runs the MySQL path against a scratch
+server (UUID_MIGRATION_URL); run it before upgrading production data.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:41:07.512904
+
+"""
+import os
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Primary key first
+UUID_COLUMNS = {
+    'users': ('id', 'spa_id'),
+    'spas': ('id',),
+    'onboarding_info': ('id', 'spa_id'),
+    'documents': ('id', 'spa_id'),
+    'payment_methods': ('id', 'spa_id'),
+    'sharefile_credentials': ('id', 'user_id', 'created_by_user_id'),
+    'jobs': ('id',),
+    'notification_events': ('id', 'spa_id'),
+    'spa_snapshots': ('spa_id',),
+}
+
+BATCH = int(os.getenv('UUID_MIGRATION_BATCH', '5000'))
+
+
+def _shadow(column):
+    return f'{column}__new'
+
+
+def _add_shadow_columns(table, columns, column_type, expression):
+    op.execute(f'ALTER TABLE {table} ' + ', '.join(
+        f'ADD COLUMN {_shadow(column)} {column_type} NULL' for column in columns))
+    assignments = ', '.join(f'NEW.{_shadow(column)} = {expression.format(f"NEW.{column}")}' for column in columns)
+    for suffix, timing in (('ins', 'INSERT'), ('upd', 'UPDATE')):
+        op.execute(f'CREATE TRIGGER {table}__uuid_{suffix} BEFORE {timing} ON {table} FOR EACH ROW SET {assignments}')
+
+
+def _backfill(bind, table, columns, expression):
+    key = columns[0]
+    assignments = ', '.join(f'{_shadow(column)} = {expression.format(column)}' for column in columns)
+    last = None
+    while True:
+        where = f'WHERE {key} > :last ' if last is not None else ''
+        keys = [row[0] for row in bind.execute(
+            sa.text(f'SELECT {key} FROM {table} {where}ORDER BY {key} LIMIT {BATCH}'), {'last': last})]
+        if not keys:
+            return
+        bind.execute(sa.text(f'UPDATE {table} SET {assignments} WHERE {key} BETWEEN :first AND :last'),
+                     {'first': keys[0], 'last': keys[-1]})
+        last = keys[-1]
+
+
+def _swap(bind, table, columns, column_type, expression):
+    nullable = {column['name']: column['nullable'] for column in sa.inspect(bind).get_columns(table)}
+    # The triggers go and the columns are renamed under one write lock, so no row can be
+    # written in between without its shadow key
+    op.execute(f'LOCK TABLES {table} WRITE')
+    try:
+        op.execute(f'DROP TRIGGER {table}__uuid_ins')
+        op.execute(f'DROP TRIGGER {table}__uuid_upd')
+        # Metadata-only rename; the rebuild below keeps the table readable and writable
+        op.execute(f'ALTER TABLE {table} ' + ', '.join(
+            f'RENAME COLUMN {column} TO {column}__old, RENAME COLUMN {_shadow(column)} TO {column}'
+            for column in columns))
+        # Every old value must have a converted one before the old columns are dropped
+        missing = ' OR '.join(f'({column} IS NULL AND {column}__old IS NOT NULL)' for column in columns)
+        op.execute(f'UPDATE {table} SET ' + ', '.join(
+            f'{column} = {expression.format(f"{column}__old")}' for column in columns) + f' WHERE {missing}')
+        unconverted = bind.execute(sa.text(f'SELECT COUNT(*) FROM {table} WHERE {missing}')).scalar()
+        if unconverted:
+            raise RuntimeError(f'{unconverted} rows of {table} have no converted key; old columns kept as *__old')
+    finally:
+        op.execute('UNLOCK TABLES')
+    clauses = ['DROP PRIMARY KEY', f'ADD PRIMARY KEY ({columns[0]})']
+    for column in columns:
+        null = 'NULL' if nullable[column] else 'NOT NULL'
+        clauses.append(f'MODIFY {column} {column_type} {null}')
+        clauses.append(f'DROP COLUMN {column}__old')
+    op.execute(f'ALTER TABLE {table} ' + ', '.join(clauses))
+
+
+def _convert_mysql(column_type, expression):
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    foreign_keys = [(table, fk) for table in UUID_COLUMNS for fk in inspector.get_foreign_keys(table)]
+
+    with op.get_context().autocommit_block():
+        for table, fk in foreign_keys:
+            op.execute(f"ALTER TABLE {table} DROP FOREIGN KEY {fk['name']}")
+        for table, columns in UUID_COLUMNS.items():
+            _add_shadow_columns(table, columns, column_type, expression)
+        for table, columns in UUID_COLUMNS.items():
+            _backfill(bind, table, columns, expression)
+        # Swaps run back to back so the window where old workers can't insert stays short
+        for table, columns in UUID_COLUMNS.items():
+            _swap(bind, table, columns, column_type, expression)
+
+        # Rows were converted from consistent data; skipping the check keeps the ALTERs in place
+        op.execute('SET foreign_key_checks = 0')
+        for table, fk in foreign_keys:
+            op.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {fk['name']} "
+                f"FOREIGN KEY ({', '.join(fk['constrained_columns'])}) "
+                f"REFERENCES {fk['referred_table']} ({', '.join(fk['referred_columns'])})"
+            )
+        op.execute('SET foreign_key_checks = 1')
+
+
+def _convert_sqlite(column_type, convert):
+    bind = op.get_bind()
+    bind.connection.dbapi_connection.create_function('convert_uuid', 1, convert, deterministic=True)
+    for table, columns in UUID_COLUMNS.items():
+        op.execute(f'UPDATE {table} SET ' + ', '.join(f'{column} = convert_uuid({column})' for column in columns))
+        # Recreate from a copy with the new declared types; alter_column would CAST the converted values
+        definition = sa.Table(table, sa.MetaData(), autoload_with=bind)
+        for column in columns:
+            definition.c[column].type = column_type
+        with op.batch_alter_table(table, copy_from=definition, recreate='always'):
+            pass
+
+
+def _to_bytes(value):
+    return None if value is None or isinstance(value, bytes) else uuid.UUID(value).bytes
+
+
+def _to_string(value):
+    return None if value is None or isinstance(value, str) else str(uuid.UUID(bytes=value))
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        _convert_sqlite(sa.BINARY(16), _to_bytes)
+    else:
+        _convert_mysql('BINARY(16)', 'UUID_TO_BIN({})')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        _convert_sqlite(mysql.CHAR(36), _to_string)
+    else:
+        _convert_mysql('CHAR(36)', 'BIN_TO_UUID({})')
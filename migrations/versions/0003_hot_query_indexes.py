@@ -0,0 +1,53 @@
+"""hot query indexes
+
+Indexes for the predicates the app filters on every request or job run
+(dashboard stats, portal snapshot, signing progress, ShareFile credential
+lookups, token refresh scan, notification recipients). The query plans are
+checked by benchmarks/test_query_plans.py.
+
+On MySQL 8 CREATE INDEX builds in place and allows concurrent reads and
+writes. The new spa_id indexes also back the existing foreign keys, so
+MySQL drops the single-column index it created for each of them.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 01:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_spas_status', 'spas', ['status']),
+    ('ix_onboarding_info_spa_id', 'onboarding_info', ['spa_id']),
+    ('ix_documents_spa_id_status', 'documents', ['spa_id', 'status']),
+    ('ix_payment_methods_spa_id', 'payment_methods', ['spa_id']),
+    ('ix_sharefile_credentials_org_active', 'sharefile_credentials', ['organization_wide', 'is_active']),
+    ('ix_sharefile_credentials_refresh_scan', 'sharefile_credentials', ['is_active', 'auto_refresh', 'last_refreshed']),
+    ('ix_users_spa_id', 'users', ['spa_id']),
+    ('ix_users_role', 'users', ['role']),
+]
+
+# Tables whose spa_id foreign key needs an index of its own once ours is gone
+FOREIGN_KEY_TABLES = ('onboarding_info', 'documents', 'payment_methods')
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'mysql':
+        for table in FOREIGN_KEY_TABLES:
+            op.create_index('spa_id', table, ['spa_id'])
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,32 @@
+"""replication heartbeat
+
+Heartbeat row the leader worker rewrites on the primary; each worker reads
+the replica's copy to measure replication lag (app/services/replication.py).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 02:03:51.640215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('replication_heartbeats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('beat_at_ms', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('replication_heartbeats')
@@ -0,0 +1,49 @@
+"""sharefile items
+
+Local mirror of the ShareFile folder tree (id, parent, name, type, size,
+dates) with per-folder watermarks for incremental sync
+(app/services/sharefile_index.py).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 03:12:27.418306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sharefile_items',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('parent_id', sa.String(length=64), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('item_type', sa.String(length=20), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('modified_at', sa.DateTime(), nullable=True),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.Column('watermark', sa.String(length=40), nullable=True),
+        sa.Column('needs_listing', sa.Boolean(), nullable=False),
+        sa.Column('listed_at', sa.DateTime(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sharefile_items_parent_id', 'sharefile_items', ['parent_id'])
+    op.create_index('ix_sharefile_items_name', 'sharefile_items', ['name'])
+    op.create_index('ix_sharefile_items_needs_listing', 'sharefile_items', ['needs_listing', 'depth'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sharefile_items_needs_listing', table_name='sharefile_items')
+    op.drop_index('ix_sharefile_items_name', table_name='sharefile_items')
+    op.drop_index('ix_sharefile_items_parent_id', table_name='sharefile_items')
+    op.drop_table('sharefile_items')
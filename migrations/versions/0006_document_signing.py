@@ -0,0 +1,32 @@
+"""document signing
+
+Signing link pre-generated for each assigned document and the time its
+ShareFile signing status was last polled (app/services/background_jobs.py).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:41:12.508733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('signing_url', sa.Text(), nullable=True))
+    op.add_column('documents', sa.Column('status_checked_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_documents_status_checked_at', 'documents', ['status', 'status_checked_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_status_checked_at', table_name='documents')
+    op.drop_column('documents', 'status_checked_at')
+    op.drop_column('documents', 'signing_url')
@@ -0,0 +1,48 @@
+"""unique payment method per spa
+
+payment_methods.spa_id becomes unique so a concurrent payment confirmation
+and Stripe webhook can't both insert a row for the same spa
+(app/services/stripe_payments.py upsert_payment_methods). Duplicates left by
+that race are removed first, keeping each spa's most recent setup.
+
+The unique index is created before the old one is dropped, so MySQL always
+has an index backing the spa_id foreign key.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 10:27:53.904116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    payment_methods = sa.table('payment_methods', sa.column('id'), sa.column('spa_id'), sa.column('setup_at'))
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(payment_methods.c.id, payment_methods.c.spa_id).order_by(
+        payment_methods.c.spa_id, payment_methods.c.setup_at.desc(), payment_methods.c.id.desc())).all()
+    seen = set()
+    duplicates = []
+    for row_id, spa_id in rows:
+        if spa_id in seen:
+            duplicates.append(row_id)
+        seen.add(spa_id)
+    for start in range(0, len(duplicates), 500):
+        bind.execute(payment_methods.delete().where(payment_methods.c.id.in_(duplicates[start:start + 500])))
+
+    op.create_index('uq_payment_methods_spa_id', 'payment_methods', ['spa_id'], unique=True)
+    op.drop_index('ix_payment_methods_spa_id', table_name='payment_methods')
+
+
+def downgrade() -> None:
+    op.create_index('ix_payment_methods_spa_id', 'payment_methods', ['spa_id'])
+    op.drop_index('uq_payment_methods_spa_id', table_name='payment_methods')
@@ -0,0 +1,35 @@
+"""stream tickets
+
+Used /admin/events tickets, keyed by the ticket's jti so each one opens a
+single stream whichever worker it reaches (app/routes/admin.py
+admin_event_stream). Rows are removed once their ticket has expired.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 14:12:40.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stream_tickets',
+        sa.Column('jti', sa.String(length=64), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('jti'),
+    )
+    op.create_index('ix_stream_tickets_expires_at', 'stream_tickets', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stream_tickets_expires_at', table_name='stream_tickets')
+    op.drop_table('stream_tickets')